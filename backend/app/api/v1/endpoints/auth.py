@@ -5,19 +5,22 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from datetime import datetime, timedelta
+from datetime import timedelta
 import secrets
 
 from app.core.deps import get_db, get_current_user, get_admin
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token
 from app.core.config import settings
 from app.models.usuario import Usuario
+from app.models.version_cache import VERSION_USUARIOS, incrementar_version
+from app.utils.cache_usuarios import cache_usuarios
 from app.models.password_reset_token import PasswordResetToken
 from app.schemas.auth import Token, UserRegister, PasswordChange, RefreshTokenRequest
 from app.schemas.usuario import UsuarioResponse
 from app.utils.email import enviar_email, generar_email_recuperacion_password
 from app.utils.audit import audit_login_success, audit_login_failed, create_audit_log
 from app.models.audit_log import AuditAction
+from app.utils.fechas import utcnow
 
 router = APIRouter()
 
@@ -198,16 +201,22 @@ def change_password(
     """
     Cambiar contraseña del usuario actual
     """
+    # current_user es la copia del cache (sin hash): leer el registro
+    usuario = db.query(Usuario).filter(Usuario.id == current_user.id).first()
+    
     # Verificar contraseña actual
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not verify_password(password_data.current_password, usuario.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contraseña actual incorrecta"
         )
     
     # Actualizar contraseña
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    usuario.hashed_password = get_password_hash(password_data.new_password)
+    usuario.updated_at = utcnow()
+    incrementar_version(db, VERSION_USUARIOS)
     db.commit()
+    cache_usuarios.invalidar(usuario.id)
     
     # Auditar cambio de contraseña
     create_audit_log(
@@ -251,7 +260,7 @@ def forgot_password(
     
     # Generar token único y seguro
     token = secrets.token_urlsafe(32)
-    expira_en = datetime.now(timezone.utc) + timedelta(minutes=30)  # Válido por 30 minutos
+    expira_en = utcnow() + timedelta(minutes=30)  # Válido por 30 minutos
     
     # Guardar token en la base de datos
     reset_token = PasswordResetToken(
@@ -316,7 +325,7 @@ def reset_password(
         )
     
     # Verificar que no haya expirado
-    if datetime.now(timezone.utc) > reset_token.expira_en:
+    if utcnow() > reset_token.expira_en:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El token ha expirado. Solicita una nueva recuperación"
@@ -332,11 +341,13 @@ def reset_password(
     
     # Actualizar contraseña
     usuario.hashed_password = get_password_hash(request.new_password)
-    usuario.updated_at = datetime.now(timezone.utc)
+    usuario.updated_at = utcnow()
     
     # Marcar token como usado
     reset_token.usado = True
     
+    incrementar_version(db, VERSION_USUARIOS)
     db.commit()
+    cache_usuarios.invalidar(usuario.id)
     
     return {"message": "Contraseña actualizada exitosamente"}
@@ -1,17 +1,16 @@
 """
 Endpoints de Cajas
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response, Header
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
-from app.core.deps import get_db, get_current_user, get_cajero_or_admin, get_admin
+from app.core.deps import get_db, get_async_db, get_current_user, get_cajero_or_admin, get_cajero_or_admin_async, get_admin
 from app.models.usuario import Usuario
-from app.models.caja import Caja, MovimientoCaja, TurnoEnum, EstadoCaja, TipoMovimiento, DesgloseEfectivoCierre
+from app.models.caja import Caja, MovimientoCaja, TurnoEnum, EstadoCaja, TipoMovimiento, DesgloseEfectivoCierre, select_caja_abierta
 from app.models.vehiculo import VehiculoProceso, EstadoVehiculo
 from app.schemas.caja import (
     CajaApertura,
@@ -23,12 +22,75 @@ from app.schemas.caja import (
     CajaResumen
 )
 from app.utils.audit import audit_caja_operation
+from app.utils.paginacion import paginar_keyset, agregar_next_cursor
 from app.models.audit_log import AuditAction
-from app.utils.comprobantes_caja import generar_comprobante_cierre_caja
+from app.utils.almacen_comprobantes import almacen_comprobantes, respuesta_comprobante, GENERADORES, TIPO_CIERRE_CAJA
+from app.utils.datos_comprobantes import datos_cierre_caja, nombre_archivo_cierre
+from app.utils.render_pdf import ejecutor_render
+from app.utils.metricas import cierres_caja
+from app.utils.fechas import utcnow
 
 router = APIRouter()
 
 
+# ==================== CONSULTAS ====================
+# (también las revisa scripts/verificar_planes_consulta.py)
+
+def select_vehiculos_cobrados(caja_id):
+    """Cantidad de vehículos cobrados en la caja"""
+    return select(func.count(VehiculoProceso.id)).where(
+        VehiculoProceso.caja_id == caja_id
+    )
+
+
+def consulta_pendientes_caja(db: Session, caja_id):
+    """Vehículos registrados en la caja que aún no se cobran"""
+    return db.query(VehiculoProceso).filter(
+        and_(
+            VehiculoProceso.caja_id == caja_id,
+            VehiculoProceso.estado == EstadoVehiculo.REGISTRADO
+        )
+    )
+
+
+def consulta_vehiculos_por_metodo(db: Session, caja_id):
+    """Vehículos cobrados en la caja con su método de pago, más recientes primero"""
+    return db.query(
+        VehiculoProceso.placa,
+        VehiculoProceso.cliente_nombre,
+        VehiculoProceso.total_cobrado,
+        VehiculoProceso.metodo_pago,
+        VehiculoProceso.fecha_pago
+    ).filter(
+        VehiculoProceso.caja_id == caja_id
+    ).order_by(VehiculoProceso.fecha_pago.desc())
+
+
+def consulta_movimientos_caja(db: Session, caja_id):
+    """Movimientos de la caja en orden cronológico"""
+    return db.query(MovimientoCaja).filter(
+        MovimientoCaja.caja_id == caja_id
+    ).order_by(MovimientoCaja.created_at)
+
+
+def consulta_ultima_cerrada(db: Session, usuario_id):
+    """Cajas cerradas del usuario, la más reciente primero"""
+    return db.query(Caja).filter(
+        and_(
+            Caja.usuario_id == usuario_id,
+            Caja.estado == EstadoCaja.CERRADA
+        )
+    ).order_by(Caja.fecha_cierre.desc())
+
+
+def consulta_historial(db: Session, usuario: Usuario):
+    """Cajas visibles para el usuario (admin ve todas, cajero solo las suyas)"""
+    query = db.query(Caja)
+    if usuario.rol != "administrador":
+        query = query.filter(Caja.usuario_id == usuario.id)
+    return query
+
+
 @router.post("/abrir", response_model=CajaResponse, status_code=status.HTTP_201_CREATED)
 def abrir_caja(
     request: Request,
@@ -47,12 +109,7 @@ def abrir_caja(
         )
     
     # Verificar que no tenga ya una caja abierta
-    caja_existente = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja_existente = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if caja_existente:
         raise HTTPException(
@@ -97,12 +154,7 @@ def obtener_caja_activa(
     """
     Obtener caja activa del usuario actual
     """
-    caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if not caja:
         raise HTTPException(
@@ -114,19 +166,15 @@ def obtener_caja_activa(
 
 
 @router.get("/activa/resumen", response_model=CajaResumen)
-def obtener_resumen_caja(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_cajero_or_admin)
+async def obtener_resumen_caja(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_cajero_or_admin_async)
 ):
     """
     Obtener resumen de caja activa (para pre-cierre)
     """
-    caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    resultado = await db.execute(select_caja_abierta(current_user.id))
+    caja = resultado.scalars().first()
     
     if not caja:
         raise HTTPException(
@@ -134,72 +182,24 @@ def obtener_resumen_caja(
             detail="No tienes una caja abierta"
         )
     
-    # Calcular totales por método de pago
-    movimientos = db.query(MovimientoCaja).filter(
-        MovimientoCaja.caja_id == caja.id
-    ).all()
-    
-    efectivo = Decimal(0)
-    tarjeta_debito = Decimal(0)
-    tarjeta_credito = Decimal(0)
-    transferencia = Decimal(0)
-    credismart = Decimal(0)
-    sistecredito = Decimal(0)
-    total_rtm = Decimal(0)
-    total_comision_soat = Decimal(0)
-    total_ingresos = Decimal(0)
-    total_ingresos_efectivo = Decimal(0)
-    total_egresos = Decimal(0)
-    
-    for mov in movimientos:
-        if mov.monto > 0:
-            total_ingresos += mov.monto
-            if mov.ingresa_efectivo:
-                total_ingresos_efectivo += mov.monto
-            
-            # Clasificar por tipo de concepto
-            if mov.tipo == TipoMovimiento.RTM:
-                total_rtm += mov.monto
-            elif mov.tipo == TipoMovimiento.COMISION_SOAT:
-                total_comision_soat += mov.monto
-            
-            # Clasificar por método (case-insensitive)
-            metodo_lower = mov.metodo_pago.lower() if mov.metodo_pago else ""
-            if metodo_lower == "efectivo":
-                efectivo += mov.monto
-            elif metodo_lower == "tarjeta_debito":
-                tarjeta_debito += mov.monto
-            elif metodo_lower == "tarjeta_credito":
-                tarjeta_credito += mov.monto
-            elif metodo_lower == "transferencia":
-                transferencia += mov.monto
-            elif metodo_lower == "credismart":
-                credismart += mov.monto
-            elif metodo_lower == "sistecredito":
-                sistecredito += mov.monto
-        else:
-            total_egresos += abs(mov.monto)
-    
-    # Contar vehículos cobrados
-    vehiculos_cobrados = db.query(func.count(VehiculoProceso.id)).filter(
-        VehiculoProceso.caja_id == caja.id
-    ).scalar()
+    # Contar vehículos cobrados (los totales son columnas acumuladas de la caja)
+    vehiculos_cobrados = (await db.execute(select_vehiculos_cobrados(caja.id))).scalar()
     
     return CajaResumen(
         caja_id=caja.id,
         monto_inicial=caja.monto_inicial,
-        total_ingresos=total_ingresos,
-        total_ingresos_efectivo=total_ingresos_efectivo,
-        total_egresos=total_egresos,
-        saldo_esperado=caja.saldo_esperado,  # Usar propiedad del modelo
-        efectivo=efectivo,
-        tarjeta_debito=tarjeta_debito,
-        tarjeta_credito=tarjeta_credito,
-        transferencia=transferencia,
-        credismart=credismart,
-        sistecredito=sistecredito,
-        total_rtm=total_rtm,
-        total_comision_soat=total_comision_soat,
+        total_ingresos=caja.total_ingresos,
+        total_ingresos_efectivo=caja.total_ingresos_efectivo,
+        total_egresos=caja.total_egresos,
+        saldo_esperado=caja.saldo_esperado,
+        efectivo=caja.total_efectivo,
+        tarjeta_debito=caja.total_tarjeta_debito,
+        tarjeta_credito=caja.total_tarjeta_credito,
+        transferencia=caja.total_transferencia,
+        credismart=caja.total_credismart,
+        sistecredito=caja.total_sistecredito,
+        total_rtm=caja.total_rtm,
+        total_comision_soat=caja.total_comision_soat,
         vehiculos_cobrados=vehiculos_cobrados or 0
     )
 
@@ -214,12 +214,8 @@ def cerrar_caja(
     """
     Cerrar caja de trabajo
     """
-    caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    # Bloquear la fila: un cobro concurrente espera a que el cierre termine
+    caja = db.execute(select_caja_abierta(current_user.id).with_for_update()).scalars().first()
     
     if not caja:
         raise HTTPException(
@@ -228,12 +224,7 @@ def cerrar_caja(
         )
     
     # Validar que no haya vehículos en proceso sin cobrar
-    vehiculos_pendientes = db.query(VehiculoProceso).filter(
-        and_(
-            VehiculoProceso.caja_id == caja.id,
-            VehiculoProceso.estado == EstadoVehiculo.REGISTRADO
-        )
-    ).count()
+    vehiculos_pendientes = consulta_pendientes_caja(db, caja.id).count()
     
     if vehiculos_pendientes > 0:
         raise HTTPException(
@@ -249,20 +240,19 @@ def cerrar_caja(
             detail=f"El desglose de efectivo (${total_desglose:,.0f}) no coincide con el monto final físico declarado (${cierre_data.monto_final_fisico:,.0f})"
         )
     
-    # Validar que si hay efectivo esperado, el desglose no sea cero
+    # Saldo esperado desde los totales acumulados de la caja
     saldo_esperado = caja.saldo_esperado
+    
+    # Validar que si hay efectivo esperado, el desglose no sea cero
     if saldo_esperado > Decimal('0') and total_desglose == Decimal('0'):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Se esperan ${saldo_esperado:,.0f} en efectivo pero el desglose está vacío. Debes contar los billetes y monedas."
         )
     
-    # Calcular saldo esperado
-    saldo_esperado = caja.saldo_esperado
-    
     try:
         # Actualizar caja
-        caja.fecha_cierre = datetime.now(timezone.utc)
+        caja.fecha_cierre = utcnow()
         caja.monto_final_sistema = Decimal(str(saldo_esperado))
         caja.monto_final_fisico = cierre_data.monto_final_fisico
         caja.diferencia = cierre_data.monto_final_fisico - Decimal(str(saldo_esperado))
@@ -304,6 +294,7 @@ def cerrar_caja(
         
         # Commit atómico de caja + desglose + notificación
         db.commit()
+        cierres_caja.incrementar()
         db.refresh(caja)
         
         # Auditar cierre de caja (fuera de la transacción crítica)
@@ -342,12 +333,7 @@ def crear_movimiento(
     """
     Crear movimiento manual (gasto, ajuste, etc)
     """
-    caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if not caja:
         raise HTTPException(
@@ -405,12 +391,7 @@ def obtener_vehiculos_por_metodo(
     """
     Obtener vehículos cobrados agrupados por método de pago
     """
-    caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if not caja:
         raise HTTPException(
@@ -419,15 +400,7 @@ def obtener_vehiculos_por_metodo(
         )
     
     # Obtener vehículos cobrados con su método de pago
-    vehiculos = db.query(
-        VehiculoProceso.placa,
-        VehiculoProceso.cliente_nombre,
-        VehiculoProceso.total_cobrado,
-        VehiculoProceso.metodo_pago,
-        VehiculoProceso.fecha_pago
-    ).filter(
-        VehiculoProceso.caja_id == caja.id
-    ).order_by(VehiculoProceso.fecha_pago.desc()).all()
+    vehiculos = consulta_vehiculos_por_metodo(db, caja.id).all()
     
     # Agrupar por método de pago
     agrupados = {
@@ -461,12 +434,7 @@ def listar_movimientos(
     """
     Listar movimientos de la caja activa
     """
-    caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if not caja:
         raise HTTPException(
@@ -474,9 +442,7 @@ def listar_movimientos(
             detail="No tienes una caja abierta"
         )
     
-    movimientos = db.query(MovimientoCaja).filter(
-        MovimientoCaja.caja_id == caja.id
-    ).order_by(MovimientoCaja.created_at).all()
+    movimientos = consulta_movimientos_caja(db, caja.id).all()
     
     return movimientos
 
@@ -489,20 +455,13 @@ def obtener_ultima_caja_cerrada(
     """
     Obtener resumen de la última caja cerrada del usuario
     """
-    ultima_caja = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.CERRADA
-        )
-    ).order_by(Caja.fecha_cierre.desc()).first()
+    ultima_caja = consulta_ultima_cerrada(db, current_user.id).first()
     
     if not ultima_caja:
         return None
     
     # Contar vehículos cobrados
-    vehiculos_cobrados = db.query(func.count(VehiculoProceso.id)).filter(
-        VehiculoProceso.caja_id == ultima_caja.id
-    ).scalar()
+    vehiculos_cobrados = db.execute(select_vehiculos_cobrados(ultima_caja.id)).scalar()
     
     return {
         "fecha_cierre": ultima_caja.fecha_cierre.isoformat(),
@@ -515,20 +474,19 @@ def obtener_ultima_caja_cerrada(
 
 @router.get("/historial", response_model=List[CajaResponse])
 def obtener_historial_cajas(
-    limit: int = 10,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (header X-Next-Cursor)"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Obtener historial de cajas (admin ve todas, cajero solo las suyas)
+    Paginación por cursor: la siguiente página se pide con ?cursor=<X-Next-Cursor>
     """
-    query = db.query(Caja)
-    
-    # Si no es admin, solo ver sus propias cajas
-    if current_user.rol != "administrador":
-        query = query.filter(Caja.usuario_id == current_user.id)
-    
-    cajas = query.order_by(Caja.fecha_apertura.desc()).limit(limit).all()
+    query = consulta_historial(db, current_user)
+    cajas, next_cursor = paginar_keyset(query, Caja.fecha_apertura, Caja.id, cursor, limit)
+    agregar_next_cursor(response, next_cursor)
     
     return cajas
 
@@ -558,35 +516,10 @@ def obtener_detalle_caja(
         )
     
     # Obtener movimientos
-    movimientos = db.query(MovimientoCaja).filter(
-        MovimientoCaja.caja_id == caja.id
-    ).order_by(MovimientoCaja.created_at).all()
-    
-    # Calcular totales por método
-    efectivo = Decimal(0)
-    tarjeta = Decimal(0)
-    transferencia = Decimal(0)
-    credismart = Decimal(0)
-    sistecredito = Decimal(0)
-    
-    for mov in movimientos:
-        if mov.monto > 0:
-            metodo_lower = mov.metodo_pago.lower() if mov.metodo_pago else ""
-            if metodo_lower == "efectivo":
-                efectivo += mov.monto
-            elif metodo_lower in ["tarjeta_debito", "tarjeta_credito"]:
-                tarjeta += mov.monto
-            elif metodo_lower == "transferencia":
-                transferencia += mov.monto
-            elif metodo_lower == "credismart":
-                credismart += mov.monto
-            elif metodo_lower == "sistecredito":
-                sistecredito += mov.monto
+    movimientos = consulta_movimientos_caja(db, caja.id).all()
     
     # Contar vehículos
-    vehiculos_cobrados = db.query(func.count(VehiculoProceso.id)).filter(
-        VehiculoProceso.caja_id == caja.id
-    ).scalar()
+    vehiculos_cobrados = db.execute(select_vehiculos_cobrados(caja.id)).scalar()
     
     # Crear CajaResponse con propiedades calculadas
     caja_response = CajaResponse(
@@ -610,17 +543,18 @@ def obtener_detalle_caja(
         caja=caja_response,
         movimientos=movimientos,
         vehiculos_cobrados=vehiculos_cobrados or 0,
-        total_efectivo=efectivo,
-        total_tarjeta=tarjeta,
-        total_transferencia=transferencia,
-        total_credismart=credismart,
-        total_sistecredito=sistecredito
+        total_efectivo=caja.total_efectivo,
+        total_tarjeta=caja.total_tarjeta_debito + caja.total_tarjeta_credito,
+        total_transferencia=caja.total_transferencia,
+        total_credismart=caja.total_credismart,
+        total_sistecredito=caja.total_sistecredito
     )
 
 
 @router.get("/{caja_id}/comprobante-cierre")
 def descargar_comprobante_cierre(
     caja_id: str,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -660,94 +594,17 @@ def descargar_comprobante_cierre(
             detail="No se encontró el desglose de efectivo para esta caja"
         )
     
-    # Calcular totales para el PDF
-    movimientos = db.query(MovimientoCaja).filter(
-        MovimientoCaja.caja_id == caja.id
-    ).all()
-    
-    total_rtm = Decimal(0)
-    total_soat = Decimal(0)
-    total_efectivo = Decimal(0)
-    total_tarjeta_debito = Decimal(0)
-    total_tarjeta_credito = Decimal(0)
-    total_transferencia = Decimal(0)
-    total_credismart = Decimal(0)
-    total_sistecredito = Decimal(0)
-    
-    for mov in movimientos:
-        if mov.monto > 0:
-            if mov.tipo == TipoMovimiento.RTM:
-                total_rtm += mov.monto
-            elif mov.tipo == TipoMovimiento.COMISION_SOAT:
-                total_soat += mov.monto
-            
-            # Clasificar por método de pago (case-insensitive)
-            metodo_lower = mov.metodo_pago.lower() if mov.metodo_pago else ""
-            if metodo_lower == "efectivo":
-                total_efectivo += mov.monto
-            elif metodo_lower == "tarjeta_debito":
-                total_tarjeta_debito += mov.monto
-            elif metodo_lower == "tarjeta_credito":
-                total_tarjeta_credito += mov.monto
-            elif metodo_lower == "transferencia":
-                total_transferencia += mov.monto
-            elif metodo_lower == "credismart":
-                total_credismart += mov.monto
-            elif metodo_lower == "sistecredito":
-                total_sistecredito += mov.monto
-    
     # Contar vehículos
-    vehiculos_cobrados = db.query(func.count(VehiculoProceso.id)).filter(
-        VehiculoProceso.caja_id == caja.id
-    ).scalar() or 0
-    
-    # Preparar desglose como diccionario
-    desglose_dict = {
-        'billetes_100000': int(desglose.billetes_100000 or 0),
-        'billetes_50000': int(desglose.billetes_50000 or 0),
-        'billetes_20000': int(desglose.billetes_20000 or 0),
-        'billetes_10000': int(desglose.billetes_10000 or 0),
-        'billetes_5000': int(desglose.billetes_5000 or 0),
-        'billetes_2000': int(desglose.billetes_2000 or 0),
-        'billetes_1000': int(desglose.billetes_1000 or 0),
-        'monedas_1000': int(desglose.monedas_1000 or 0),
-        'monedas_500': int(desglose.monedas_500 or 0),
-        'monedas_200': int(desglose.monedas_200 or 0),
-        'monedas_100': int(desglose.monedas_100 or 0),
-        'monedas_50': int(desglose.monedas_50 or 0),
-    }
+    vehiculos_cobrados = db.execute(select_vehiculos_cobrados(caja.id)).scalar() or 0
     
-    # Generar PDF
-    pdf_buffer = generar_comprobante_cierre_caja(
-        caja_id=str(caja.id),
-        cajero_nombre=caja.usuario.nombre_completo,
-        turno=caja.turno.value,
-        fecha_apertura=caja.fecha_apertura,
-        fecha_cierre=caja.fecha_cierre,
-        monto_inicial=caja.monto_inicial,
-        total_ingresos_efectivo=Decimal(str(caja.total_ingresos_efectivo)),
-        total_egresos=Decimal(str(caja.total_egresos)),
-        saldo_esperado=Decimal(str(caja.saldo_esperado)),
-        monto_final_fisico=caja.monto_final_fisico,
-        diferencia=caja.diferencia,
-        desglose_efectivo=desglose_dict,
-        observaciones=caja.observaciones_cierre,
-        vehiculos_cobrados=vehiculos_cobrados,
-        total_rtm=total_rtm,
-        total_soat=total_soat,
-        total_efectivo=total_efectivo,
-        total_tarjeta_debito=total_tarjeta_debito,
-        total_tarjeta_credito=total_tarjeta_credito,
-        total_transferencia=total_transferencia,
-        total_credismart=total_credismart,
-        total_sistecredito=total_sistecredito
-    )
+    # Datos del PDF (también determinan la huella del archivo guardado)
+    datos = datos_cierre_caja(caja, desglose, vehiculos_cobrados)
     
-    # Retornar PDF
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=comprobante_cierre_caja_{caja.fecha_cierre.strftime('%Y%m%d_%H%M')}.pdf"
-        }
+    # Generar el PDF solo la primera vez; después se sirve desde disco
+    comprobante = almacen_comprobantes.obtener(
+        TIPO_CIERRE_CAJA,
+        caja.id,
+        datos,
+        lambda: ejecutor_render.renderizar(GENERADORES[TIPO_CIERRE_CAJA], datos)
     )
+    return respuesta_comprobante(comprobante, nombre_archivo_cierre(caja), if_none_match)
@@ -1,21 +1,326 @@
 """
 Endpoints de Reportes - Dashboard General y Consolidados
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from operator import itemgetter
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, and_, select, cast, Date
 from datetime import datetime, timedelta, date, timezone
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
+import heapq
 
 from app.core.deps import get_db, get_current_user, get_admin
+from app.db.database import SessionLocal
 from app.models.usuario import Usuario
-from app.models.caja import MovimientoCaja
-from app.models.tesoreria import MovimientoTesoreria
+from app.utils.fechas import hoy_negocio, rango_dia, rango_dias, rango_mes, dias_del_mes, a_hora_negocio
+from app.utils.exportar import respuesta_exportacion
+from app.core.config import settings
+from app.models.caja import Caja, EstadoCaja, MovimientoCaja
+from app.models.tesoreria import MovimientoTesoreria, TipoMovimientoTesoreria
 from app.models.vehiculo import VehiculoProceso
+from app.models.resumen_diario import ResumenDiario, ModuloResumen, SIN_CATEGORIA
+from app.models.saldo_checkpoint import expr_saldo
+from app.utils.almacen_comprobantes import TIPO_CIERRE_CAJA, TIPO_EGRESO
+from app.utils.datos_comprobantes import datos_cierre_caja, nombre_archivo_cierre, datos_egreso, nombre_archivo_egreso
+from app.utils.exportar_comprobantes import EntradaComprobante, generar_zip_comprobantes
 
 router = APIRouter()
 
+_ETIQUETA_MODULO = {
+    ModuloResumen.CAJA.value: "Caja",
+    ModuloResumen.TESORERIA.value: "Tesorería",
+}
+
+
+def _periodo(fecha: Optional[date], fecha_inicio: Optional[date], fecha_fin: Optional[date]):
+    """Días (desde, hasta) inclusive y etiqueta del período pedido (día único o rango)"""
+    if fecha_inicio and fecha_fin:
+        return fecha_inicio, fecha_fin, f"{fecha_inicio.strftime('%Y-%m-%d')} a {fecha_fin.strftime('%Y-%m-%d')}"
+    if not fecha:
+        fecha = hoy_negocio()
+    return fecha, fecha, fecha.strftime("%Y-%m-%d")
+
+
+# ==================== CONSULTAS ====================
+# (también las revisa scripts/verificar_planes_consulta.py)
+
+def select_conteo_tramites(desde_dt: datetime, hasta_dt: datetime):
+    """Cantidad de trámites registrados en el rango UTC [desde_dt, hasta_dt)"""
+    return select(func.count(VehiculoProceso.id)).where(
+        and_(
+            VehiculoProceso.fecha_registro >= desde_dt,
+            VehiculoProceso.fecha_registro < hasta_dt
+        )
+    )
+
+
+def consulta_totales_dia(db: Session, fecha: date):
+    """Ingresos / egresos del día por módulo (resumen_diario), saldos y trámites en una fila"""
+    es_caja = ResumenDiario.modulo == ModuloResumen.CAJA.value
+    es_tesoreria = ResumenDiario.modulo == ModuloResumen.TESORERIA.value
+    
+    return db.query(
+        func.coalesce(func.sum(ResumenDiario.ingresos).filter(es_caja), 0).label("ingresos_caja"),
+        func.coalesce(func.sum(ResumenDiario.egresos).filter(es_caja), 0).label("egresos_caja"),
+        func.coalesce(func.sum(ResumenDiario.ingresos).filter(es_tesoreria), 0).label("ingresos_tesoreria"),
+        func.coalesce(func.sum(ResumenDiario.egresos).filter(es_tesoreria), 0).label("egresos_tesoreria"),
+        # Saldos: último checkpoint + resumen posterior (ver saldo_checkpoint.py)
+        expr_saldo(ModuloResumen.CAJA.value).label("saldo_cajas"),
+        expr_saldo(ModuloResumen.TESORERIA.value).label("saldo_tesoreria"),
+        select_conteo_tramites(*rango_dia(fecha)).scalar_subquery().label("tramites_dia")
+    ).filter(ResumenDiario.dia == fecha)
+
+
+def consulta_ingresos_7_dias(db: Session, fecha: date):
+    """Ingresos de los 7 días de negocio que terminan en `fecha`, uno por fila aunque sea cero"""
+    desde = fecha - timedelta(days=6)
+    # generate_series garantiza una fila por día aunque no haya movimientos
+    serie = select(
+        cast(func.generate_series(desde, fecha, timedelta(days=1)), Date).label("dia")
+    ).subquery()
+    
+    # El rango explícito permite recorrer el índice de resumen_diario en lugar de leer toda la tabla
+    return db.query(
+        serie.c.dia,
+        func.coalesce(func.sum(ResumenDiario.ingresos), 0)
+    ).outerjoin(
+        ResumenDiario,
+        and_(
+            ResumenDiario.dia == serie.c.dia,
+            ResumenDiario.dia >= desde,
+            ResumenDiario.dia <= fecha
+        )
+    ).group_by(serie.c.dia).order_by(serie.c.dia)
+
+
+def consulta_totales_por_modulo(db: Session, desde: date, hasta: date):
+    """(módulo, ingresos, egresos) entre dos días de negocio inclusive"""
+    return db.query(
+        ResumenDiario.modulo,
+        func.sum(ResumenDiario.ingresos),
+        func.sum(ResumenDiario.egresos)
+    ).filter(
+        and_(
+            ResumenDiario.dia >= desde,
+            ResumenDiario.dia <= hasta
+        )
+    ).group_by(ResumenDiario.modulo)
+
+
+def consulta_desglose_conceptos(db: Session, desde: date, hasta: date):
+    """(módulo, concepto, ingresos, egresos) entre dos días de negocio inclusive"""
+    return db.query(
+        ResumenDiario.modulo,
+        ResumenDiario.concepto,
+        func.sum(ResumenDiario.ingresos),
+        func.sum(ResumenDiario.egresos)
+    ).filter(
+        and_(
+            ResumenDiario.dia >= desde,
+            ResumenDiario.dia <= hasta,
+            ResumenDiario.concepto != SIN_CATEGORIA
+        )
+    ).group_by(ResumenDiario.modulo, ResumenDiario.concepto)
+
+
+def consulta_medios_pago(db: Session, desde: date, hasta: date):
+    """Neto (ingresos - egresos) por módulo y método de pago entre dos días de negocio inclusive"""
+    return db.query(
+        ResumenDiario.modulo,
+        ResumenDiario.metodo_pago,
+        func.sum(ResumenDiario.ingresos - ResumenDiario.egresos).label("total")
+    ).filter(
+        and_(
+            ResumenDiario.dia >= desde,
+            ResumenDiario.dia <= hasta,
+            ResumenDiario.metodo_pago != ""
+        )
+    ).group_by(ResumenDiario.modulo, ResumenDiario.metodo_pago)
+
+
+def consulta_movimientos_caja_rango(db: Session, desde_dt: datetime, hasta_dt: datetime):
+    """Movimientos de caja del rango UTC [desde_dt, hasta_dt) en orden cronológico"""
+    return db.query(MovimientoCaja).filter(
+        and_(
+            MovimientoCaja.created_at >= desde_dt,
+            MovimientoCaja.created_at < hasta_dt
+        )
+    ).order_by(MovimientoCaja.created_at.asc())
+
+
+def consulta_movimientos_tesoreria_rango(db: Session, desde_dt: datetime, hasta_dt: datetime):
+    """Movimientos de tesorería del rango UTC [desde_dt, hasta_dt) en orden cronológico"""
+    return db.query(MovimientoTesoreria).filter(
+        and_(
+            MovimientoTesoreria.fecha_movimiento >= desde_dt,
+            MovimientoTesoreria.fecha_movimiento < hasta_dt
+        )
+    ).order_by(MovimientoTesoreria.fecha_movimiento.asc())
+
+
+def consulta_tramites_rango(db: Session, desde_dt: datetime, hasta_dt: datetime):
+    """Trámites registrados en el rango UTC [desde_dt, hasta_dt) en orden cronológico"""
+    return db.query(VehiculoProceso).filter(
+        and_(
+            VehiculoProceso.fecha_registro >= desde_dt,
+            VehiculoProceso.fecha_registro < hasta_dt
+        )
+    ).order_by(VehiculoProceso.fecha_registro.asc())
+
+
+def _totales_por_modulo(db: Session, desde: date, hasta: date) -> dict:
+    """(ingresos, egresos) por módulo entre dos días de negocio, leídos de resumen_diario"""
+    totales = {modulo.value: (Decimal(0), Decimal(0)) for modulo in ModuloResumen}
+    filas = consulta_totales_por_modulo(db, desde, hasta).all()
+    for modulo, ingresos, egresos in filas:
+        totales[modulo] = (ingresos or Decimal(0), egresos or Decimal(0))
+    return totales
+
+
+# ==================== EXPORTACIÓN (CSV / XLSX) ====================
+
+# Filas por lote del cursor del servidor
+_FILAS_POR_LOTE = 1000
+
+ENCABEZADOS_MOVIMIENTOS = [
+    "Fecha", "Hora", "Módulo", "Turno", "Tipo", "Concepto", "Categoría",
+    "Monto", "Método de pago", "Usuario", "Comprobante"
+]
+
+ENCABEZADOS_TRAMITES = [
+    "Fecha", "Hora", "Placa", "Tipo vehículo", "Cliente", "Documento", "Valor RTM",
+    "Comisión SOAT", "Total cobrado", "Método de pago", "Estado", "Registrado por"
+]
+
+
+def _categoria_tesoreria(cat_ingreso, cat_egreso, monto) -> str:
+    """Categoría de un movimiento de tesorería según su signo"""
+    categoria = cat_ingreso if monto > 0 else cat_egreso
+    return categoria.value if categoria else "N/A"
+
+
+def _fecha_hora(momento: datetime):
+    """Fecha y hora locales (zona del negocio) de un timestamp de la base de datos"""
+    local = a_hora_negocio(momento)
+    return local.strftime("%Y-%m-%d"), local.strftime("%H:%M:%S")
+
+
+def _filas_movimientos(desde_dt: datetime, hasta_dt: datetime):
+    """
+    Movimientos de caja y tesorería en orden cronológico para exportar.
+    Lee ambas tablas con cursores del servidor (yield_per) y las intercala
+    con heapq.merge, así nunca hay más de un lote por tabla en memoria.
+    Usa su propia sesión porque se consume después de que el endpoint retorna.
+    """
+    db = SessionLocal()
+    try:
+        filas_caja = db.execute(
+            select(
+                MovimientoCaja.created_at,
+                Caja.turno,
+                MovimientoCaja.tipo,
+                MovimientoCaja.concepto,
+                MovimientoCaja.monto,
+                MovimientoCaja.metodo_pago,
+                Usuario.nombre_completo
+            )
+            .outerjoin(Caja, MovimientoCaja.caja_id == Caja.id)
+            .outerjoin(Usuario, MovimientoCaja.created_by == Usuario.id)
+            .where(MovimientoCaja.created_at >= desde_dt, MovimientoCaja.created_at < hasta_dt)
+            .order_by(MovimientoCaja.created_at)
+            .execution_options(yield_per=_FILAS_POR_LOTE)
+        )
+        
+        filas_tesoreria = db.execute(
+            select(
+                MovimientoTesoreria.fecha_movimiento,
+                MovimientoTesoreria.categoria_ingreso,
+                MovimientoTesoreria.categoria_egreso,
+                MovimientoTesoreria.concepto,
+                MovimientoTesoreria.monto,
+                MovimientoTesoreria.metodo_pago,
+                MovimientoTesoreria.numero_comprobante,
+                Usuario.nombre_completo
+            )
+            .outerjoin(Usuario, MovimientoTesoreria.created_by == Usuario.id)
+            .where(MovimientoTesoreria.fecha_movimiento >= desde_dt, MovimientoTesoreria.fecha_movimiento < hasta_dt)
+            .order_by(MovimientoTesoreria.fecha_movimiento)
+            .execution_options(yield_per=_FILAS_POR_LOTE)
+        )
+        
+        caja = (
+            (momento, "Caja", turno.value if turno else "N/A", tipo.value, concepto, monto,
+             metodo_pago or "N/A", usuario or "Sistema", "N/A")
+            for momento, turno, tipo, concepto, monto, metodo_pago, usuario in filas_caja
+        )
+        tesoreria = (
+            (momento, "Tesorería", "N/A", _categoria_tesoreria(cat_ingreso, cat_egreso, monto), concepto, monto,
+             metodo_pago.value, usuario or "Sistema", comprobante or "N/A")
+            for momento, cat_ingreso, cat_egreso, concepto, monto, metodo_pago, comprobante, usuario in filas_tesoreria
+        )
+        
+        for momento, modulo, turno, categoria, concepto, monto, metodo, usuario, comprobante in heapq.merge(
+            caja, tesoreria, key=itemgetter(0)
+        ):
+            yield (
+                *_fecha_hora(momento),
+                modulo,
+                turno,
+                "Ingreso" if monto > 0 else "Egreso",
+                concepto,
+                categoria,
+                abs(monto),
+                metodo,
+                usuario,
+                comprobante
+            )
+    finally:
+        db.close()
+
+
+def _filas_tramites(desde_dt: datetime, hasta_dt: datetime):
+    """Trámites del rango para exportar, leídos con cursor del servidor (yield_per)"""
+    db = SessionLocal()
+    try:
+        filas = db.execute(
+            select(
+                VehiculoProceso.fecha_registro,
+                VehiculoProceso.placa,
+                VehiculoProceso.tipo_vehiculo,
+                VehiculoProceso.cliente_nombre,
+                VehiculoProceso.cliente_documento,
+                VehiculoProceso.valor_rtm,
+                VehiculoProceso.comision_soat,
+                VehiculoProceso.total_cobrado,
+                VehiculoProceso.metodo_pago,
+                VehiculoProceso.estado,
+                Usuario.nombre_completo
+            )
+            .outerjoin(Usuario, VehiculoProceso.registrado_por == Usuario.id)
+            .where(VehiculoProceso.fecha_registro >= desde_dt, VehiculoProceso.fecha_registro < hasta_dt)
+            .order_by(VehiculoProceso.fecha_registro)
+            .execution_options(yield_per=_FILAS_POR_LOTE)
+        )
+        for (fecha_registro, placa, tipo_vehiculo, cliente, documento, valor_rtm,
+             comision_soat, total_cobrado, metodo_pago, estado, registrador) in filas:
+            yield (
+                *_fecha_hora(fecha_registro),
+                placa,
+                tipo_vehiculo,
+                cliente,
+                documento,
+                valor_rtm,
+                comision_soat or 0,
+                total_cobrado,
+                metodo_pago or "Pendiente",
+                estado.value,
+                registrador or "N/A"
+            )
+    finally:
+        db.close()
+
 
 @router.get("/dashboard-general")
 def obtener_dashboard_general(
@@ -28,120 +333,45 @@ def obtener_dashboard_general(
     """
     # Si no se especifica fecha, usar hoy
     if not fecha:
-        fecha = date.today()
-    
-    # Convertir a datetime para consultas
-    fecha_inicio = datetime.combine(fecha, datetime.min.time())
-    fecha_fin = datetime.combine(fecha, datetime.max.time())
+        fecha = hoy_negocio()
     
-    # ==================== INGRESOS DEL DÍA ====================
+    # ==================== CONSULTA 1: TOTALES DEL DÍA, SALDOS Y TRÁMITES ====================
     
-    # Ingresos de Caja (todos los montos positivos)
-    ingresos_caja = db.query(func.sum(MovimientoCaja.monto)).filter(
-        and_(
-            MovimientoCaja.created_at >= fecha_inicio,
-            MovimientoCaja.created_at <= fecha_fin,
-            MovimientoCaja.monto > 0
-        )
-    ).scalar() or Decimal(0)
+    totales = consulta_totales_dia(db, fecha).one()
     
-    # Ingresos de Tesorería (todos los montos positivos)
-    ingresos_tesoreria = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_inicio,
-            MovimientoTesoreria.fecha_movimiento <= fecha_fin,
-            MovimientoTesoreria.monto > 0
-        )
-    ).scalar() or Decimal(0)
+    ingresos_caja, egresos_caja = totales.ingresos_caja, totales.egresos_caja
+    ingresos_tesoreria, egresos_tesoreria = totales.ingresos_tesoreria, totales.egresos_tesoreria
+    saldo_cajas, saldo_tesoreria = totales.saldo_cajas, totales.saldo_tesoreria
+    tramites_dia = totales.tramites_dia or 0
     
     total_ingresos_dia = float(ingresos_caja + ingresos_tesoreria)
-    
-    # ==================== EGRESOS DEL DÍA ====================
-    
-    # Egresos de Caja (todos los montos negativos)
-    egresos_caja = db.query(func.sum(MovimientoCaja.monto)).filter(
-        and_(
-            MovimientoCaja.created_at >= fecha_inicio,
-            MovimientoCaja.created_at <= fecha_fin,
-            MovimientoCaja.monto < 0
-        )
-    ).scalar() or Decimal(0)
-    
-    # Egresos de Tesorería (todos los montos negativos)
-    egresos_tesoreria = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_inicio,
-            MovimientoTesoreria.fecha_movimiento <= fecha_fin,
-            MovimientoTesoreria.monto < 0
-        )
-    ).scalar() or Decimal(0)
-    
-    total_egresos_dia = float(abs(egresos_caja + egresos_tesoreria))
-    
-    # ==================== SALDO TOTAL DISPONIBLE ====================
-    
-    # Saldo en todas las cajas
-    saldo_cajas = db.query(func.sum(MovimientoCaja.monto)).scalar() or Decimal(0)
-    
-    # Saldo en tesorería
-    saldo_tesoreria = db.query(func.sum(MovimientoTesoreria.monto)).scalar() or Decimal(0)
-    
+    total_egresos_dia = float(egresos_caja + egresos_tesoreria)
     saldo_total = float(saldo_cajas + saldo_tesoreria)
     
-    # ==================== TRÁMITES DEL DÍA ====================
-    
-    tramites_dia = db.query(func.count(VehiculoProceso.id)).filter(
-        and_(
-            VehiculoProceso.fecha_registro >= fecha_inicio,
-            VehiculoProceso.fecha_registro <= fecha_fin
-        )
-    ).scalar() or 0
+    # ==================== CONSULTA 2: GRÁFICA INGRESOS ÚLTIMOS 7 DÍAS ====================
     
-    # ==================== GRÁFICA: INGRESOS ÚLTIMOS 7 DÍAS ====================
+    ingresos_por_dia = consulta_ingresos_7_dias(db, fecha).all()
     
-    ingresos_7_dias = []
-    for i in range(6, -1, -1):  # De 6 días atrás hasta hoy
-        dia = fecha - timedelta(days=i)
-        dia_inicio = datetime.combine(dia, datetime.min.time())
-        dia_fin = datetime.combine(dia, datetime.max.time())
-        
-        # Ingresos de caja del día
-        ing_caja = db.query(func.sum(MovimientoCaja.monto)).filter(
-            and_(
-                MovimientoCaja.created_at >= dia_inicio,
-                MovimientoCaja.created_at <= dia_fin,
-                MovimientoCaja.monto > 0
-            )
-        ).scalar() or Decimal(0)
-        
-        # Ingresos de tesorería del día
-        ing_tesoreria = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-            and_(
-                MovimientoTesoreria.fecha_movimiento >= dia_inicio,
-                MovimientoTesoreria.fecha_movimiento <= dia_fin,
-                MovimientoTesoreria.monto > 0
-            )
-        ).scalar() or Decimal(0)
-        
-        total_dia = float(ing_caja + ing_tesoreria)
-        
-        ingresos_7_dias.append({
+    ingresos_7_dias = [
+        {
             "fecha": dia.strftime("%Y-%m-%d"),
             "dia_semana": dia.strftime("%a"),  # Lun, Mar, Mié, etc.
-            "ingresos": total_dia
-        })
+            "ingresos": float(ingresos)
+        }
+        for dia, ingresos in ingresos_por_dia
+    ]
     
     # ==================== DESGLOSE POR MÓDULO ====================
     
     desglose_modulos = {
         "caja": {
             "ingresos": float(ingresos_caja),
-            "egresos": float(abs(egresos_caja)),
+            "egresos": float(egresos_caja),
             "saldo": float(saldo_cajas)
         },
         "tesoreria": {
             "ingresos": float(ingresos_tesoreria),
-            "egresos": float(abs(egresos_tesoreria)),
+            "egresos": float(egresos_tesoreria),
             "saldo": float(saldo_tesoreria)
         }
     }
@@ -166,34 +396,37 @@ def obtener_movimientos_detallados(
     fecha: Optional[date] = Query(None, description="Fecha específica (default: hoy)"),
     fecha_inicio: Optional[date] = Query(None, description="Fecha inicio para rango"),
     fecha_fin: Optional[date] = Query(None, description="Fecha fin para rango"),
+    formato: Optional[str] = Query(None, alias="format", pattern="^(csv|xlsx)$", description="Exportar como csv o xlsx"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin)
 ):
     """
     Lista detallada de todos los movimientos del día o rango (Caja + Tesorería)
     Para auditoría y revisión contable
+    Con ?format=csv|xlsx descarga el archivo en streaming (sin límite de rango)
     """
-    from app.models.caja import Caja
-    
     # Determinar rango de fechas
     if fecha_inicio and fecha_fin:
         # Modo rango
-        fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time())
+        fecha_inicio_dt, fecha_fin_dt = rango_dias(fecha_inicio, fecha_fin)
     else:
         # Modo día único
         if not fecha:
-            fecha = date.today()
-        fecha_inicio_dt = datetime.combine(fecha, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha, datetime.max.time())
+            fecha = hoy_negocio()
+        fecha_inicio_dt, fecha_fin_dt = rango_dia(fecha)
+    
+    if formato:
+        periodo = f"{fecha_inicio}_{fecha_fin}" if fecha_inicio and fecha_fin else str(fecha)
+        return respuesta_exportacion(
+            formato,
+            f"movimientos_{periodo}",
+            ENCABEZADOS_MOVIMIENTOS,
+            _filas_movimientos(fecha_inicio_dt, fecha_fin_dt),
+            titulo="Movimientos"
+        )
     
     # ==================== MOVIMIENTOS DE CAJA ====================
-    movimientos_caja = db.query(MovimientoCaja).filter(
-        and_(
-            MovimientoCaja.created_at >= fecha_inicio_dt,
-            MovimientoCaja.created_at <= fecha_fin_dt
-        )
-    ).order_by(MovimientoCaja.created_at.asc()).all()
+    movimientos_caja = consulta_movimientos_caja_rango(db, fecha_inicio_dt, fecha_fin_dt).all()
     
     lista_caja = []
     for mov in movimientos_caja:
@@ -222,12 +455,7 @@ def obtener_movimientos_detallados(
         })
     
     # ==================== MOVIMIENTOS DE TESORERÍA ====================
-    movimientos_tesoreria = db.query(MovimientoTesoreria).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_inicio_dt,
-            MovimientoTesoreria.fecha_movimiento <= fecha_fin_dt
-        )
-    ).order_by(MovimientoTesoreria.fecha_movimiento.asc()).all()
+    movimientos_tesoreria = consulta_movimientos_tesoreria_rango(db, fecha_inicio_dt, fecha_fin_dt).all()
     
     lista_tesoreria = []
     for mov in movimientos_tesoreria:
@@ -286,84 +514,20 @@ def obtener_desglose_conceptos(
     Desglose de ingresos y egresos por concepto/categoría
     Soporta modo día único o rango de fechas
     """
-    # Determinar rango de fechas
-    if fecha_inicio and fecha_fin:
-        # Modo rango
-        fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time())
-        etiqueta_fecha = f"{fecha_inicio.strftime('%Y-%m-%d')} a {fecha_fin.strftime('%Y-%m-%d')}"
-    else:
-        # Modo día único
-        if not fecha:
-            fecha = date.today()
-        fecha_inicio_dt = datetime.combine(fecha, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha, datetime.max.time())
-        etiqueta_fecha = fecha.strftime("%Y-%m-%d")
-    
-    # ==================== INGRESOS POR CONCEPTO ====================
-    ingresos_por_concepto = {}
+    desde, hasta, etiqueta_fecha = _periodo(fecha, fecha_inicio, fecha_fin)
     
-    # Ingresos de Caja (agrupar por tipo)
-    from app.models.caja import TipoMovimiento
-    for tipo in TipoMovimiento:
-        total = db.query(func.sum(MovimientoCaja.monto)).filter(
-            and_(
-                MovimientoCaja.created_at >= fecha_inicio_dt,
-                MovimientoCaja.created_at <= fecha_fin_dt,
-                MovimientoCaja.tipo == tipo,
-                MovimientoCaja.monto > 0
-            )
-        ).scalar() or Decimal(0)
-        
-        if total > 0:
-            ingresos_por_concepto[f"Caja - {tipo.value}"] = float(total)
-    
-    # Ingresos de Tesorería (agrupar por categoría)
-    from app.models.tesoreria import CategoriaIngresoTesoreria
-    for cat in CategoriaIngresoTesoreria:
-        total = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-            and_(
-                MovimientoTesoreria.fecha_movimiento >= fecha_inicio_dt,
-                MovimientoTesoreria.fecha_movimiento <= fecha_fin_dt,
-                MovimientoTesoreria.categoria_ingreso == cat,
-                MovimientoTesoreria.monto > 0
-            )
-        ).scalar() or Decimal(0)
-        
-        if total > 0:
-            ingresos_por_concepto[f"Tesorería - {cat.value}"] = float(total)
+    filas = consulta_desglose_conceptos(db, desde, hasta).all()
     
-    # ==================== EGRESOS POR CONCEPTO ====================
+    # ==================== INGRESOS Y EGRESOS POR CONCEPTO ====================
+    ingresos_por_concepto = {}
     egresos_por_concepto = {}
     
-    # Egresos de Caja
-    for tipo in TipoMovimiento:
-        total = db.query(func.sum(MovimientoCaja.monto)).filter(
-            and_(
-                MovimientoCaja.created_at >= fecha_inicio_dt,
-                MovimientoCaja.created_at <= fecha_fin_dt,
-                MovimientoCaja.tipo == tipo,
-                MovimientoCaja.monto < 0
-            )
-        ).scalar() or Decimal(0)
-        
-        if total < 0:
-            egresos_por_concepto[f"Caja - {tipo.value}"] = float(abs(total))
-    
-    # Egresos de Tesorería
-    from app.models.tesoreria import CategoriaEgresoTesoreria
-    for cat in CategoriaEgresoTesoreria:
-        total = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-            and_(
-                MovimientoTesoreria.fecha_movimiento >= fecha_inicio_dt,
-                MovimientoTesoreria.fecha_movimiento <= fecha_fin_dt,
-                MovimientoTesoreria.categoria_egreso == cat,
-                MovimientoTesoreria.monto < 0
-            )
-        ).scalar() or Decimal(0)
-        
-        if total < 0:
-            egresos_por_concepto[f"Tesorería - {cat.value}"] = float(abs(total))
+    for modulo, concepto, ingresos, egresos in filas:
+        etiqueta = f"{_ETIQUETA_MODULO[modulo]} - {concepto}"
+        if ingresos > 0:
+            ingresos_por_concepto[etiqueta] = float(ingresos)
+        if egresos > 0:
+            egresos_por_concepto[etiqueta] = float(egresos)
     
     return {
         "fecha": etiqueta_fecha,
@@ -384,58 +548,14 @@ def obtener_desglose_medios_pago(
     Desglose de movimientos por medio de pago
     Soporta modo día único o rango de fechas
     """
-    # Determinar rango de fechas
-    if fecha_inicio and fecha_fin:
-        # Modo rango
-        fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time())
-        etiqueta_fecha = f"{fecha_inicio.strftime('%Y-%m-%d')} a {fecha_fin.strftime('%Y-%m-%d')}"
-    else:
-        # Modo día único
-        if not fecha:
-            fecha = date.today()
-        fecha_inicio_dt = datetime.combine(fecha, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha, datetime.max.time())
-        etiqueta_fecha = fecha.strftime("%Y-%m-%d")
-    
-    desglose = {}
+    desde, hasta, etiqueta_fecha = _periodo(fecha, fecha_inicio, fecha_fin)
     
-    # ==================== MEDIOS DE PAGO EN CAJA ====================
-    # Agrupar por metodo_pago
-    medios_caja = db.query(
-        MovimientoCaja.metodo_pago,
-        func.sum(MovimientoCaja.monto).label("total")
-    ).filter(
-        and_(
-            MovimientoCaja.created_at >= fecha_inicio_dt,
-            MovimientoCaja.created_at <= fecha_fin_dt,
-            MovimientoCaja.metodo_pago.isnot(None)
-        )
-    ).group_by(MovimientoCaja.metodo_pago).all()
-    
-    for metodo, total in medios_caja:
-        if metodo not in desglose:
-            desglose[metodo] = {"ingresos": 0, "egresos": 0, "total": 0}
-        
-        if total > 0:
-            desglose[metodo]["ingresos"] += float(total)
-        else:
-            desglose[metodo]["egresos"] += float(abs(total))
-        desglose[metodo]["total"] += float(total)
+    # Neto por módulo y método: cada módulo suma su neto como ingreso o egreso del método
+    medios = consulta_medios_pago(db, desde, hasta).all()
     
-    # ==================== MEDIOS DE PAGO EN TESORERÍA ====================
-    medios_tesoreria = db.query(
-        MovimientoTesoreria.metodo_pago,
-        func.sum(MovimientoTesoreria.monto).label("total")
-    ).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_inicio_dt,
-            MovimientoTesoreria.fecha_movimiento <= fecha_fin_dt
-        )
-    ).group_by(MovimientoTesoreria.metodo_pago).all()
+    desglose = {}
     
-    for metodo_enum, total in medios_tesoreria:
-        metodo = metodo_enum.value
+    for modulo, metodo, total in medios:
         if metodo not in desglose:
             desglose[metodo] = {"ingresos": 0, "egresos": 0, "total": 0}
         
@@ -456,29 +576,34 @@ def obtener_tramites_detallados(
     fecha: Optional[date] = Query(None, description="Fecha específica (default: hoy)"),
     fecha_inicio: Optional[date] = Query(None, description="Fecha inicio para rango"),
     fecha_fin: Optional[date] = Query(None, description="Fecha fin para rango"),
+    formato: Optional[str] = Query(None, alias="format", pattern="^(csv|xlsx)$", description="Exportar como csv o xlsx"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin)
 ):
     """
     Lista detallada de todos los trámites del día o rango con valores
+    Con ?format=csv|xlsx descarga el archivo en streaming (sin límite de rango)
     """
     # Determinar rango de fechas
     if fecha_inicio and fecha_fin:
-        fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time())
+        fecha_inicio_dt, fecha_fin_dt = rango_dias(fecha_inicio, fecha_fin)
     else:
         if not fecha:
-            fecha = date.today()
-        fecha_inicio_dt = datetime.combine(fecha, datetime.min.time())
-        fecha_fin_dt = datetime.combine(fecha, datetime.max.time())
+            fecha = hoy_negocio()
+        fecha_inicio_dt, fecha_fin_dt = rango_dia(fecha)
+    
+    if formato:
+        periodo = f"{fecha_inicio}_{fecha_fin}" if fecha_inicio and fecha_fin else str(fecha)
+        return respuesta_exportacion(
+            formato,
+            f"tramites_{periodo}",
+            ENCABEZADOS_TRAMITES,
+            _filas_tramites(fecha_inicio_dt, fecha_fin_dt),
+            titulo="Trámites"
+        )
     
     # Obtener vehículos del rango
-    vehiculos = db.query(VehiculoProceso).filter(
-        and_(
-            VehiculoProceso.fecha_registro >= fecha_inicio_dt,
-            VehiculoProceso.fecha_registro <= fecha_fin_dt
-        )
-    ).order_by(VehiculoProceso.fecha_registro.asc()).all()
+    vehiculos = consulta_tramites_rango(db, fecha_inicio_dt, fecha_fin_dt).all()
     
     lista_tramites = []
     for veh in vehiculos:
@@ -535,62 +660,21 @@ def obtener_resumen_mensual(
     """
     # Si no se especifica, usar mes actual
     if not mes or not anio:
-        hoy = date.today()
+        hoy = hoy_negocio()
         mes = hoy.month
         anio = hoy.year
     
-    # Primer y último día del mes
-    fecha_inicio = datetime(anio, mes, 1)
-    if mes == 12:
-        fecha_fin = datetime(anio + 1, 1, 1) - timedelta(seconds=1)
-    else:
-        fecha_fin = datetime(anio, mes + 1, 1) - timedelta(seconds=1)
-    
-    # Ingresos del mes
-    ingresos_caja = db.query(func.sum(MovimientoCaja.monto)).filter(
-        and_(
-            MovimientoCaja.created_at >= fecha_inicio,
-            MovimientoCaja.created_at <= fecha_fin,
-            MovimientoCaja.monto > 0
-        )
-    ).scalar() or Decimal(0)
+    # Rango UTC [inicio, fin) del mes de negocio (para los trámites)
+    fecha_inicio, fecha_fin = rango_mes(anio, mes)
+    dias_mes = dias_del_mes(anio, mes)
     
-    ingresos_tesoreria = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_inicio,
-            MovimientoTesoreria.fecha_movimiento <= fecha_fin,
-            MovimientoTesoreria.monto > 0
-        )
-    ).scalar() or Decimal(0)
-    
-    total_ingresos = float(ingresos_caja + ingresos_tesoreria)
-    
-    # Egresos del mes
-    egresos_caja = db.query(func.sum(MovimientoCaja.monto)).filter(
-        and_(
-            MovimientoCaja.created_at >= fecha_inicio,
-            MovimientoCaja.created_at <= fecha_fin,
-            MovimientoCaja.monto < 0
-        )
-    ).scalar() or Decimal(0)
-    
-    egresos_tesoreria = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_inicio,
-            MovimientoTesoreria.fecha_movimiento <= fecha_fin,
-            MovimientoTesoreria.monto < 0
-        )
-    ).scalar() or Decimal(0)
-    
-    total_egresos = float(abs(egresos_caja + egresos_tesoreria))
+    # Ingresos y egresos del mes
+    totales_mes = _totales_por_modulo(db, date(anio, mes, 1), date(anio, mes, dias_mes))
+    total_ingresos = float(sum(ingresos for ingresos, _ in totales_mes.values()))
+    total_egresos = float(sum(egresos for _, egresos in totales_mes.values()))
     
     # Trámites del mes
-    tramites_mes = db.query(func.count(VehiculoProceso.id)).filter(
-        and_(
-            VehiculoProceso.fecha_registro >= fecha_inicio,
-            VehiculoProceso.fecha_registro <= fecha_fin
-        )
-    ).scalar() or 0
+    tramites_mes = db.execute(select_conteo_tramites(fecha_inicio, fecha_fin)).scalar() or 0
     
     return {
         "mes": mes,
@@ -599,6 +683,115 @@ def obtener_resumen_mensual(
         "total_egresos": total_egresos,
         "utilidad": total_ingresos - total_egresos,
         "tramites_atendidos": tramites_mes,
-        "promedio_diario_ingresos": total_ingresos / 30,
-        "promedio_diario_egresos": total_egresos / 30
+        "promedio_diario_ingresos": total_ingresos / dias_mes,
+        "promedio_diario_egresos": total_egresos / dias_mes
     }
+
+
+# ==================== EXPORTACIÓN DE COMPROBANTES ====================
+
+# Rango máximo de una exportación de comprobantes (días)
+_MAXIMO_DIAS_COMPROBANTES = 93
+
+
+def _entradas_cierres(db: Session, desde_dt: datetime, hasta_dt: datetime) -> List[EntradaComprobante]:
+    """Comprobantes de las cajas cerradas en el rango (las que tienen desglose de cierre)"""
+    cajas = db.query(Caja).options(
+        selectinload(Caja.usuario),
+        selectinload(Caja.desglose_cierre)
+    ).filter(
+        Caja.estado == EstadoCaja.CERRADA,
+        Caja.fecha_cierre >= desde_dt,
+        Caja.fecha_cierre < hasta_dt
+    ).order_by(Caja.fecha_cierre).all()
+
+    # Vehículos cobrados por caja en una sola consulta
+    vehiculos = dict(
+        db.query(VehiculoProceso.caja_id, func.count(VehiculoProceso.id))
+        .filter(VehiculoProceso.caja_id.in_([caja.id for caja in cajas]))
+        .group_by(VehiculoProceso.caja_id)
+        .all()
+    ) if cajas else {}
+
+    return [
+        EntradaComprobante(
+            tipo=TIPO_CIERRE_CAJA,
+            entidad_id=str(caja.id),
+            datos=datos_cierre_caja(caja, caja.desglose_cierre, vehiculos.get(caja.id, 0)),
+            nombre_archivo=nombre_archivo_cierre(caja)
+        )
+        for caja in cajas
+        if caja.desglose_cierre is not None
+    ]
+
+
+def _entradas_egresos(db: Session, desde_dt: datetime, hasta_dt: datetime) -> List[EntradaComprobante]:
+    """Comprobantes de los egresos de tesorería del rango"""
+    egresos = db.query(MovimientoTesoreria).options(
+        selectinload(MovimientoTesoreria.usuario),
+        selectinload(MovimientoTesoreria.desglose_efectivo)
+    ).filter(
+        MovimientoTesoreria.tipo == TipoMovimientoTesoreria.EGRESO,
+        MovimientoTesoreria.fecha_movimiento >= desde_dt,
+        MovimientoTesoreria.fecha_movimiento < hasta_dt
+    ).order_by(MovimientoTesoreria.fecha_movimiento).all()
+
+    return [
+        EntradaComprobante(
+            tipo=TIPO_EGRESO,
+            entidad_id=str(movimiento.id),
+            datos=datos_egreso(movimiento, movimiento.usuario.nombre_completo if movimiento.usuario else None),
+            nombre_archivo=nombre_archivo_egreso(movimiento)
+        )
+        for movimiento in egresos
+    ]
+
+
+@router.get("/comprobantes-zip")
+def exportar_comprobantes_zip(
+    fecha_inicio: date = Query(..., description="Fecha inicio"),
+    fecha_fin: date = Query(..., description="Fecha fin (inclusive)"),
+    tipos: List[str] = Query(
+        [TIPO_CIERRE_CAJA, TIPO_EGRESO],
+        description="Tipos de comprobante: cierre_caja, egreso"
+    ),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin)
+):
+    """
+    ZIP con los comprobantes de cierre de caja y/o egreso del rango (cierre contable)
+    Se envía en streaming: los PDF ya generados salen primero y los que faltan
+    se generan en paralelo en el pool de render
+    """
+    tipos_invalidos = set(tipos) - {TIPO_CIERRE_CAJA, TIPO_EGRESO}
+    if tipos_invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tipos de comprobante no válidos: {', '.join(sorted(tipos_invalidos))}"
+        )
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha fin debe ser posterior a la fecha inicio"
+        )
+    if (fecha_fin - fecha_inicio).days >= _MAXIMO_DIAS_COMPROBANTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango no puede superar {_MAXIMO_DIAS_COMPROBANTES} días"
+        )
+
+    # Los datos de cada comprobante se leen antes de empezar a responder (la
+    # sesión no se usa mientras se genera el ZIP)
+    desde_dt, hasta_dt = rango_dias(fecha_inicio, fecha_fin)
+    entradas = []
+    if TIPO_CIERRE_CAJA in tipos:
+        entradas += _entradas_cierres(db, desde_dt, hasta_dt)
+    if TIPO_EGRESO in tipos:
+        entradas += _entradas_egresos(db, desde_dt, hasta_dt)
+
+    nombre_archivo = f"comprobantes_{fecha_inicio.strftime('%Y%m%d')}_{fecha_fin.strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        generar_zip_comprobantes(entradas, settings.EXPORTACION_COMPROBANTES_SIMULTANEOS),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={nombre_archivo}"}
+    )
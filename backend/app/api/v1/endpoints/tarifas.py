@@ -4,12 +4,14 @@ Endpoints de Tarifas
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
-from datetime import date
 from typing import List
 
 from app.core.deps import get_db, get_current_user, get_admin
 from app.models.usuario import Usuario
+from app.utils.fechas import hoy_negocio
 from app.models.tarifa import Tarifa, ComisionSOAT
+from app.models.version_cache import VERSION_TARIFAS, incrementar_version
+from app.utils.motor_tarifas import motor_tarifas
 from app.schemas.tarifa import (
     TarifaCreate,
     TarifaUpdate,
@@ -22,6 +24,16 @@ from app.schemas.tarifa import (
 router = APIRouter()
 
 
+def _confirmar_cambio_tarifas(db: Session):
+    """
+    Commit de un cambio en tarifas o comisiones: sube la versión en la misma
+    transacción (los demás workers recargan) e invalida el motor de este worker
+    """
+    incrementar_version(db, VERSION_TARIFAS)
+    db.commit()
+    motor_tarifas.invalidar()
+
+
 @router.get("/vigentes", response_model=List[TarifaResponse])
 def obtener_tarifas_vigentes(
     db: Session = Depends(get_db),
@@ -30,7 +42,7 @@ def obtener_tarifas_vigentes(
     """
     Obtener tarifas vigentes hoy
     """
-    hoy = date.today()
+    hoy = hoy_negocio()
     tarifas = db.query(Tarifa).filter(
         and_(
             Tarifa.activa == True,
@@ -101,7 +113,7 @@ def crear_tarifa(
     )
     
     db.add(nueva_tarifa)
-    db.commit()
+    _confirmar_cambio_tarifas(db)
     db.refresh(nueva_tarifa)
     
     return nueva_tarifa
@@ -135,7 +147,7 @@ def actualizar_tarifa(
     if tarifa_data.activa is not None:
         tarifa.activa = tarifa_data.activa
     
-    db.commit()
+    _confirmar_cambio_tarifas(db)
     db.refresh(tarifa)
     
     return tarifa
@@ -149,7 +161,7 @@ def obtener_comisiones_soat(
     """
     Obtener comisiones SOAT vigentes
     """
-    hoy = date.today()
+    hoy = hoy_negocio()
     comisiones = db.query(ComisionSOAT).filter(
         and_(
             ComisionSOAT.activa == True,
@@ -180,7 +192,7 @@ def crear_comision_soat(
     )
     
     db.add(nueva_comision)
-    db.commit()
+    _confirmar_cambio_tarifas(db)
     db.refresh(nueva_comision)
     
     return nueva_comision
@@ -210,7 +222,7 @@ def actualizar_comision_soat(
     if hasattr(comision_data, 'activa') and comision_data.activa is not None:
         comision.activa = comision_data.activa
     
-    db.commit()
+    _confirmar_cambio_tarifas(db)
     db.refresh(comision)
     
     return comision
@@ -234,7 +246,7 @@ def eliminar_comision_soat(
         )
     
     db.delete(comision)
-    db.commit()
+    _confirmar_cambio_tarifas(db)
     
     return {"message": "Comisión eliminada exitosamente"}
 
@@ -1,24 +1,33 @@
 """
 Endpoints de Tesorería (Caja Fuerte)
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import func, desc, select, cast, Date
 from datetime import datetime, timedelta, date, timezone
 from decimal import Decimal
 from typing import List, Optional
 
 from app.core.deps import get_db, get_current_user, get_admin
 from app.models.usuario import Usuario
+from app.core.config import settings
+from app.utils.fechas import hoy_negocio, inicio_dia_utc, rango_dias, periodos, UNIDADES_SERIE, utcnow
+from app.utils.paginacion import paginar_keyset, agregar_next_cursor
 from app.models.tesoreria import (
     MovimientoTesoreria,
     ConfiguracionTesoreria,
     TipoMovimientoTesoreria,
     CategoriaIngresoTesoreria,
     CategoriaEgresoTesoreria,
-    DesgloseEfectivoTesoreria,
-    MetodoPagoTesoreria
+    DesgloseEfectivoTesoreria
+)
+from app.models.resumen_diario import ModuloResumen
+from app.models.saldo_checkpoint import obtener_saldo, obtener_saldos_por_metodo
+from app.models.inventario_denominaciones import (
+    leer_inventario,
+    bloquear_inventario,
+    aplicar_desglose,
+    total_inventario
 )
 from app.schemas.tesoreria import (
     MovimientoTesoreriaCreate,
@@ -26,106 +35,165 @@ from app.schemas.tesoreria import (
     ResumenTesoreria,
     ConfiguracionTesoreriaResponse,
     ConfiguracionTesoreriaUpdate,
-    EstadisticasTesoreria
+    EstadisticasTesoreria,
+    PuntoSerieTesoreria
 )
-from app.utils.comprobantes import generar_comprobante_egreso
+from app.utils.almacen_comprobantes import almacen_comprobantes, respuesta_comprobante, GENERADORES, TIPO_EGRESO
+from app.utils.datos_comprobantes import datos_egreso, nombre_archivo_egreso
+from app.utils.denominaciones import sugerir_desglose
 
 router = APIRouter()
 
 
 # ==================== FUNCIONES AUXILIARES ====================
 
-def _calcular_desglose_disponible(db: Session) -> dict:
-    """
-    Calcula el desglose de denominaciones actualmente disponible en caja.
-    Retorna un diccionario con las cantidades de cada denominación.
-    """
-    # Obtener todos los movimientos en efectivo con su desglose
-    movimientos_efectivo = db.query(MovimientoTesoreria).filter(
-        MovimientoTesoreria.metodo_pago == "efectivo"
-    ).all()
-    
-    # Inicializar contadores
-    desglose_total = {
-        'billetes_100000': 0,
-        'billetes_50000': 0,
-        'billetes_20000': 0,
-        'billetes_10000': 0,
-        'billetes_5000': 0,
-        'billetes_2000': 0,
-        'billetes_1000': 0,
-        'monedas_1000': 0,
-        'monedas_500': 0,
-        'monedas_200': 0,
-        'monedas_100': 0,
-        'monedas_50': 0,
-    }
+_NOMBRES_DENOMINACIONES = {
+    'billetes_100000': 'billetes de $100,000',
+    'billetes_50000': 'billetes de $50,000',
+    'billetes_20000': 'billetes de $20,000',
+    'billetes_10000': 'billetes de $10,000',
+    'billetes_5000': 'billetes de $5,000',
+    'billetes_2000': 'billetes de $2,000',
+    'billetes_1000': 'billetes de $1,000',
+    'monedas_1000': 'monedas de $1,000',
+    'monedas_500': 'monedas de $500',
+    'monedas_200': 'monedas de $200',
+    'monedas_100': 'monedas de $100',
+    'monedas_50': 'monedas de $50',
+}
+
+
+# Filtros de las agregaciones (monto > 0 es ingreso, el resto egreso)
+_ES_INGRESO = MovimientoTesoreria.monto > 0
+_ES_EGRESO = MovimientoTesoreria.monto <= 0
+
+
+def consulta_movimientos(db: Session, tipo: Optional[str], categoria: Optional[str],
+                         fecha_desde: Optional[date], fecha_hasta: Optional[date],
+                         metodo_pago: Optional[str]):
+    """Movimientos con los filtros de listar_movimientos (sin orden ni paginación)"""
+    query = db.query(MovimientoTesoreria)
     
-    # Sumar/restar desgloses según tipo de movimiento
-    for mov in movimientos_efectivo:
-        if mov.desglose_efectivo:
-            desg = mov.desglose_efectivo
-            multiplicador = 1 if mov.monto > 0 else -1  # Ingresos suman, egresos restan
-            
-            desglose_total['billetes_100000'] += int(desg.billetes_100000 or 0) * multiplicador
-            desglose_total['billetes_50000'] += int(desg.billetes_50000 or 0) * multiplicador
-            desglose_total['billetes_20000'] += int(desg.billetes_20000 or 0) * multiplicador
-            desglose_total['billetes_10000'] += int(desg.billetes_10000 or 0) * multiplicador
-            desglose_total['billetes_5000'] += int(desg.billetes_5000 or 0) * multiplicador
-            desglose_total['billetes_2000'] += int(desg.billetes_2000 or 0) * multiplicador
-            desglose_total['billetes_1000'] += int(desg.billetes_1000 or 0) * multiplicador
-            desglose_total['monedas_1000'] += int(desg.monedas_1000 or 0) * multiplicador
-            desglose_total['monedas_500'] += int(desg.monedas_500 or 0) * multiplicador
-            desglose_total['monedas_200'] += int(desg.monedas_200 or 0) * multiplicador
-            desglose_total['monedas_100'] += int(desg.monedas_100 or 0) * multiplicador
-            desglose_total['monedas_50'] += int(desg.monedas_50 or 0) * multiplicador
-    
-    return desglose_total
+    if tipo:
+        query = query.filter(MovimientoTesoreria.tipo == tipo)
+    
+    if categoria:
+        query = query.filter(
+            (MovimientoTesoreria.categoria_ingreso == categoria) |
+            (MovimientoTesoreria.categoria_egreso == categoria)
+        )
+    
+    if fecha_desde:
+        query = query.filter(MovimientoTesoreria.fecha_movimiento >= inicio_dia_utc(fecha_desde))
+    
+    if fecha_hasta:
+        query = query.filter(MovimientoTesoreria.fecha_movimiento < inicio_dia_utc(fecha_hasta + timedelta(days=1)))
+    
+    if metodo_pago:
+        query = query.filter(MovimientoTesoreria.metodo_pago == metodo_pago)
+    
+    return query
+
+
+def select_totales_por_categoria(desde_dt: datetime, hasta_dt: datetime):
+    """Ingresos, egresos y cantidad del rango UTC [desde_dt, hasta_dt) por categoría"""
+    return select(
+        MovimientoTesoreria.categoria_ingreso,
+        MovimientoTesoreria.categoria_egreso,
+        func.coalesce(func.sum(MovimientoTesoreria.monto).filter(_ES_INGRESO), 0),
+        func.coalesce(func.sum(-MovimientoTesoreria.monto).filter(_ES_EGRESO), 0),
+        func.count(MovimientoTesoreria.id)
+    ).where(
+        MovimientoTesoreria.fecha_movimiento >= desde_dt,
+        MovimientoTesoreria.fecha_movimiento < hasta_dt
+    ).group_by(
+        MovimientoTesoreria.categoria_ingreso,
+        MovimientoTesoreria.categoria_egreso
+    )
+
+
+def select_serie_tesoreria(desde_dt: datetime, hasta_dt: datetime, unidad: str):
+    """Ingresos, egresos y cantidad por período de negocio (date_trunc en la zona del negocio)"""
+    hora_local = func.timezone(settings.TIMEZONE, func.timezone('UTC', MovimientoTesoreria.fecha_movimiento))
+    periodo = cast(func.date_trunc(UNIDADES_SERIE[unidad], hora_local), Date).label("periodo")
+    return select(
+        periodo,
+        func.coalesce(func.sum(MovimientoTesoreria.monto).filter(_ES_INGRESO), 0),
+        func.coalesce(func.sum(-MovimientoTesoreria.monto).filter(_ES_EGRESO), 0),
+        func.count(MovimientoTesoreria.id)
+    ).where(
+        MovimientoTesoreria.fecha_movimiento >= desde_dt,
+        MovimientoTesoreria.fecha_movimiento < hasta_dt
+    ).group_by(periodo)
+
+
+def _totales_por_categoria(db: Session, desde_dt: datetime, hasta_dt: datetime):
+    """
+    Totales del rango UTC [desde_dt, hasta_dt) agrupados por categoría en SQL.
+    Devuelve (total_ingresos, total_egresos, cantidad, ingresos_por_categoria,
+    egresos_por_categoria).
+    """
+    filas = db.execute(select_totales_por_categoria(desde_dt, hasta_dt)).all()
+    
+    total_ingresos = Decimal(0)
+    total_egresos = Decimal(0)
+    cantidad = 0
+    ingresos_por_categoria = {}
+    egresos_por_categoria = {}
+    
+    for cat_ingreso, cat_egreso, ingresos, egresos, conteo in filas:
+        cantidad += conteo
+        if ingresos:
+            total_ingresos += ingresos
+            cat = cat_ingreso.value if cat_ingreso else "sin_categoria"
+            ingresos_por_categoria[cat] = ingresos_por_categoria.get(cat, Decimal(0)) + ingresos
+        if egresos:
+            total_egresos += egresos
+            cat = cat_egreso.value if cat_egreso else "sin_categoria"
+            egresos_por_categoria[cat] = egresos_por_categoria.get(cat, Decimal(0)) + egresos
+    
+    return total_ingresos, total_egresos, cantidad, ingresos_por_categoria, egresos_por_categoria
+
+
+def _serie_tesoreria(db: Session, fecha_desde: date, fecha_hasta: date, unidad: str) -> List[PuntoSerieTesoreria]:
+    """
+    Ingresos / egresos por día, semana o mes de negocio (date_trunc en la zona
+    del negocio). Los períodos sin movimientos van en cero.
+    """
+    desde_dt, hasta_dt = rango_dias(fecha_desde, fecha_hasta)
+    filas = db.execute(select_serie_tesoreria(desde_dt, hasta_dt, unidad)).all()
+    por_periodo = {fila[0]: fila[1:] for fila in filas}
+    
+    serie = []
+    for inicio in periodos(fecha_desde, fecha_hasta, unidad):
+        ingresos, egresos, cantidad = por_periodo.get(inicio, (Decimal(0), Decimal(0), 0))
+        serie.append(PuntoSerieTesoreria(
+            periodo=inicio,
+            ingresos=ingresos,
+            egresos=egresos,
+            neto=ingresos - egresos,
+            cantidad=cantidad
+        ))
+    return serie
 
 
 def _generar_sugerencia_denominaciones(monto_total: int, desglose_disponible: dict) -> str:
     """
     Genera una sugerencia de cómo componer el monto con las denominaciones disponibles.
-    Usa un algoritmo greedy que intenta usar las denominaciones más grandes primero.
-    """
-    # Ordenar denominaciones de mayor a menor
-    denominaciones = [
-        (100000, 'billetes_100000', 'billetes de $100,000'),
-        (50000, 'billetes_50000', 'billetes de $50,000'),
-        (20000, 'billetes_20000', 'billetes de $20,000'),
-        (10000, 'billetes_10000', 'billetes de $10,000'),
-        (5000, 'billetes_5000', 'billetes de $5,000'),
-        (2000, 'billetes_2000', 'billetes de $2,000'),
-        (1000, 'billetes_1000', 'billetes de $1,000'),
-        (1000, 'monedas_1000', 'monedas de $1,000'),
-        (500, 'monedas_500', 'monedas de $500'),
-        (200, 'monedas_200', 'monedas de $200'),
-        (100, 'monedas_100', 'monedas de $100'),
-        (50, 'monedas_50', 'monedas de $50'),
-    ]
-    
-    monto_restante = monto_total
-    sugerencia_desglose = []
-    
-    for valor, campo, nombre in denominaciones:
-        if monto_restante <= 0:
-            break
-        
-        disponible = desglose_disponible.get(campo, 0)
-        if disponible > 0:
-            # Calcular cuántas de esta denominación se necesitan
-            cantidad_necesaria = monto_restante // valor
-            cantidad_a_usar = min(cantidad_necesaria, disponible)
-            
-            if cantidad_a_usar > 0:
-                sugerencia_desglose.append(f"  - {cantidad_a_usar} {nombre}")
-                monto_restante -= cantidad_a_usar * valor
+    Busca la combinación exacta con menos piezas (ver app/utils/denominaciones.py).
+    """
+    sugerencia = sugerir_desglose(monto_total, desglose_disponible)
     
-    # Si se logró componer el monto completo
-    if monto_restante == 0:
-        return "\n".join(sugerencia_desglose)
-    else:
-        return f"No es posible componer ${monto_total:,.0f} con las denominaciones disponibles. Faltan ${monto_restante:,.0f}."
+    if sugerencia is None:
+        disponible = total_inventario(desglose_disponible)
+        if disponible < monto_total:
+            return f"No es posible componer ${monto_total:,.0f} con las denominaciones disponibles. Faltan ${monto_total - disponible:,.0f}."
+        return f"No es posible componer ${monto_total:,.0f} exactamente con las denominaciones disponibles."
+    
+    return "\n".join(
+        f"  - {cantidad} {_NOMBRES_DENOMINACIONES[campo]}"
+        for campo, cantidad in sugerencia.desglose.items()
+    )
 
 
 # ==================== MOVIMIENTOS ====================
@@ -170,7 +238,8 @@ def crear_movimiento(
         # Validar disponibilidad de denominaciones para EGRESOS
         if movimiento_data.tipo == "egreso":
             desglose_solicitado = movimiento_data.desglose_efectivo
-            desglose_disponible = _calcular_desglose_disponible(db)
+            # Bloquea el inventario hasta el commit: dos egresos no pueden usar los mismos billetes
+            desglose_disponible = bloquear_inventario(db)
             
             # Validar cada denominación
             denominaciones_faltantes = []
@@ -231,7 +300,7 @@ def crear_movimiento(
         metodo_pago=movimiento_data.metodo_pago,
         origen_caja_id=movimiento_data.origen_caja_id,
         numero_comprobante=movimiento_data.numero_comprobante,
-        fecha_movimiento=movimiento_data.fecha_movimiento or datetime.now(timezone.utc),
+        fecha_movimiento=movimiento_data.fecha_movimiento or utcnow(),
         created_by=current_user.id
     )
     
@@ -245,6 +314,13 @@ def crear_movimiento(
             **movimiento_data.desglose_efectivo.model_dump()
         )
         db.add(desglose)
+        
+        # Actualizar inventario de denominaciones en la misma transacción
+        aplicar_desglose(
+            db,
+            movimiento_data.desglose_efectivo.model_dump(),
+            1 if monto_final > 0 else -1
+        )
     
     db.commit()
     db.refresh(nuevo_movimiento)
@@ -254,40 +330,26 @@ def crear_movimiento(
 
 @router.get("/movimientos", response_model=List[MovimientoTesoreriaResponse])
 def listar_movimientos(
+    response: Response,
     tipo: Optional[str] = None,
     categoria: Optional[str] = None,
     fecha_desde: Optional[date] = None,
     fecha_hasta: Optional[date] = None,
     metodo_pago: Optional[str] = None,
-    limit: int = Query(100, le=500),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (header X-Next-Cursor)"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin)
 ):
     """
     Listar movimientos de tesorería con filtros (solo administrador)
+    Paginación por cursor: la siguiente página se pide con ?cursor=<X-Next-Cursor>
     """
-    query = db.query(MovimientoTesoreria)
-    
-    # Aplicar filtros
-    if tipo:
-        query = query.filter(MovimientoTesoreria.tipo == tipo)
-    
-    if categoria:
-        query = query.filter(
-            (MovimientoTesoreria.categoria_ingreso == categoria) |
-            (MovimientoTesoreria.categoria_egreso == categoria)
-        )
-    
-    if fecha_desde:
-        query = query.filter(MovimientoTesoreria.fecha_movimiento >= fecha_desde)
-    
-    if fecha_hasta:
-        query = query.filter(MovimientoTesoreria.fecha_movimiento <= fecha_hasta)
-    
-    if metodo_pago:
-        query = query.filter(MovimientoTesoreria.metodo_pago == metodo_pago)
-    
-    movimientos = query.order_by(desc(MovimientoTesoreria.fecha_movimiento)).limit(limit).all()
+    query = consulta_movimientos(db, tipo, categoria, fecha_desde, fecha_hasta, metodo_pago)
+    movimientos, next_cursor = paginar_keyset(
+        query, MovimientoTesoreria.fecha_movimiento, MovimientoTesoreria.id, cursor, limit
+    )
+    agregar_next_cursor(response, next_cursor)
     
     return movimientos
 
@@ -324,8 +386,8 @@ def obtener_saldo_actual(
     """
     Obtener saldo actual de la caja fuerte
     """
-    # Sumar todos los movimientos (positivos y negativos)
-    saldo = db.query(func.sum(MovimientoTesoreria.monto)).scalar() or Decimal(0)
+    # Último checkpoint + movimientos posteriores
+    saldo = obtener_saldo(db, ModuloResumen.TESORERIA.value)
     
     return {
         "saldo_actual": float(saldo),
@@ -337,6 +399,7 @@ def obtener_saldo_actual(
 def obtener_resumen(
     fecha_desde: Optional[date] = None,
     fecha_hasta: Optional[date] = None,
+    serie: Optional[str] = Query(None, pattern="^(dia|semana|mes)$", description="Incluir serie por dia, semana o mes"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin)
 ):
@@ -345,49 +408,21 @@ def obtener_resumen(
     """
     # Si no se especifica período, usar el mes actual
     if not fecha_desde:
-        fecha_desde = date.today().replace(day=1)
+        fecha_desde = hoy_negocio().replace(day=1)
     if not fecha_hasta:
-        fecha_hasta = date.today()
-    
-    # Convertir date a datetime para comparación correcta con PostgreSQL
-    fecha_desde_dt = datetime.combine(fecha_desde, datetime.min.time())
-    fecha_hasta_dt = datetime.combine(fecha_hasta, datetime.max.time())
+        fecha_hasta = hoy_negocio()
     
-    print(f"\n=== DEBUG RESUMEN ===")
-    print(f"Fecha desde: {fecha_desde_dt}")
-    print(f"Fecha hasta: {fecha_hasta_dt}")
+    # Rango UTC [desde, hasta) de los días de negocio del período
+    fecha_desde_dt, fecha_hasta_dt = rango_dias(fecha_desde, fecha_hasta)
     
-    # Obtener movimientos del período
-    movimientos = db.query(MovimientoTesoreria).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_desde_dt,
-            MovimientoTesoreria.fecha_movimiento <= fecha_hasta_dt
-        )
-    ).all()
+    # Totales agrupados por categoría en la base de datos
+    (
+        total_ingresos, total_egresos, cantidad_movimientos,
+        ingresos_por_categoria, egresos_por_categoria
+    ) = _totales_por_categoria(db, fecha_desde_dt, fecha_hasta_dt)
     
-    print(f"Movimientos encontrados: {len(movimientos)}")
-    for mov in movimientos[:3]:  # Mostrar solo los primeros 3
-        print(f"  - {mov.fecha_movimiento} | Monto: {mov.monto} | Tipo: {mov.tipo}")
-    print(f"===================\n")
-    
-    # Calcular totales
-    total_ingresos = Decimal(0)
-    total_egresos = Decimal(0)
-    ingresos_por_categoria = {}
-    egresos_por_categoria = {}
-    
-    for mov in movimientos:
-        if mov.monto > 0:
-            total_ingresos += mov.monto
-            cat = mov.categoria_ingreso.value if mov.categoria_ingreso else "sin_categoria"
-            ingresos_por_categoria[cat] = ingresos_por_categoria.get(cat, Decimal(0)) + mov.monto
-        else:
-            total_egresos += abs(mov.monto)
-            cat = mov.categoria_egreso.value if mov.categoria_egreso else "sin_categoria"
-            egresos_por_categoria[cat] = egresos_por_categoria.get(cat, Decimal(0)) + abs(mov.monto)
-    
-    # Saldo actual (todos los movimientos históricos)
-    saldo_actual = db.query(func.sum(MovimientoTesoreria.monto)).scalar() or Decimal(0)
+    # Saldo actual (último checkpoint + movimientos posteriores)
+    saldo_actual = obtener_saldo(db, ModuloResumen.TESORERIA.value)
     
     # Obtener configuración de alertas
     config = db.query(ConfiguracionTesoreria).first()
@@ -398,11 +433,12 @@ def obtener_resumen(
         saldo_actual=saldo_actual,
         total_ingresos=total_ingresos,
         total_egresos=total_egresos,
-        cantidad_movimientos=len(movimientos),
+        cantidad_movimientos=cantidad_movimientos,
         ingresos_por_categoria=ingresos_por_categoria,
         egresos_por_categoria=egresos_por_categoria,
         saldo_bajo_umbral=saldo_bajo_umbral,
-        umbral_minimo=umbral_minimo
+        umbral_minimo=umbral_minimo,
+        serie=_serie_tesoreria(db, fecha_desde, fecha_hasta, serie) if serie else None
     )
 
 
@@ -416,19 +452,15 @@ def obtener_desglose_saldo(
     """
     Obtener desglose del saldo actual por método de pago
     """
-    # Agrupar movimientos por método de pago y sumar
-    resultados = db.query(
-        MovimientoTesoreria.metodo_pago,
-        func.sum(MovimientoTesoreria.monto).label('saldo')
-    ).group_by(MovimientoTesoreria.metodo_pago).all()
+    # Saldo por método de pago (último checkpoint + movimientos posteriores)
+    resultados = obtener_saldos_por_metodo(db, ModuloResumen.TESORERIA.value)
     
     desglose = {}
     total = Decimal(0)
     
-    for metodo, saldo in resultados:
-        saldo_decimal = Decimal(str(saldo)) if saldo else Decimal(0)
-        desglose[metodo] = float(saldo_decimal)
-        total += saldo_decimal
+    for metodo, saldo in resultados.items():
+        desglose[metodo] = float(saldo)
+        total += saldo
     
     return {
         "desglose": desglose,
@@ -444,91 +476,62 @@ def obtener_desglose_efectivo(
 ):
     """
     Obtener desglose de billetes y monedas del efectivo actual en caja
+    (leído de inventario_denominaciones)
     """
-    # Obtener todos los movimientos en efectivo con su desglose
-    movimientos_efectivo = db.query(MovimientoTesoreria).filter(
-        MovimientoTesoreria.metodo_pago == "efectivo"
-    ).all()
-    
-    # Inicializar contadores
-    desglose_total = {
-        'billetes_100000': 0,
-        'billetes_50000': 0,
-        'billetes_20000': 0,
-        'billetes_10000': 0,
-        'billetes_5000': 0,
-        'billetes_2000': 0,
-        'billetes_1000': 0,
-        'monedas_1000': 0,
-        'monedas_500': 0,
-        'monedas_200': 0,
-        'monedas_100': 0,
-        'monedas_50': 0,
-    }
-    
-    total_efectivo = Decimal(0)
-    
-    # Sumar/restar desgloses según tipo de movimiento
-    # IMPORTANTE: Solo contar movimientos que tienen desglose registrado
-    for mov in movimientos_efectivo:
-        # Solo procesar si tiene desglose
-        if mov.desglose_efectivo:
-            # Sumar al total
-            total_efectivo += mov.monto
-            
-            desg = mov.desglose_efectivo
-            multiplicador = 1 if mov.monto > 0 else -1  # Ingresos suman, egresos restan
-            
-            desglose_total['billetes_100000'] += int(desg.billetes_100000 or 0) * multiplicador
-            desglose_total['billetes_50000'] += int(desg.billetes_50000 or 0) * multiplicador
-            desglose_total['billetes_20000'] += int(desg.billetes_20000 or 0) * multiplicador
-            desglose_total['billetes_10000'] += int(desg.billetes_10000 or 0) * multiplicador
-            desglose_total['billetes_5000'] += int(desg.billetes_5000 or 0) * multiplicador
-            desglose_total['billetes_2000'] += int(desg.billetes_2000 or 0) * multiplicador
-            desglose_total['billetes_1000'] += int(desg.billetes_1000 or 0) * multiplicador
-            desglose_total['monedas_1000'] += int(desg.monedas_1000 or 0) * multiplicador
-            desglose_total['monedas_500'] += int(desg.monedas_500 or 0) * multiplicador
-            desglose_total['monedas_200'] += int(desg.monedas_200 or 0) * multiplicador
-            desglose_total['monedas_100'] += int(desg.monedas_100 or 0) * multiplicador
-            desglose_total['monedas_50'] += int(desg.monedas_50 or 0) * multiplicador
+    desglose_total = leer_inventario(db)
     
     return {
         "desglose": desglose_total,
-        "total_efectivo": float(total_efectivo),
+        "total_efectivo": float(total_inventario(desglose_total)),
         "fecha_calculo": datetime.now(timezone.utc).isoformat()
     }
 
 
+@router.get("/sugerir-desglose")
+def sugerir_desglose_egreso(
+    monto: int = Query(..., gt=0, description="Monto del egreso en efectivo"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin)
+):
+    """
+    Sugerir el desglose de billetes y monedas para un egreso en efectivo:
+    combinación exacta con la menor cantidad de piezas según el inventario actual
+    """
+    disponible = leer_inventario(db)
+    sugerencia = sugerir_desglose(monto, disponible)
+    
+    if sugerencia is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=_generar_sugerencia_denominaciones(monto, disponible)
+        )
+    
+    return {
+        "monto": monto,
+        "desglose": {campo: sugerencia.desglose.get(campo, 0) for campo in _NOMBRES_DENOMINACIONES},
+        "piezas": sugerencia.piezas,
+        "optima": sugerencia.optimo
+    }
+
+
 # ==================== ESTADÍSTICAS ====================
 
 @router.get("/estadisticas", response_model=EstadisticasTesoreria)
 def obtener_estadisticas(
     fecha_desde: date,
     fecha_hasta: date,
+    serie: Optional[str] = Query(None, pattern="^(dia|semana|mes)$", description="Incluir serie por dia, semana o mes"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin)
 ):
     """
     Obtener estadísticas detalladas de un período
     """
-    movimientos = db.query(MovimientoTesoreria).filter(
-        and_(
-            MovimientoTesoreria.fecha_movimiento >= fecha_desde,
-            MovimientoTesoreria.fecha_movimiento <= fecha_hasta
-        )
-    ).all()
+    periodo_inicio, periodo_fin = rango_dias(fecha_desde, fecha_hasta)
     
-    total_ingresos = Decimal(0)
-    total_egresos = Decimal(0)
-    egresos_por_categoria = {}
-    
-    for mov in movimientos:
-        if mov.monto > 0:
-            total_ingresos += mov.monto
-        else:
-            total_egresos += abs(mov.monto)
-            cat = mov.categoria_egreso.value if mov.categoria_egreso else "sin_categoria"
-            egresos_por_categoria[cat] = egresos_por_categoria.get(cat, Decimal(0)) + abs(mov.monto)
+    total_ingresos, total_egresos, movimientos_count, _, egresos_por_categoria = _totales_por_categoria(
+        db, periodo_inicio, periodo_fin
+    )
     
     # Categoría con más egreso
     categoria_mas_egreso = None
@@ -537,10 +540,8 @@ def obtener_estadisticas(
         categoria_mas_egreso = max(egresos_por_categoria, key=egresos_por_categoria.get)
         monto_categoria_mas_egreso = egresos_por_categoria[categoria_mas_egreso]
     
-    # Saldo inicial (antes del período)
-    saldo_inicial = db.query(func.sum(MovimientoTesoreria.monto)).filter(
-        MovimientoTesoreria.fecha_movimiento < fecha_desde
-    ).scalar() or Decimal(0)
+    # Saldo inicial (al cierre del día anterior al período)
+    saldo_inicial = obtener_saldo(db, ModuloResumen.TESORERIA.value, fecha_desde - timedelta(days=1))
     
     saldo_final = saldo_inicial + total_ingresos - total_egresos
     
@@ -551,9 +552,10 @@ def obtener_estadisticas(
         total_egresos=total_egresos,
         saldo_inicial=saldo_inicial,
         saldo_final=saldo_final,
-        movimientos_count=len(movimientos),
+        movimientos_count=movimientos_count,
         categoria_mas_egreso=categoria_mas_egreso,
-        monto_categoria_mas_egreso=monto_categoria_mas_egreso
+        monto_categoria_mas_egreso=monto_categoria_mas_egreso,
+        serie=_serie_tesoreria(db, fecha_desde, fecha_hasta, serie) if serie else None
     )
 
 
@@ -611,7 +613,7 @@ def actualizar_configuracion(
     if config_data.email_notificacion is not None:
         config.email_notificacion = config_data.email_notificacion
     
-    config.updated_at = datetime.now(timezone.utc)
+    config.updated_at = utcnow()
     config.updated_by = current_user.id
     
     db.commit()
@@ -622,9 +624,15 @@ def actualizar_configuracion(
 
 # ==================== COMPROBANTES ====================
 
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from app.core.config import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from uuid import UUID
+from app.db.database import get_async_db
+from app.utils.cache_usuarios import cache_usuarios
+from app.utils.render_pdf import ejecutor_render
 
 security = HTTPBearer(auto_error=False)
 
@@ -632,11 +640,13 @@ security = HTTPBearer(auto_error=False)
 async def descargar_comprobante_egreso(
     movimiento_id: str,
     t: Optional[str] = Query(None, description="Token de autenticación"),
+    if_none_match: Optional[str] = Header(None),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generar y descargar comprobante de egreso en PDF
+    (consultas asíncronas; el render corre en el pool de render_pdf)
     """
     # Obtener token (de query param o header)
     token = t or (credentials.credentials if credentials else None)
@@ -646,21 +656,31 @@ async def descargar_comprobante_egreso(
     # Verificar token
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Token inválido")
-    except JWTError:
+        user_id = UUID(payload.get("sub") or "")
+    except (JWTError, ValueError):
         raise HTTPException(status_code=401, detail="Token inválido")
     
-    # Obtener usuario
-    current_user = db.query(Usuario).filter(Usuario.id == user_id).first()
+    # Obtener usuario (cache de usuarios autenticados)
+    await cache_usuarios.sincronizar_async(db)
+    current_user = cache_usuarios.obtener(user_id)
+    if current_user is None:
+        usuario_db = await db.get(Usuario, user_id)
+        current_user = cache_usuarios.guardar(usuario_db) if usuario_db else None
     if not current_user or not current_user.activo:
         raise HTTPException(status_code=401, detail="Usuario no activo")
     
-    # Obtener movimiento
-    movimiento = db.query(MovimientoTesoreria).filter(
-        MovimientoTesoreria.id == movimiento_id
-    ).first()
+    # Obtener movimiento con su desglose (sin lazy load en la sesión asíncrona)
+    try:
+        movimiento_uuid = UUID(movimiento_id)
+    except ValueError:
+        movimiento_uuid = None
+    movimiento = None
+    if movimiento_uuid:
+        movimiento = (await db.execute(
+            select(MovimientoTesoreria)
+            .options(selectinload(MovimientoTesoreria.desglose_efectivo))
+            .where(MovimientoTesoreria.id == movimiento_uuid)
+        )).scalars().first()
     
     if not movimiento:
         raise HTTPException(
@@ -676,55 +696,22 @@ async def descargar_comprobante_egreso(
         )
     
     # Obtener información del usuario que autorizó
-    usuario = db.query(Usuario).filter(Usuario.id == movimiento.created_by).first()
-    autorizado_por = usuario.nombre_completo if usuario else "N/A"
-    
-    # Preparar desglose de efectivo si existe
-    desglose_dict = None
-    if movimiento.desglose_efectivo:
-        desglose_dict = {
-            'billetes_100000': int(movimiento.desglose_efectivo.billetes_100000 or 0),
-            'billetes_50000': int(movimiento.desglose_efectivo.billetes_50000 or 0),
-            'billetes_20000': int(movimiento.desglose_efectivo.billetes_20000 or 0),
-            'billetes_10000': int(movimiento.desglose_efectivo.billetes_10000 or 0),
-            'billetes_5000': int(movimiento.desglose_efectivo.billetes_5000 or 0),
-            'billetes_2000': int(movimiento.desglose_efectivo.billetes_2000 or 0),
-            'billetes_1000': int(movimiento.desglose_efectivo.billetes_1000 or 0),
-            'monedas_1000': int(movimiento.desglose_efectivo.monedas_1000 or 0),
-            'monedas_500': int(movimiento.desglose_efectivo.monedas_500 or 0),
-            'monedas_200': int(movimiento.desglose_efectivo.monedas_200 or 0),
-            'monedas_100': int(movimiento.desglose_efectivo.monedas_100 or 0),
-            'monedas_50': int(movimiento.desglose_efectivo.monedas_50 or 0),
-        }
-    
-    # Generar comprobante
-    numero_comprobante = movimiento.numero_comprobante or f"EGR-{str(movimiento.id)[:8].upper()}"
-    
-    # Obtener valores de los enums
-    categoria_str = movimiento.categoria_egreso.value if movimiento.categoria_egreso else "otros_gastos"
-    metodo_pago_str = movimiento.metodo_pago.value if isinstance(movimiento.metodo_pago, MetodoPagoTesoreria) else str(movimiento.metodo_pago)
-    
-    pdf_buffer = generar_comprobante_egreso(
-        numero_comprobante=numero_comprobante,
-        fecha=movimiento.fecha_movimiento,
-        beneficiario=movimiento.concepto.split(" - ")[0] if " - " in movimiento.concepto else "N/A",
-        concepto=movimiento.concepto,
-        categoria=categoria_str,
-        monto=abs(movimiento.monto),
-        metodo_pago=metodo_pago_str,
-        autorizado_por=autorizado_por,
-        desglose_efectivo=desglose_dict
+    usuario = await db.get(Usuario, movimiento.created_by) if movimiento.created_by else None
+    
+    # Datos del PDF (también determinan la huella del archivo guardado)
+    datos = datos_egreso(movimiento, usuario.nombre_completo if usuario else None)
+    
+    # Generar el PDF solo la primera vez; después se sirve desde disco.
+    # Disco y render corren fuera del event loop.
+    comprobante = await run_in_threadpool(
+        almacen_comprobantes.obtener,
+        TIPO_EGRESO,
+        movimiento.id,
+        datos,
+        lambda: ejecutor_render.renderizar(GENERADORES[TIPO_EGRESO], datos)
     )
     
-    # Nombre del archivo
-    fecha_str = movimiento.fecha_movimiento.strftime("%Y%m%d")
-    nombre_archivo = f"Comprobante_Egreso_{numero_comprobante}_{fecha_str}.pdf"
-    
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={nombre_archivo}"}
-    )
+    return respuesta_comprobante(comprobante, nombre_archivo_egreso(movimiento), if_none_match)
 
 
 # ==================== CATEGORÍAS (para el frontend) ====================
@@ -14,6 +14,9 @@ from pydantic import BaseModel, EmailStr, field_serializer
 from uuid import UUID
 from app.utils.audit import create_audit_log
 from app.models.audit_log import AuditAction
+from app.models.version_cache import VERSION_USUARIOS, incrementar_version
+from app.utils.cache_usuarios import cache_usuarios
+from app.utils.fechas import utcnow
 
 router = APIRouter()
 
@@ -57,6 +60,16 @@ class UsuarioResponse(BaseModel):
 
 # ==================== ENDPOINTS ====================
 
+def _confirmar_cambio_usuario(db: Session, usuario_id: UUID):
+    """
+    Commit de un cambio en un usuario: sube la versión en la misma transacción
+    (los demás workers vacían su cache) y lo saca del cache de este worker
+    """
+    incrementar_version(db, VERSION_USUARIOS)
+    db.commit()
+    cache_usuarios.invalidar(usuario_id)
+
+
 @router.get("/")
 def listar_usuarios(
     skip: int = 0,
@@ -264,9 +277,9 @@ def actualizar_usuario(
     if usuario_data.activo is not None:
         usuario.activo = usuario_data.activo
     
-    usuario.updated_at = datetime.now(timezone.utc)
+    usuario.updated_at = utcnow()
     
-    db.commit()
+    _confirmar_cambio_usuario(db, usuario.id)
     db.refresh(usuario)
     
     # Auditar actualización
@@ -316,9 +329,9 @@ def cambiar_password(
     
     # Actualizar contraseña
     usuario.hashed_password = get_password_hash(password_data.password)
-    usuario.updated_at = datetime.now(timezone.utc)
+    usuario.updated_at = utcnow()
     
-    db.commit()
+    _confirmar_cambio_usuario(db, usuario.id)
     
     # Auditar cambio de contraseña
     create_audit_log(
@@ -362,9 +375,9 @@ def toggle_estado_usuario(
     
     # Toggle estado
     usuario.activo = not usuario.activo
-    usuario.updated_at = datetime.now(timezone.utc)
+    usuario.updated_at = utcnow()
     
-    db.commit()
+    _confirmar_cambio_usuario(db, usuario.id)
     db.refresh(usuario)
     
     return {
@@ -413,7 +426,8 @@ def eliminar_usuario(
         }
     )
     
+    usuario_eliminado_id = usuario.id
     db.delete(usuario)
-    db.commit()
+    _confirmar_cambio_usuario(db, usuario_eliminado_id)
     
     return {"message": "Usuario eliminado exitosamente"}
@@ -1,18 +1,30 @@
 """
 Endpoints de Vehículos
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from datetime import datetime, date, timezone
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, text
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 from decimal import Decimal
 
-from app.core.deps import get_db, get_current_user, get_cajero_or_admin, get_recepcionista_or_admin
+from app.core.deps import (
+    get_db,
+    get_async_db,
+    get_current_user,
+    get_cajero_or_admin,
+    get_recepcionista_or_admin,
+    get_cajero_or_admin_async,
+    get_recepcionista_or_admin_async
+)
 from app.models.usuario import Usuario
+from app.utils.fechas import hoy_negocio, rango_dia, fecha_negocio, inicio_dia_utc, parse_fecha, utcnow
+from app.utils.paginacion import paginar_keyset, agregar_next_cursor
 from app.models.vehiculo import VehiculoProceso, EstadoVehiculo, MetodoPago
-from app.models.tarifa import Tarifa, ComisionSOAT
-from app.models.caja import Caja, MovimientoCaja, TipoMovimiento, EstadoCaja
+from app.utils.motor_tarifas import motor_tarifas, TarifaVigente
+from app.utils.metricas import cobros
+from app.models.caja import Caja, MovimientoCaja, TipoMovimiento, EstadoCaja, select_caja_abierta
 from app.schemas.vehiculo import (
     VehiculoRegistro,
     VehiculoEdicion,
@@ -42,50 +54,130 @@ def mapear_tipo_vehiculo_a_comision(tipo_vehiculo: str) -> str:
         return "carro"
 
 
-def calcular_tarifa_por_antiguedad(ano_modelo: int, tipo_vehiculo: str, db: Session) -> Tarifa:
-    """Calcular tarifa según antigüedad y tipo de vehículo"""
-    ano_actual = datetime.now().year
-    antiguedad = ano_actual - ano_modelo
+def _tarifa_no_encontrada(tipo_vehiculo: str, antiguedad: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"No se encontró tarifa para vehículo tipo '{tipo_vehiculo}' de {antiguedad} años"
+    )
+
+
+def calcular_tarifa_por_antiguedad(ano_modelo: int, tipo_vehiculo: str, db: Session) -> TarifaVigente:
+    """Calcular tarifa según antigüedad y tipo de vehículo (motor de tarifas en memoria)"""
+    hoy = hoy_negocio()
+    antiguedad = hoy.year - ano_modelo
     
-    # Buscar tarifa vigente según tipo y antigüedad
-    hoy = date.today()
-    tarifa = db.query(Tarifa).filter(
-        and_(
-            Tarifa.activa == True,
-            Tarifa.tipo_vehiculo == tipo_vehiculo,
-            Tarifa.vigencia_inicio <= hoy,
-            Tarifa.vigencia_fin >= hoy,
-            Tarifa.antiguedad_min <= antiguedad,
-            (Tarifa.antiguedad_max >= antiguedad) | (Tarifa.antiguedad_max == None)
-        )
-    ).first()
+    tarifa = motor_tarifas.obtener(db).tarifa(tipo_vehiculo, antiguedad, hoy)
     
     if not tarifa:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No se encontró tarifa para vehículo tipo '{tipo_vehiculo}' de {antiguedad} años"
-        )
+        raise _tarifa_no_encontrada(tipo_vehiculo, antiguedad)
+    
+    return tarifa
+
+
+async def calcular_tarifa_por_antiguedad_async(ano_modelo: int, tipo_vehiculo: str, db: AsyncSession) -> TarifaVigente:
+    """Calcular tarifa según antigüedad y tipo de vehículo (sesión asíncrona)"""
+    hoy = hoy_negocio()
+    antiguedad = hoy.year - ano_modelo
+    
+    indice = await motor_tarifas.obtener_async(db)
+    tarifa = indice.tarifa(tipo_vehiculo, antiguedad, hoy)
+    
+    if not tarifa:
+        raise _tarifa_no_encontrada(tipo_vehiculo, antiguedad)
     
     return tarifa
 
 
+def _obtener_comision_soat(tipo_comision: str, db: Session) -> Decimal:
+    """Valor de la comisión SOAT vigente, o 0 si no hay ninguna"""
+    comision = motor_tarifas.obtener(db).comision(tipo_comision, hoy_negocio())
+    return comision.valor_comision if comision else Decimal(0)
+
+
+async def _obtener_comision_soat_async(tipo_comision: str, db: AsyncSession) -> Decimal:
+    """Valor de la comisión SOAT vigente, o 0 si no hay ninguna (sesión asíncrona)"""
+    indice = await motor_tarifas.obtener_async(db)
+    comision = indice.comision(tipo_comision, hoy_negocio())
+    return comision.valor_comision if comision else Decimal(0)
+
+
+async def _obtener_caja_abierta_async(usuario_id, db: AsyncSession):
+    """Caja abierta del usuario, o None"""
+    resultado = await db.execute(select_caja_abierta(usuario_id))
+    return resultado.scalars().first()
+
+
+# ==================== CONSULTAS ====================
+# (también las revisa scripts/verificar_planes_consulta.py)
+
+def select_pendientes():
+    """Vehículos registrados pendientes de pago, en orden de llegada"""
+    return select(VehiculoProceso).where(
+        VehiculoProceso.estado == EstadoVehiculo.REGISTRADO
+    ).order_by(VehiculoProceso.fecha_registro)
+
+
+def consulta_vehiculos(db: Session, buscar: Optional[str], estado: Optional[str],
+                       fecha_inicio: Optional[date], fecha_fin: Optional[date]):
+    """Vehículos con los filtros de listar_vehiculos (sin orden ni paginación)"""
+    query = db.query(VehiculoProceso)
+    
+    # Filtro de búsqueda (placa o cédula)
+    if buscar:
+        buscar_term = f"%{buscar.upper()}%"
+        query = query.filter(
+            or_(
+                VehiculoProceso.placa.ilike(buscar_term),
+                VehiculoProceso.cliente_documento.ilike(buscar_term),
+                VehiculoProceso.cliente_nombre.ilike(buscar_term)
+            )
+        )
+    
+    # Filtro por estado
+    if estado:
+        query = query.filter(VehiculoProceso.estado == estado)
+    
+    # Filtro por rango de fechas (días de negocio, comparando el timestamp directamente)
+    if fecha_inicio:
+        query = query.filter(VehiculoProceso.fecha_registro >= inicio_dia_utc(fecha_inicio))
+    if fecha_fin:
+        query = query.filter(VehiculoProceso.fecha_registro < inicio_dia_utc(fecha_fin + timedelta(days=1)))
+    
+    return query
+
+
+def consulta_cobrados(db: Session, caja_id, inicio: datetime, fin: datetime):
+    """Vehículos pagados en la caja dentro del rango UTC [inicio, fin), más recientes primero"""
+    return db.query(VehiculoProceso).filter(
+        and_(
+            VehiculoProceso.caja_id == caja_id,
+            VehiculoProceso.estado == EstadoVehiculo.PAGADO,
+            VehiculoProceso.fecha_pago >= inicio,
+            VehiculoProceso.fecha_pago < fin
+        )
+    ).order_by(VehiculoProceso.fecha_pago.desc())
+
+
 @router.post("/registrar", response_model=VehiculoResponse, status_code=status.HTTP_201_CREATED)
-def registrar_vehiculo(
+async def registrar_vehiculo(
     vehiculo_data: VehiculoRegistro,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_recepcionista_or_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_recepcionista_or_admin_async)
 ):
     """
     Registrar vehículo (Recepción)
     """
     # Validar que no exista vehículo con la misma placa en proceso
     placa_upper = vehiculo_data.placa.upper()
-    vehiculo_existente = db.query(VehiculoProceso).filter(
-        and_(
-            VehiculoProceso.placa == placa_upper,
-            VehiculoProceso.estado.in_([EstadoVehiculo.REGISTRADO, EstadoVehiculo.PAGADO])
-        )
-    ).first()
+    resultado = await db.execute(
+        select(VehiculoProceso).where(
+            and_(
+                VehiculoProceso.placa == placa_upper,
+                VehiculoProceso.estado.in_([EstadoVehiculo.REGISTRADO, EstadoVehiculo.PAGADO])
+            )
+        ).limit(1)
+    )
+    vehiculo_existente = resultado.scalars().first()
     
     if vehiculo_existente:
         raise HTTPException(
@@ -102,41 +194,19 @@ def registrar_vehiculo(
         
         # SOAT puede aplicar o no en preventiva
         if vehiculo_data.tiene_soat:
-            hoy = date.today()
-            comision = db.query(ComisionSOAT).filter(
-                and_(
-                    ComisionSOAT.tipo_vehiculo == "carro",  # Por defecto carro para preventiva
-                    ComisionSOAT.activa == True,
-                    ComisionSOAT.vigencia_inicio <= hoy,
-                    (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-                )
-            ).first()
-            
-            if comision:
-                comision_soat = comision.valor_comision
-                total_cobrado = comision_soat  # Solo SOAT por ahora, preventiva se suma en Caja
+            # Por defecto carro para preventiva
+            comision_soat = await _obtener_comision_soat_async("carro", db)
+            total_cobrado = comision_soat  # Solo SOAT por ahora, preventiva se suma en Caja
     else:
         # Calcular tarifa según tipo y antigüedad (RTM normal)
-        tarifa = calcular_tarifa_por_antiguedad(vehiculo_data.ano_modelo, vehiculo_data.tipo_vehiculo, db)
+        tarifa = await calcular_tarifa_por_antiguedad_async(vehiculo_data.ano_modelo, vehiculo_data.tipo_vehiculo, db)
         valor_rtm = tarifa.valor_total
         
         # Obtener comisión SOAT si aplica
         comision_soat = Decimal(0)
         if vehiculo_data.tiene_soat:
-            hoy = date.today()
             tipo_comision = mapear_tipo_vehiculo_a_comision(vehiculo_data.tipo_vehiculo)
-            
-            comision = db.query(ComisionSOAT).filter(
-                and_(
-                    ComisionSOAT.tipo_vehiculo == tipo_comision,
-                    ComisionSOAT.activa == True,
-                    ComisionSOAT.vigencia_inicio <= hoy,
-                    (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-                )
-            ).first()
-            
-            if comision:
-                comision_soat = comision.valor_comision
+            comision_soat = await _obtener_comision_soat_async(tipo_comision, db)
         
         total_cobrado = valor_rtm + comision_soat
     
@@ -160,8 +230,8 @@ def registrar_vehiculo(
     )
     
     db.add(nuevo_vehiculo)
-    db.commit()
-    db.refresh(nuevo_vehiculo)
+    await db.commit()
+    await db.refresh(nuevo_vehiculo)
     
     return nuevo_vehiculo
 
@@ -219,19 +289,8 @@ def editar_vehiculo(
         
         # SOAT puede aplicar o no en preventiva
         if vehiculo_data.tiene_soat:
-            hoy = date.today()
-            comision = db.query(ComisionSOAT).filter(
-                and_(
-                    ComisionSOAT.tipo_vehiculo == "carro",
-                    ComisionSOAT.activa == True,
-                    ComisionSOAT.vigencia_inicio <= hoy,
-                    (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-                )
-            ).first()
-            
-            if comision:
-                comision_soat = comision.valor_comision
-                total_cobrado = comision_soat
+            comision_soat = _obtener_comision_soat("carro", db)
+            total_cobrado = comision_soat
     else:
         # REUTILIZAR LÓGICA DE REGISTRO: Calcular tarifa según tipo y antigüedad
         tarifa = calcular_tarifa_por_antiguedad(vehiculo_data.ano_modelo, vehiculo_data.tipo_vehiculo, db)
@@ -240,20 +299,8 @@ def editar_vehiculo(
         # REUTILIZAR LÓGICA DE REGISTRO: Obtener comisión SOAT si aplica
         comision_soat = Decimal(0)
         if vehiculo_data.tiene_soat:
-            hoy = date.today()
             tipo_comision = mapear_tipo_vehiculo_a_comision(vehiculo_data.tipo_vehiculo)
-            
-            comision = db.query(ComisionSOAT).filter(
-                and_(
-                    ComisionSOAT.tipo_vehiculo == tipo_comision,
-                    ComisionSOAT.activa == True,
-                    ComisionSOAT.vigencia_inicio <= hoy,
-                    (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-                )
-            ).first()
-            
-            if comision:
-                comision_soat = comision.valor_comision
+            comision_soat = _obtener_comision_soat(tipo_comision, db)
         
         total_cobrado = valor_rtm + comision_soat
     
@@ -281,16 +328,15 @@ def editar_vehiculo(
 
 
 @router.get("/pendientes", response_model=VehiculosPendientes)
-def listar_pendientes(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_cajero_or_admin)
+async def listar_pendientes(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_cajero_or_admin_async)
 ):
     """
     Listar vehículos pendientes de pago (para Caja)
     """
-    vehiculos = db.query(VehiculoProceso).filter(
-        VehiculoProceso.estado == EstadoVehiculo.REGISTRADO
-    ).order_by(VehiculoProceso.fecha_registro).all()
+    resultado = await db.execute(select_pendientes())
+    vehiculos = resultado.scalars().all()
     
     return VehiculosPendientes(
         vehiculos=vehiculos,
@@ -299,18 +345,16 @@ def listar_pendientes(
 
 
 @router.post("/cobrar", response_model=VehiculoResponse)
-def cobrar_vehiculo(
+async def cobrar_vehiculo(
     cobro_data: VehiculoCobro,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_cajero_or_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_cajero_or_admin_async)
 ):
     """
     Cobrar vehículo (Caja)
     """
     # Buscar vehículo
-    vehiculo = db.query(VehiculoProceso).filter(
-        VehiculoProceso.id == cobro_data.vehiculo_id
-    ).first()
+    vehiculo = await db.get(VehiculoProceso, cobro_data.vehiculo_id)
     
     if not vehiculo:
         raise HTTPException(
@@ -325,12 +369,7 @@ def cobrar_vehiculo(
         )
     
     # Verificar que cajero tenga caja abierta
-    caja_abierta = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja_abierta = await _obtener_caja_abierta_async(current_user.id, db)
     
     if not caja_abierta:
         raise HTTPException(
@@ -353,18 +392,7 @@ def cobrar_vehiculo(
             # Si tiene SOAT, agregar comisión
             comision_soat = Decimal(0)
             if cobro_data.tiene_soat:
-                hoy = date.today()
-                comision = db.query(ComisionSOAT).filter(
-                    and_(
-                        ComisionSOAT.tipo_vehiculo == "carro",
-                        ComisionSOAT.activa == True,
-                        ComisionSOAT.vigencia_inicio <= hoy,
-                        (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-                    )
-                ).first()
-                
-                if comision:
-                    comision_soat = comision.valor_comision
+                comision_soat = await _obtener_comision_soat_async("carro", db)
             
             vehiculo.tiene_soat = cobro_data.tiene_soat
             vehiculo.comision_soat = comision_soat
@@ -374,20 +402,8 @@ def cobrar_vehiculo(
         elif cobro_data.tiene_soat != vehiculo.tiene_soat:
             comision_soat = Decimal(0)
             if cobro_data.tiene_soat:
-                hoy = date.today()
                 tipo_comision = mapear_tipo_vehiculo_a_comision(vehiculo.tipo_vehiculo)
-                
-                comision = db.query(ComisionSOAT).filter(
-                    and_(
-                        ComisionSOAT.tipo_vehiculo == tipo_comision,
-                        ComisionSOAT.activa == True,
-                        ComisionSOAT.vigencia_inicio <= hoy,
-                        (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-                    )
-                ).first()
-                
-                if comision:
-                    comision_soat = comision.valor_comision
+                comision_soat = await _obtener_comision_soat_async(tipo_comision, db)
             
             vehiculo.tiene_soat = cobro_data.tiene_soat
             vehiculo.comision_soat = comision_soat
@@ -398,16 +414,15 @@ def cobrar_vehiculo(
         vehiculo.registrado_runt = cobro_data.registrado_runt
         vehiculo.registrado_sicov = cobro_data.registrado_sicov
         vehiculo.registrado_indra = cobro_data.registrado_indra
-        vehiculo.fecha_pago = datetime.now(timezone.utc)
+        vehiculo.fecha_pago = utcnow()
         vehiculo.estado = EstadoVehiculo.PAGADO
         vehiculo.caja_id = caja_abierta.id
         vehiculo.cobrado_por = current_user.id
         
         # Para metodo_pago, usar UPDATE raw SQL para bypass enum type checking cuando es mixto
-        from sqlalchemy import text
         if cobro_data.metodo_pago == "mixto":
             # Usar SQL directo para actualizar con el valor literal
-            db.execute(
+            await db.execute(
                 text("UPDATE vehiculos_proceso SET metodo_pago = :metodo WHERE id = :vehiculo_id"),
                 {"metodo": "mixto", "vehiculo_id": str(vehiculo.id)}
             )
@@ -508,13 +523,14 @@ def cobrar_vehiculo(
                 )
                 db.add(mov_soat)
         
-        db.commit()
-        db.refresh(vehiculo)
+        await db.commit()
+        cobros.incrementar(tipo="rtm")
+        await db.refresh(vehiculo)
         
         return vehiculo
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al procesar el cobro: {str(e)}"
@@ -532,12 +548,7 @@ def venta_solo_soat(
     Cliente compra SOAT pero NO hace revisión. Solo se cobra comisión.
     """
     # Verificar que cajero tenga caja abierta
-    caja_abierta = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja_abierta = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if not caja_abierta:
         raise HTTPException(
@@ -548,16 +559,8 @@ def venta_solo_soat(
     # Validar placa
     placa_upper = venta_data.placa.upper()
     
-    # Obtener comisión SOAT desde la base de datos
-    hoy = date.today()
-    comision = db.query(ComisionSOAT).filter(
-        and_(
-            ComisionSOAT.tipo_vehiculo == venta_data.tipo_vehiculo,
-            ComisionSOAT.activa == True,
-            ComisionSOAT.vigencia_inicio <= hoy,
-            (ComisionSOAT.vigencia_fin >= hoy) | (ComisionSOAT.vigencia_fin == None)
-        )
-    ).first()
+    # Obtener comisión SOAT vigente (motor de tarifas en memoria)
+    comision = motor_tarifas.obtener(db).comision(venta_data.tipo_vehiculo, hoy_negocio())
     
     if not comision:
         raise HTTPException(
@@ -587,7 +590,7 @@ def venta_solo_soat(
             registrado_runt=False,
             registrado_sicov=False,
             registrado_indra=False,
-            fecha_pago=datetime.now(timezone.utc),
+            fecha_pago=utcnow(),
             estado=EstadoVehiculo.PAGADO,  # Directo a pagado
             observaciones=f"Venta solo SOAT - Valor comercial: ${venta_data.valor_soat_comercial}",
             caja_id=caja_abierta.id,
@@ -614,6 +617,7 @@ def venta_solo_soat(
         db.add(mov_soat)
         
         db.commit()
+        cobros.incrementar(tipo="solo_soat")
         db.refresh(vehiculo_soat)
         
         return vehiculo_soat
@@ -636,25 +640,14 @@ def listar_cobrados_hoy(
     Para permitir cambio de método de pago
     """
     # Obtener caja activa del usuario
-    caja_abierta = db.query(Caja).filter(
-        and_(
-            Caja.usuario_id == current_user.id,
-            Caja.estado == EstadoCaja.ABIERTA
-        )
-    ).first()
+    caja_abierta = db.execute(select_caja_abierta(current_user.id)).scalars().first()
     
     if not caja_abierta:
         return []  # No hay caja abierta, no hay vehículos
     
     # Obtener vehículos pagados de hoy en esta caja
-    hoy = date.today()
-    vehiculos = db.query(VehiculoProceso).filter(
-        and_(
-            VehiculoProceso.caja_id == caja_abierta.id,
-            VehiculoProceso.estado == EstadoVehiculo.PAGADO,
-            func.date(VehiculoProceso.fecha_pago) == hoy
-        )
-    ).order_by(VehiculoProceso.fecha_pago.desc()).all()
+    inicio, fin = rango_dia(hoy_negocio())
+    vehiculos = consulta_cobrados(db, caja_abierta.id, inicio, fin).all()
     
     return vehiculos
 
@@ -737,8 +730,8 @@ def cambiar_metodo_pago(
         )
     
     # Validar que sea el mismo día
-    hoy = date.today()
-    fecha_pago = vehiculo.fecha_pago.date() if vehiculo.fecha_pago else None
+    hoy = hoy_negocio()
+    fecha_pago = fecha_negocio(vehiculo.fecha_pago) if vehiculo.fecha_pago else None
     if fecha_pago != hoy:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -906,12 +899,14 @@ def obtener_vehiculo(
 
 @router.get("/", response_model=List[VehiculoResponse])
 def listar_vehiculos(
+    response: Response,
     buscar: str = None,
     estado: str = None,
     fecha_desde: str = None,
     fecha_hasta: str = None,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -923,48 +918,23 @@ def listar_vehiculos(
     - estado: Filtrar por estado del vehículo
     - fecha_desde: Fecha inicio (YYYY-MM-DD)
     - fecha_hasta: Fecha fin (YYYY-MM-DD)
-    - skip: Saltar registros (paginación)
+    - cursor: Cursor de la página siguiente (header X-Next-Cursor de la respuesta anterior)
+    - skip: Saltar registros (paginación por offset, se mantiene por compatibilidad)
     - limit: Límite de registros (default 20)
     """
-    from sqlalchemy import or_, func
-    
-    query = db.query(VehiculoProceso)
-    
-    # Filtro de búsqueda (placa o cédula)
-    if buscar:
-        buscar_term = f"%{buscar.upper()}%"
-        query = query.filter(
-            or_(
-                VehiculoProceso.placa.ilike(buscar_term),
-                VehiculoProceso.cliente_documento.ilike(buscar_term),
-                VehiculoProceso.cliente_nombre.ilike(buscar_term)
-            )
-        )
-    
-    # Filtro por estado
-    if estado:
-        query = query.filter(VehiculoProceso.estado == estado)
-    
-    # Filtro por rango de fechas
-    if fecha_desde:
-        try:
-            fecha_inicio = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-            query = query.filter(func.date(VehiculoProceso.fecha_registro) >= fecha_inicio)
-        except ValueError:
-            pass
-    
-    if fecha_hasta:
-        try:
-            fecha_fin = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-            query = query.filter(func.date(VehiculoProceso.fecha_registro) <= fecha_fin)
-        except ValueError:
-            pass
+    query = consulta_vehiculos(db, buscar, estado, parse_fecha(fecha_desde), parse_fecha(fecha_hasta))
     
-    # Ordenar por fecha de registro (más recientes primero)
-    query = query.order_by(VehiculoProceso.fecha_registro.desc())
+    # Paginación por offset (compatibilidad): costo lineal con la profundidad
+    if skip and not cursor:
+        return query.order_by(
+            VehiculoProceso.fecha_registro.desc(), VehiculoProceso.id.desc()
+        ).offset(skip).limit(limit).all()
     
-    # Paginación
-    vehiculos = query.offset(skip).limit(limit).all()
+    # Paginación por cursor (más recientes primero)
+    vehiculos, next_cursor = paginar_keyset(
+        query, VehiculoProceso.fecha_registro, VehiculoProceso.id, cursor, limit
+    )
+    agregar_next_cursor(response, next_cursor)
     
     return vehiculos
 
@@ -982,37 +952,7 @@ def contar_vehiculos(
     Contar total de vehículos con los mismos filtros que listar_vehiculos
     Útil para calcular paginación en el frontend
     """
-    from sqlalchemy import or_, func
-    
-    query = db.query(VehiculoProceso)
-    
-    # Aplicar los mismos filtros
-    if buscar:
-        buscar_term = f"%{buscar.upper()}%"
-        query = query.filter(
-            or_(
-                VehiculoProceso.placa.ilike(buscar_term),
-                VehiculoProceso.cliente_documento.ilike(buscar_term),
-                VehiculoProceso.cliente_nombre.ilike(buscar_term)
-            )
-        )
-    
-    if estado:
-        query = query.filter(VehiculoProceso.estado == estado)
-    
-    if fecha_desde:
-        try:
-            fecha_inicio = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-            query = query.filter(func.date(VehiculoProceso.fecha_registro) >= fecha_inicio)
-        except ValueError:
-            pass
-    
-    if fecha_hasta:
-        try:
-            fecha_fin = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-            query = query.filter(func.date(VehiculoProceso.fecha_registro) <= fecha_fin)
-        except ValueError:
-            pass
+    query = consulta_vehiculos(db, buscar, estado, parse_fecha(fecha_desde), parse_fecha(fecha_hasta))
     
     total = query.count()
     
@@ -1,7 +1,7 @@
 """
 Configuración central de la aplicación
 """
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
 
@@ -17,6 +17,54 @@ class Settings(BaseSettings):
     
     # Base de datos
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    
+    # Cache de tarifas: cada cuántos segundos un worker revisa si otro las modificó
+    TARIFAS_VERIFICACION_SEGUNDOS: int = 5
+    
+    # Cache de usuarios autenticados (get_current_user)
+    USUARIOS_CACHE_TTL_SEGUNDOS: int = 60
+    USUARIOS_CACHE_MAXIMO: int = 1000
+    USUARIOS_VERIFICACION_SEGUNDOS: int = 5
+    
+    # Escritor de auditoría en segundo plano (cola acotada + inserts por lote)
+    AUDITORIA_COLA_MAXIMO: int = 10000
+    AUDITORIA_LOTE_MAXIMO: int = 200
+    AUDITORIA_INTERVALO_SEGUNDOS: float = 1.0
+    
+    # Comprobantes PDF ya generados (compartido por todos los workers)
+    COMPROBANTES_DIR: str = "storage/comprobantes"
+    
+    # Render de PDF fuera del event loop (0 procesos = pool de hilos)
+    RENDER_PDF_PROCESOS: int = 2
+    RENDER_PDF_MAXIMO_SIMULTANEOS: int = 8
+    RENDER_PDF_ESPERA_SEGUNDOS: float = 30.0
+    
+    # Renders en paralelo por exportación masiva de comprobantes (ZIP)
+    EXPORTACION_COMPROBANTES_SIMULTANEOS: int = 4
+    
+    # Instrumentación SQL por request (headers X-SQL-* en desarrollo, log en producción)
+    SQL_INSTRUMENTACION: bool = True
+    # Repeticiones de una misma sentencia a partir de las cuales se marca posible N+1
+    SQL_UMBRAL_N_MAS_1: int = 5
+    
+    # Tamaño mínimo de una respuesta para comprimirla (gzip / brotli)
+    COMPRESION_MINIMO_BYTES: int = 1024
+    
+    # Servidor de producción (python run.py --produccion): gunicorn + workers de uvicorn
+    WEB_WORKERS: int = 0  # 0 = uno por núcleo disponible
+    WEB_MAX_REQUESTS: int = 5000  # Reciclar cada worker tras N requests (+ jitter aleatorio)
+    WEB_MAX_REQUESTS_JITTER: int = 500
+    WEB_TIMEOUT_SEGUNDOS: int = 120
+    WEB_GRACEFUL_SEGUNDOS: int = 30
+    
+    # GET /metrics (Prometheus). Si se define, se exige 'Authorization: Bearer <token>'
+    METRICAS_TOKEN: Optional[str] = None
+    # Con varios workers cada uno publica sus métricas aquí y /metrics las combina
+    # (vacío = solo las del proceso; python run.py --produccion usa un directorio temporal)
+    METRICAS_DIR: str = ""
+    METRICAS_INTERVALO_SEGUNDOS: float = 5.0
     
     # Seguridad JWT
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
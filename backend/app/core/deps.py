@@ -4,54 +4,55 @@ Dependencias de autenticación y permisos
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from uuid import UUID
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.core.security import decode_token
 from app.models.usuario import Usuario, RolEnum
+from app.utils.cache_usuarios import cache_usuarios, UsuarioAutenticado
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Usuario:
-    """
-    Obtener usuario actual desde token JWT
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _obtener_user_id_de_token(token: str) -> UUID:
+    """
+    Decodificar el access token y devolver el id del usuario
+    """
     # Decodificar token
     payload = decode_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     # Verificar que es access token
     if payload.get("type") != "access":
-        raise credentials_exception
+        raise _credentials_exception()
     
     # Obtener user_id
     user_id: Optional[str] = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    # Buscar usuario en base de datos
     try:
-        user_uuid = UUID(user_id)
+        return UUID(user_id)
     except ValueError:
-        raise credentials_exception
-    
-    user = db.query(Usuario).filter(Usuario.id == user_uuid).first()
-    
+        raise _credentials_exception()
+
+
+def _validar_usuario(user: Optional[UsuarioAutenticado]) -> UsuarioAutenticado:
+    """Verificar que el usuario exista y esté activo"""
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     if not user.activo:
         raise HTTPException(
@@ -62,11 +63,50 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UsuarioAutenticado:
+    """
+    Obtener usuario actual desde token JWT (cache en memoria, ver cache_usuarios)
+    """
+    user_uuid = _obtener_user_id_de_token(token)
+    
+    cache_usuarios.sincronizar(db)
+    user = cache_usuarios.obtener(user_uuid)
+    
+    if user is None:
+        # Buscar usuario en base de datos
+        usuario = db.query(Usuario).filter(Usuario.id == user_uuid).first()
+        user = cache_usuarios.guardar(usuario) if usuario else None
+    
+    return _validar_usuario(user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UsuarioAutenticado:
+    """
+    Obtener usuario actual desde token JWT (sesión asíncrona)
+    """
+    user_uuid = _obtener_user_id_de_token(token)
+    
+    await cache_usuarios.sincronizar_async(db)
+    user = cache_usuarios.obtener(user_uuid)
+    
+    if user is None:
+        usuario = await db.get(Usuario, user_uuid)
+        user = cache_usuarios.guardar(usuario) if usuario else None
+    
+    return _validar_usuario(user)
+
+
 def require_role(allowed_roles: list[str]):
     """
     Dependency para verificar rol de usuario
     """
-    def role_checker(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+    def role_checker(current_user: UsuarioAutenticado = Depends(get_current_user)) -> UsuarioAutenticado:
         if current_user.rol not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -78,8 +118,7 @@ def require_role(allowed_roles: list[str]):
 
 
 # Dependencias específicas por rol
-def get_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
-    """Solo administradores"""
+def _verificar_admin(current_user: UsuarioAutenticado) -> UsuarioAutenticado:
     if current_user.rol != RolEnum.ADMINISTRADOR:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -88,8 +127,7 @@ def get_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
     return current_user
 
 
-def get_cajero_or_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
-    """Cajeros o administradores"""
+def _verificar_cajero_or_admin(current_user: UsuarioAutenticado) -> UsuarioAutenticado:
     if current_user.rol not in [RolEnum.CAJERO, RolEnum.ADMINISTRADOR]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -98,11 +136,36 @@ def get_cajero_or_admin(current_user: Usuario = Depends(get_current_user)) -> Us
     return current_user
 
 
-def get_recepcionista_or_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
-    """Recepcionistas o administradores"""
+def _verificar_recepcionista_or_admin(current_user: UsuarioAutenticado) -> UsuarioAutenticado:
     if current_user.rol not in [RolEnum.RECEPCIONISTA, RolEnum.ADMINISTRADOR]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo recepcionistas o administradores pueden realizar esta acción"
         )
     return current_user
+
+
+def get_admin(current_user: UsuarioAutenticado = Depends(get_current_user)) -> UsuarioAutenticado:
+    """Solo administradores"""
+    return _verificar_admin(current_user)
+
+
+def get_cajero_or_admin(current_user: UsuarioAutenticado = Depends(get_current_user)) -> UsuarioAutenticado:
+    """Cajeros o administradores"""
+    return _verificar_cajero_or_admin(current_user)
+
+
+def get_recepcionista_or_admin(current_user: UsuarioAutenticado = Depends(get_current_user)) -> UsuarioAutenticado:
+    """Recepcionistas o administradores"""
+    return _verificar_recepcionista_or_admin(current_user)
+
+
+# Variantes para endpoints async (no ocupan un hilo del threadpool)
+async def get_cajero_or_admin_async(current_user: UsuarioAutenticado = Depends(get_current_user_async)) -> UsuarioAutenticado:
+    """Cajeros o administradores (sesión asíncrona)"""
+    return _verificar_cajero_or_admin(current_user)
+
+
+async def get_recepcionista_or_admin_async(current_user: UsuarioAutenticado = Depends(get_current_user_async)) -> UsuarioAutenticado:
+    """Recepcionistas o administradores (sesión asíncrona)"""
+    return _verificar_recepcionista_or_admin(current_user)
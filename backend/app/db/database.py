@@ -1,22 +1,60 @@
 """
 Configuración de base de datos PostgreSQL
 """
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.utils.metricas import QueuePoolMedido, AsyncQueuePoolMedido, registrar_pool
 
-# Motor de base de datos
+# Motor de base de datos (síncrono: scripts, init_db y endpoints no migrados)
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=QueuePoolMedido,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
 
 # Sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _url_async(database_url: str) -> str:
+    """Convertir la URL de PostgreSQL al driver asyncpg"""
+    for prefijo in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefijo):
+            return "postgresql+asyncpg://" + database_url[len(prefijo):]
+    return database_url
+
+
+# Motor asíncrono (asyncpg) para los endpoints de alto tráfico.
+# No abre conexiones hasta la primera consulta, así que los scripts
+# que solo usan SessionLocal no se ven afectados.
+async_engine = create_async_engine(
+    _url_async(settings.DATABASE_URL),
+    poolclass=AsyncQueuePoolMedido,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
+)
+
+# Gauges de ambos pools en /metrics
+registrar_pool(engine, "sync")
+registrar_pool(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: los objetos siguen legibles tras el commit
+# sin disparar cargas perezosas (no permitidas en AsyncSession)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base para modelos
 Base = declarative_base()
 
@@ -32,17 +70,66 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency para obtener sesión asíncrona de base de datos
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Clave del advisory lock de las tareas de arranque (init_db, checkpoints)
+_CLAVE_BLOQUEO_ARRANQUE = 72045110
+
+
+@contextmanager
+def bloqueo_arranque():
+    """
+    Advisory lock de PostgreSQL alrededor de las tareas de arranque.
+    Con varios workers (o varios servidores) solo uno crea el esquema y carga
+    los datos iniciales; los demás esperan y encuentran la huella al día.
+    """
+    with engine.connect() as conexion:
+        conexion.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": _CLAVE_BLOQUEO_ARRANQUE})
+        conexion.commit()  # El lock es de sesión: no dejar la conexión "idle in transaction"
+        try:
+            yield
+        finally:
+            conexion.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": _CLAVE_BLOQUEO_ARRANQUE})
+            conexion.commit()
+
+
 def init_db():
     """
     Inicializar base de datos: crear tablas y datos iniciales
+    Si la huella del esquema coincide con la guardada no hace nada más
+    que esa consulta (ver app/models/esquema_version.py)
     """
+    import importlib
+    import pkgutil
+    from sqlalchemy.exc import ProgrammingError
+    import app.models
     from app.models.usuario import Usuario
     from app.models.tarifa import Tarifa, ComisionSOAT
-    from app.models.caja import Caja, MovimientoCaja
-    from app.models.vehiculo import VehiculoProceso
+    from app.models.esquema_version import huella_esquema, select_huella, guardar_huella
     from app.core.security import get_password_hash
     from datetime import date
     
+    # Registrar todos los modelos: la huella debe cubrir el esquema completo
+    for modulo in pkgutil.iter_modules(app.models.__path__):
+        importlib.import_module(f"app.models.{modulo.name}")
+    
+    huella = huella_esquema(Base.metadata, engine.dialect)
+    try:
+        with engine.connect() as conexion:
+            huella_guardada = conexion.execute(select_huella()).scalar()
+    except ProgrammingError:
+        huella_guardada = None  # La tabla esquema_version aún no existe
+    
+    if huella_guardada == huella:
+        print("ℹ️  Esquema al día, se omite create_all")
+        return
+    
     # Crear todas las tablas
     Base.metadata.create_all(bind=engine)
     
@@ -164,6 +251,10 @@ def init_db():
             print("\n🎉 Base de datos inicializada correctamente\n")
         else:
             print("ℹ️  Base de datos ya inicializada")
+        
+        # Esquema y datos iniciales al día: los próximos arranques se saltan este paso
+        guardar_huella(db, huella)
+        db.commit()
             
     except Exception as e:
         print(f"❌ Error inicializando base de datos: {e}")
@@ -1,12 +1,20 @@
 """
 Aplicación principal FastAPI - CDA La Florida
 """
-from fastapi import FastAPI, Request
+import secrets
+
+from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
-from starlette.middleware.base import BaseHTTPMiddleware
 from app.core.config import settings
-from app.db.database import init_db
+from app.db.database import init_db, engine, async_engine, SessionLocal, bloqueo_arranque
+from app.models.saldo_checkpoint import generar_checkpoints
+from app.utils.audit import escritor_auditoria
+from app.utils.render_pdf import ejecutor_render
+from app.utils.calentamiento import calentar_worker, calentar_pool_async
+from app.utils.instrumentacion_sql import InstrumentacionSQLMiddleware
+from app.utils.metricas import MetricasMiddleware, exponer_metricas, publicador_metricas
+from app.utils.middleware_http import SecurityHeadersMiddleware, CompresionMiddleware, ETagMiddleware
 from app.api.v1.api import api_router
 
 app = FastAPI(
@@ -17,34 +25,29 @@ app = FastAPI(
     redoc_url="/redoc" if settings.ENVIRONMENT == "development" else None
 )
 
-# ==================== MIDDLEWARE DE SEGURIDAD ====================
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware para agregar headers de seguridad HTTP
-    """
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Headers de seguridad
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        # Content Security Policy
-        if settings.ENVIRONMENT == "production":
-            response.headers["Content-Security-Policy"] = "default-src 'self'"
-        
-        # No revelar información del servidor
-        if "server" in response.headers:
-            del response.headers["server"]
-        
-        return response
-
-# Aplicar middleware de seguridad
+# ==================== MIDDLEWARE ====================
+# (el último agregado es el más externo)
+
+# ETag fuerte y 304 para GET JSON (dentro de la compresión: huella del JSON sin comprimir)
+app.add_middleware(ETagMiddleware)
+
+# gzip / brotli para respuestas de texto y JSON
+app.add_middleware(CompresionMiddleware, minimo_bytes=settings.COMPRESION_MINIMO_BYTES)
+
+# Headers de seguridad
 app.add_middleware(SecurityHeadersMiddleware)
 
+# Sentencias SQL por request y detección de posibles N+1
+if settings.SQL_INSTRUMENTACION:
+    app.add_middleware(
+        InstrumentacionSQLMiddleware,
+        umbral_n_mas_1=settings.SQL_UMBRAL_N_MAS_1,
+        headers=settings.ENVIRONMENT == "development"
+    )
+
+# Latencia por ruta para /metrics
+app.add_middleware(MetricasMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -52,14 +55,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "X-Next-Cursor", "X-SQL-Count", "X-SQL-Time-Ms", "X-SQL-Repeated"],
 )
 
 
 @app.on_event("startup")
 def on_startup():
-    """Inicializar base de datos al arrancar"""
-    init_db()
+    """Inicializar base de datos, checkpoints de saldo y escritor de auditoría; calentar el worker"""
+    # Con varios workers, uno a la vez: el primero aplica el esquema y los demás lo encuentran al día
+    with bloqueo_arranque():
+        init_db()
+        with engine.begin() as conexion:
+            generar_checkpoints(conexion)
+    escritor_auditoria.iniciar()
+    publicador_metricas.iniciar()
+    segundos = calentar_worker(engine, SessionLocal)
+    print(f"🔥 Worker listo: pool y caches cargados en {segundos * 1000:.0f} ms")
+
+
+@app.on_event("startup")
+async def calentar_pool_asincrono():
+    """Abrir las conexiones del pool asyncpg antes de aceptar tráfico"""
+    await calentar_pool_async(async_engine, settings.DB_POOL_SIZE)
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """Guardar la auditoría y las métricas pendientes y cerrar el pool de render antes de salir"""
+    escritor_auditoria.detener()
+    publicador_metricas.detener()
+    ejecutor_render.detener()
 
 
 @app.get("/health", tags=["health"])
@@ -73,5 +98,15 @@ def health_check():
     }
 
 
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+def metrics(request: Request):
+    """Métricas en formato de texto de Prometheus (de todos los workers con METRICAS_DIR)"""
+    if settings.METRICAS_TOKEN:
+        autorizacion = request.headers.get("authorization", "")
+        if not secrets.compare_digest(autorizacion, f"Bearer {settings.METRICAS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autorizado")
+    return Response(exponer_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # Incluir routers de API
 app.include_router(api_router, prefix="/api/v1")
@@ -0,0 +1,8 @@
+# Registrar el listener que mantiene resumen_diario en cada flush de movimientos
+from app.models import resumen_diario  # noqa: F401
+
+# Invalidar checkpoints de saldo cuando se tocan movimientos de días cerrados
+from app.models import saldo_checkpoint  # noqa: F401
+
+# Mantener los totales acumulados de cada caja en cada flush de movimientos
+from app.models import totales_caja  # noqa: F401
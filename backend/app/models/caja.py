@@ -1,15 +1,15 @@
 """
 Modelos de Caja y Movimientos
 """
-from sqlalchemy import Column, String, Numeric, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, String, Numeric, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text, Index, select
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
 from decimal import Decimal
 import uuid
 import enum
 
 from app.db.database import Base
+from app.utils.fechas import utcnow
 
 
 class TurnoEnum(str, enum.Enum):
@@ -44,7 +44,7 @@ class Caja(Base):
     usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=False)
     
     # Apertura
-    fecha_apertura = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    fecha_apertura = Column(DateTime, default=utcnow, nullable=False)
     monto_inicial = Column(Numeric(10, 2), nullable=False)
     turno = Column(SQLEnum(TurnoEnum), nullable=False)
     
@@ -58,6 +58,20 @@ class Caja(Base):
     # Estado
     estado = Column(SQLEnum(EstadoCaja), default=EstadoCaja.ABIERTA, nullable=False)
     
+    # Totales acumulados de los movimientos (los mantiene app/models/totales_caja.py
+    # en el mismo flush que inserta, modifica o elimina cada movimiento)
+    total_ingresos = Column(Numeric(12, 2), default=0, nullable=False)
+    total_ingresos_efectivo = Column(Numeric(12, 2), default=0, nullable=False)  # Excluye CrediSmart
+    total_egresos = Column(Numeric(12, 2), default=0, nullable=False)
+    total_rtm = Column(Numeric(12, 2), default=0, nullable=False)
+    total_comision_soat = Column(Numeric(12, 2), default=0, nullable=False)
+    total_efectivo = Column(Numeric(12, 2), default=0, nullable=False)
+    total_tarjeta_debito = Column(Numeric(12, 2), default=0, nullable=False)
+    total_tarjeta_credito = Column(Numeric(12, 2), default=0, nullable=False)
+    total_transferencia = Column(Numeric(12, 2), default=0, nullable=False)
+    total_credismart = Column(Numeric(12, 2), default=0, nullable=False)
+    total_sistecredito = Column(Numeric(12, 2), default=0, nullable=False)
+    
     # Relaciones
     usuario = relationship("Usuario", backref="cajas")
     vehiculos = relationship("VehiculoProceso", back_populates="caja")
@@ -65,31 +79,20 @@ class Caja(Base):
     desglose_cierre = relationship("DesgloseEfectivoCierre", back_populates="caja", uselist=False)
     notificaciones_cierre = relationship("NotificacionCierreCaja", back_populates="caja")
     
+    # Índices (ver migrations/add_indices_ledger.sql, add_indices_keyset.sql y add_indices_reportes.sql)
+    __table_args__ = (
+        # Caja abierta del usuario y su última caja cerrada (por fecha de cierre)
+        Index('idx_cajas_usuario_estado_cierre', usuario_id, estado, fecha_cierre),
+        Index('idx_cajas_fecha_apertura_id', fecha_apertura, id),
+    )
+    
     def __repr__(self):
         return f"<Caja {self.turno} - {self.usuario.nombre_completo} - {self.estado}>"
     
-    @property
-    def total_ingresos_efectivo(self) -> Decimal:
-        """Total de ingresos en efectivo (excluye CrediSmart)"""
-        total = sum(
-            m.monto for m in self.movimientos 
-            if m.ingresa_efectivo and m.monto > 0
-        )
-        return Decimal(str(total)) if total else Decimal('0')
-    
-    @property
-    def total_egresos(self) -> Decimal:
-        """Total de egresos"""
-        total = sum(
-            abs(m.monto) for m in self.movimientos 
-            if m.monto < 0
-        )
-        return Decimal(str(total)) if total else Decimal('0')
-    
     @property
     def saldo_esperado(self) -> Decimal:
         """Saldo esperado en caja"""
-        return Decimal(str(self.monto_inicial)) + self.total_ingresos_efectivo - self.total_egresos
+        return Decimal(str(self.monto_inicial)) + Decimal(str(self.total_ingresos_efectivo or 0)) - Decimal(str(self.total_egresos or 0))
 
 
 class MovimientoCaja(Base):
@@ -112,7 +115,7 @@ class MovimientoCaja(Base):
     ingresa_efectivo = Column(Boolean, default=True, nullable=False)
     
     # Auditoría
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    created_at = Column(DateTime, default=utcnow, nullable=False)
     created_by = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"))
     
     # Relaciones
@@ -120,6 +123,14 @@ class MovimientoCaja(Base):
     vehiculo = relationship("VehiculoProceso")
     usuario = relationship("Usuario")
     
+    # Índices (ver migrations/add_indices_ledger.sql)
+    __table_args__ = (
+        Index('idx_movimientos_caja_caja_created', caja_id, created_at),
+        Index('idx_movimientos_caja_created_at', created_at),
+        Index('idx_movimientos_caja_vehiculo', vehiculo_id),
+        Index('idx_movimientos_caja_metodo_created', metodo_pago, created_at),
+    )
+    
     def __repr__(self):
         signo = "+" if self.monto >= 0 else "-"
         return f"<MovimientoCaja {self.tipo} {signo}${abs(self.monto)}>"
@@ -149,7 +160,7 @@ class DesgloseEfectivoCierre(Base):
     monedas_50 = Column(Numeric(10, 0), default=0, nullable=False)
     
     # Auditoría
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
     
     # Relación
     caja = relationship("Caja", back_populates="desglose_cierre")
@@ -174,3 +185,11 @@ class DesgloseEfectivoCierre(Base):
     
     def __repr__(self):
         return f"<DesgloseEfectivoCierre total=${self.calcular_total():,.0f}>"
+
+
+def select_caja_abierta(usuario_id):
+    """Caja abierta del usuario (a lo sumo una)"""
+    return select(Caja).where(
+        Caja.usuario_id == usuario_id,
+        Caja.estado == EstadoCaja.ABIERTA
+    ).limit(1)
@@ -0,0 +1,76 @@
+"""
+Modelo de Versión de Esquema - Huella del esquema ya aplicado a la base de datos
+
+init_db calcula una huella de Base.metadata (tablas, columnas, índices y
+restricciones de los modelos). Si coincide con la guardada aquí, el esquema
+está al día: se omiten create_all y la carga de datos iniciales, que en cada
+arranque de worker costaban una consulta por tabla.
+"""
+import hashlib
+import json
+
+from sqlalchemy import Column, Integer, String, DateTime, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.database import Base
+from app.utils.fechas import utcnow
+
+# Fila única de la tabla
+_ID_ESQUEMA = 1
+
+
+class EsquemaVersion(Base):
+    """Huella del último esquema aplicado con init_db"""
+    __tablename__ = "esquema_version"
+
+    id = Column(Integer, primary_key=True)
+    huella = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<EsquemaVersion {self.huella[:12]}>"
+
+
+def huella_esquema(metadata, dialecto) -> str:
+    """Hash estable de la definición de todas las tablas de `metadata`"""
+    tablas = []
+    for tabla in metadata.sorted_tables:
+        tablas.append({
+            "nombre": tabla.name,
+            "columnas": [
+                [
+                    columna.name,
+                    columna.type.compile(dialect=dialecto),
+                    columna.nullable,
+                    columna.primary_key,
+                    sorted(fk.target_fullname for fk in columna.foreign_keys),
+                ]
+                for columna in tabla.columns
+            ],
+            "indices": sorted(
+                [str(indice.name), indice.unique, [str(expresion) for expresion in indice.expressions]]
+                for indice in tabla.indexes
+            ),
+            "restricciones": sorted(
+                [type(restriccion).__name__, str(restriccion.name)]
+                for restriccion in tabla.constraints
+            ),
+        })
+    contenido = json.dumps(tablas, sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def select_huella():
+    """Consulta de la huella guardada (None si aún no hay)"""
+    return select(EsquemaVersion.huella).where(EsquemaVersion.id == _ID_ESQUEMA)
+
+
+def guardar_huella(db, huella: str):
+    """Registrar la huella del esquema recién aplicado (dentro de la transacción actual)"""
+    tabla = EsquemaVersion.__table__
+    stmt = pg_insert(tabla).values(id=_ID_ESQUEMA, huella=huella, updated_at=utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.id],
+        set_={"huella": stmt.excluded.huella, "updated_at": stmt.excluded.updated_at}
+    )
+    db.execute(stmt)
@@ -0,0 +1,166 @@
+"""
+Modelo de Inventario de Denominaciones - Billetes y monedas en tesorería
+
+Una fila por denominación con la cantidad disponible en la caja fuerte.
+crear_movimiento la actualiza en la misma transacción que guarda un
+movimiento en efectivo con desglose; los egresos bloquean las filas antes de
+validar, así dos egresos simultáneos no pueden sacar los mismos billetes.
+
+La validación y /desglose-efectivo leen 12 filas en lugar de recorrer todo el
+histórico de movimientos.
+"""
+from sqlalchemy import Column, String, Integer, DateTime, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict
+
+from app.db.database import Base
+from app.utils.fechas import utcnow
+
+# Denominaciones del desglose (campo, valor en pesos), de mayor a menor
+DENOMINACIONES = (
+    ("billetes_100000", 100000),
+    ("billetes_50000", 50000),
+    ("billetes_20000", 20000),
+    ("billetes_10000", 10000),
+    ("billetes_5000", 5000),
+    ("billetes_2000", 2000),
+    ("billetes_1000", 1000),
+    ("monedas_1000", 1000),
+    ("monedas_500", 500),
+    ("monedas_200", 200),
+    ("monedas_100", 100),
+    ("monedas_50", 50),
+)
+
+
+class InventarioDenominacion(Base):
+    """Cantidad disponible de una denominación en tesorería"""
+    __tablename__ = "inventario_denominaciones"
+
+    denominacion = Column(String(20), primary_key=True)  # billetes_50000, monedas_500...
+    valor = Column(Integer, nullable=False)
+    cantidad = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<InventarioDenominacion {self.denominacion}={self.cantidad}>"
+
+
+def _inventario_vacio() -> Dict[str, int]:
+    return {campo: 0 for campo, _ in DENOMINACIONES}
+
+
+def _a_diccionario(filas) -> Dict[str, int]:
+    inventario = _inventario_vacio()
+    for denominacion, cantidad in filas:
+        inventario[denominacion] = int(cantidad)
+    return inventario
+
+
+def leer_inventario(db) -> Dict[str, int]:
+    """Cantidades disponibles por denominación (sin bloqueo)"""
+    tabla = InventarioDenominacion.__table__
+    return _a_diccionario(db.execute(select(tabla.c.denominacion, tabla.c.cantidad)))
+
+
+def bloquear_inventario(db) -> Dict[str, int]:
+    """
+    Cantidades disponibles bloqueando las filas (SELECT ... FOR UPDATE) hasta
+    el fin de la transacción. Usar antes de validar un egreso en efectivo.
+    """
+    tabla = InventarioDenominacion.__table__
+    consulta = (
+        select(tabla.c.denominacion, tabla.c.cantidad)
+        .order_by(tabla.c.denominacion.collate("C"))  # Mismo orden que sorted() en Python
+        .with_for_update()
+    )
+    return _a_diccionario(db.execute(consulta))
+
+
+def total_inventario(inventario: Dict[str, int]) -> int:
+    """Total en pesos de un inventario"""
+    return sum(inventario.get(campo, 0) * valor for campo, valor in DENOMINACIONES)
+
+
+def aplicar_desglose(db, desglose: Dict[str, int], signo: int) -> None:
+    """
+    Sumar (signo=1, ingreso) o restar (signo=-1, egreso) un desglose al
+    inventario dentro de la transacción actual.
+    """
+    tabla = InventarioDenominacion.__table__
+    ahora = utcnow()
+    filas = [
+        {"denominacion": campo, "valor": valor, "cantidad": signo * int(desglose.get(campo) or 0), "updated_at": ahora}
+        for campo, valor in sorted(DENOMINACIONES)  # Mismo orden que bloquear_inventario
+        if desglose.get(campo)
+    ]
+    if not filas:
+        return
+
+    stmt = pg_insert(tabla).values(filas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.denominacion],
+        set_={
+            "cantidad": tabla.c.cantidad + stmt.excluded.cantidad,
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+    db.execute(stmt)
+
+
+# ==================== RECONSTRUCCIÓN ====================
+
+# Cantidades por denominación según todo el histórico de movimientos en efectivo
+# con desglose (ingresos suman, egresos restan). metodo_pago guarda el nombre del enum.
+_SQL_HISTORICO = """
+SELECT d.denominacion,
+       SUM(CASE WHEN m.monto > 0 THEN d.cantidad ELSE -d.cantidad END) AS cantidad
+FROM movimientos_tesoreria m
+JOIN desglose_efectivo_tesoreria e ON e.movimiento_id = m.id
+CROSS JOIN LATERAL (VALUES
+    ('billetes_100000', e.billetes_100000),
+    ('billetes_50000', e.billetes_50000),
+    ('billetes_20000', e.billetes_20000),
+    ('billetes_10000', e.billetes_10000),
+    ('billetes_5000', e.billetes_5000),
+    ('billetes_2000', e.billetes_2000),
+    ('billetes_1000', e.billetes_1000),
+    ('monedas_1000', e.monedas_1000),
+    ('monedas_500', e.monedas_500),
+    ('monedas_200', e.monedas_200),
+    ('monedas_100', e.monedas_100),
+    ('monedas_50', e.monedas_50)
+) AS d(denominacion, cantidad)
+WHERE m.metodo_pago = 'EFECTIVO'
+GROUP BY d.denominacion
+"""
+
+
+def calcular_inventario_historico(conexion) -> Dict[str, int]:
+    """Inventario calculado desde los movimientos (sin tocar la tabla)"""
+    return _a_diccionario(conexion.execute(text(_SQL_HISTORICO)))
+
+
+def reconstruir_inventario(conexion) -> Dict[str, int]:
+    """
+    Reemplazar el inventario por el calculado desde el histórico. Bloquea la
+    tabla para que ningún movimiento concurrente quede a medias.
+    Devuelve el inventario resultante.
+    """
+    conexion.execute(text("LOCK TABLE inventario_denominaciones IN SHARE ROW EXCLUSIVE MODE"))
+
+    inventario = calcular_inventario_historico(conexion)
+    tabla = InventarioDenominacion.__table__
+    ahora = utcnow()
+
+    stmt = pg_insert(tabla).values([
+        {"denominacion": campo, "valor": valor, "cantidad": inventario[campo], "updated_at": ahora}
+        for campo, valor in DENOMINACIONES
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.denominacion],
+        set_={"cantidad": stmt.excluded.cantidad, "updated_at": stmt.excluded.updated_at}
+    )
+    conexion.execute(stmt)
+    return inventario
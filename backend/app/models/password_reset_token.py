@@ -1,10 +1,10 @@
 from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
 import uuid
 
 from app.db.database import Base
+from app.utils.fechas import utcnow
 
 
 class PasswordResetToken(Base):
@@ -15,7 +15,7 @@ class PasswordResetToken(Base):
     token = Column(String(255), unique=True, nullable=False, index=True)
     expira_en = Column(DateTime, nullable=False, index=True)
     usado = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
 
     # Relación con Usuario
     usuario = relationship("Usuario", back_populates="reset_tokens")
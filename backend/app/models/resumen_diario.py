@@ -0,0 +1,230 @@
+"""
+Modelo de Resumen Diario - Acumulado de movimientos por día de negocio
+
+Cada fila acumula los movimientos de un día (zona settings.TIMEZONE) para un
+módulo (caja / tesoreria), concepto (tipo de movimiento o categoría) y
+método de pago. Se mantiene incrementalmente en el mismo flush (y por lo
+tanto en la misma transacción) que inserta, modifica o elimina movimientos,
+así los reportes no tienen que recorrer el histórico completo.
+"""
+from sqlalchemy import Column, String, Numeric, Integer, Date, DateTime, Index, event, inspect, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from datetime import datetime
+from decimal import Decimal
+import enum
+
+from app.db.database import Base
+from app.models.caja import MovimientoCaja
+from app.models.tesoreria import MovimientoTesoreria, TipoMovimientoTesoreria
+from app.utils.fechas import fecha_negocio, rango_dias, utcnow
+
+
+class ModuloResumen(str, enum.Enum):
+    """Módulos que alimentan el resumen diario"""
+    CAJA = "caja"
+    TESORERIA = "tesoreria"
+
+
+SIN_CATEGORIA = "sin_categoria"
+
+
+class ResumenDiario(Base):
+    """Totales diarios por módulo, concepto y método de pago"""
+    __tablename__ = "resumen_diario"
+
+    # Llave (un día de negocio, no un día UTC)
+    dia = Column(Date, primary_key=True)
+    modulo = Column(String(20), primary_key=True)
+    concepto = Column(String(50), primary_key=True)  # rtm, gasto, nomina, traslado_caja...
+    metodo_pago = Column(String(50), primary_key=True)  # '' si el movimiento no tiene método
+
+    # Acumulados
+    ingresos = Column(Numeric(14, 2), default=0, nullable=False)  # Suma de montos positivos
+    egresos = Column(Numeric(14, 2), default=0, nullable=False)   # Suma de |montos negativos|
+    cantidad = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=utcnow, nullable=False)
+
+    # Saldos: netos de un módulo posteriores al último checkpoint (ver saldo_checkpoint.py)
+    __table_args__ = (
+        Index('idx_resumen_diario_modulo_dia', modulo, dia),
+    )
+
+    def __repr__(self):
+        return f"<ResumenDiario {self.dia} {self.modulo}/{self.concepto}/{self.metodo_pago} +{self.ingresos} -{self.egresos}>"
+
+
+# ==================== MANTENIMIENTO INCREMENTAL ====================
+
+# Atributos que cambian la fila del resumen a la que pertenece un movimiento
+_CAMPOS_CAJA = ("created_at", "tipo", "metodo_pago", "monto")
+_CAMPOS_TESORERIA = ("fecha_movimiento", "tipo", "categoria_ingreso", "categoria_egreso", "metodo_pago", "monto")
+
+
+def _texto(valor) -> str:
+    """Valor de enum o string tal como se guarda en el resumen"""
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    return valor or ""
+
+
+def _valor(movimiento, campo: str, anterior: bool):
+    """Valor actual del atributo, o el que tenía antes del flush si `anterior`"""
+    if anterior:
+        historial = inspect(movimiento).attrs[campo].history
+        if historial.deleted:
+            return historial.deleted[0]
+    return getattr(movimiento, campo)
+
+
+def _clave_y_monto(movimiento, anterior: bool = False):
+    """Fila del resumen (dia, modulo, concepto, metodo) y monto de un movimiento"""
+    if isinstance(movimiento, MovimientoCaja):
+        momento = _valor(movimiento, "created_at", anterior)
+        modulo = ModuloResumen.CAJA.value
+        concepto = _texto(_valor(movimiento, "tipo", anterior))
+    else:
+        momento = _valor(movimiento, "fecha_movimiento", anterior)
+        modulo = ModuloResumen.TESORERIA.value
+        tipo = _valor(movimiento, "tipo", anterior)
+        if _texto(tipo) == TipoMovimientoTesoreria.INGRESO.value:
+            categoria = _valor(movimiento, "categoria_ingreso", anterior)
+        else:
+            categoria = _valor(movimiento, "categoria_egreso", anterior)
+        concepto = _texto(categoria) or SIN_CATEGORIA
+
+    dia = fecha_negocio(momento or utcnow())
+    metodo = _texto(_valor(movimiento, "metodo_pago", anterior))
+    monto = Decimal(str(_valor(movimiento, "monto", anterior) or 0))
+    return (dia, modulo, concepto, metodo), monto
+
+
+def _acumular(deltas: dict, clave: tuple, monto: Decimal, signo: int):
+    """Sumar (signo=1) o restar (signo=-1) un movimiento a los deltas del flush"""
+    ingresos, egresos, cantidad = deltas.get(clave, (Decimal(0), Decimal(0), 0))
+    if monto > 0:
+        ingresos += signo * monto
+    else:
+        egresos += signo * abs(monto)
+    deltas[clave] = (ingresos, egresos, cantidad + signo)
+
+
+def _cambio_relevante(movimiento) -> bool:
+    """True si el flush modifica algún campo que afecta el resumen"""
+    campos = _CAMPOS_CAJA if isinstance(movimiento, MovimientoCaja) else _CAMPOS_TESORERIA
+    estado = inspect(movimiento)
+    return any(estado.attrs[campo].history.has_changes() for campo in campos)
+
+
+@event.listens_for(Session, "after_flush")
+def _actualizar_resumen_diario(session, flush_context):
+    """
+    Aplicar al resumen los movimientos insertados, modificados o eliminados
+    en este flush. Corre dentro de la misma transacción del flush.
+    """
+    tipos = (MovimientoCaja, MovimientoTesoreria)
+    deltas = {}
+
+    for movimiento in session.new:
+        if isinstance(movimiento, tipos):
+            _acumular(deltas, *_clave_y_monto(movimiento), 1)
+
+    for movimiento in session.deleted:
+        if isinstance(movimiento, tipos):
+            _acumular(deltas, *_clave_y_monto(movimiento, anterior=True), -1)
+
+    for movimiento in session.dirty:
+        if isinstance(movimiento, tipos) and _cambio_relevante(movimiento):
+            _acumular(deltas, *_clave_y_monto(movimiento, anterior=True), -1)
+            _acumular(deltas, *_clave_y_monto(movimiento), 1)
+
+    if not deltas:
+        return
+
+    tabla = ResumenDiario.__table__
+    conexion = session.connection()
+    ahora = utcnow()
+
+    # Orden fijo de llaves para que dos transacciones concurrentes no se bloqueen mutuamente
+    for clave in sorted(deltas):
+        ingresos, egresos, cantidad = deltas[clave]
+        if not ingresos and not egresos and not cantidad:
+            continue
+        dia, modulo, concepto, metodo = clave
+        stmt = pg_insert(tabla).values(
+            dia=dia,
+            modulo=modulo,
+            concepto=concepto,
+            metodo_pago=metodo,
+            ingresos=ingresos,
+            egresos=egresos,
+            cantidad=cantidad,
+            updated_at=ahora
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.dia, tabla.c.modulo, tabla.c.concepto, tabla.c.metodo_pago],
+            set_={
+                "ingresos": tabla.c.ingresos + stmt.excluded.ingresos,
+                "egresos": tabla.c.egresos + stmt.excluded.egresos,
+                "cantidad": tabla.c.cantidad + stmt.excluded.cantidad,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        conexion.execute(stmt)
+
+
+# ==================== RECONSTRUCCIÓN ====================
+
+_SQL_RECONSTRUIR = """
+    INSERT INTO resumen_diario (dia, modulo, concepto, metodo_pago, ingresos, egresos, cantidad, updated_at)
+    SELECT dia, modulo, concepto, metodo_pago,
+           SUM(GREATEST(monto, 0)), SUM(GREATEST(-monto, 0)), COUNT(*), now() AT TIME ZONE 'UTC'
+    FROM (
+        SELECT (created_at AT TIME ZONE 'UTC' AT TIME ZONE :zona)::date AS dia,
+               'caja' AS modulo,
+               lower(tipo::text) AS concepto,
+               COALESCE(metodo_pago, '') AS metodo_pago,
+               monto
+        FROM movimientos_caja
+        WHERE created_at >= :desde AND created_at < :hasta
+        UNION ALL
+        SELECT (fecha_movimiento AT TIME ZONE 'UTC' AT TIME ZONE :zona)::date,
+               'tesoreria',
+               COALESCE(lower(CASE WHEN tipo = 'INGRESO' THEN categoria_ingreso::text
+                                   ELSE categoria_egreso::text END), 'sin_categoria'),
+               lower(metodo_pago::text),
+               monto
+        FROM movimientos_tesoreria
+        WHERE fecha_movimiento >= :desde AND fecha_movimiento < :hasta
+    ) m
+    GROUP BY dia, modulo, concepto, metodo_pago
+"""
+
+
+def reconstruir_resumen_diario(conexion, desde=None, hasta=None) -> int:
+    """
+    Recalcular el resumen desde los movimientos (días `desde` a `hasta`
+    inclusive, o todo el histórico). Bloquea la tabla durante la
+    reconstrucción para que ningún flush concurrente quede a medias.
+    Devuelve la cantidad de filas generadas.
+    """
+    from app.core.config import settings
+
+    conexion.execute(text("LOCK TABLE resumen_diario IN SHARE ROW EXCLUSIVE MODE"))
+
+    if desde and hasta:
+        inicio, fin = rango_dias(desde, hasta)
+        conexion.execute(
+            text("DELETE FROM resumen_diario WHERE dia >= :desde AND dia <= :hasta"),
+            {"desde": desde, "hasta": hasta}
+        )
+    else:
+        inicio, fin = datetime.min, datetime.max
+        conexion.execute(text("DELETE FROM resumen_diario"))
+
+    resultado = conexion.execute(
+        text(_SQL_RECONSTRUIR),
+        {"zona": settings.TIMEZONE, "desde": inicio, "hasta": fin}
+    )
+    return resultado.rowcount
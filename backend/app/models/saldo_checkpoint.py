@@ -0,0 +1,255 @@
+"""
+Modelo de Checkpoints de Saldo - Saldo acumulado al cierre de cada día
+
+Cada fila guarda el saldo de un módulo (caja / tesoreria) y método de pago
+al cierre de un día de negocio ya terminado. Un saldo "al día X" (o el
+actual) es el último checkpoint <= X más lo que resumen_diario acumuló
+después, así que no hace falta sumar todo el libro de movimientos.
+
+- generar_checkpoints() agrega los días cerrados que falten (al arrancar la
+  aplicación y con scripts/checkpoints_saldo.py desde un cron diario).
+- Si se registra, modifica o elimina un movimiento de un día que ya tiene
+  checkpoint, los checkpoints desde ese día se borran en la misma
+  transacción y se regeneran en la siguiente corrida.
+- scripts/checkpoints_saldo.py --verificar compara contra un recálculo
+  completo desde los movimientos.
+"""
+from sqlalchemy import Column, String, Numeric, Date, DateTime, delete, event, func, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from app.db.database import Base
+from app.models.caja import MovimientoCaja
+from app.models.tesoreria import MovimientoTesoreria
+from app.models.resumen_diario import ResumenDiario, _clave_y_monto, _cambio_relevante
+from app.utils.fechas import hoy_negocio, utcnow
+
+# Día anterior a cualquier movimiento (cuando aún no hay checkpoint)
+_SIN_CHECKPOINT = date(1900, 1, 1)
+
+_FILAS_POR_INSERT = 1000
+
+
+class SaldoCheckpoint(Base):
+    """Saldo acumulado al cierre de un día de negocio"""
+    __tablename__ = "saldos_checkpoint"
+
+    dia = Column(Date, primary_key=True)
+    modulo = Column(String(20), primary_key=True)       # caja / tesoreria (ModuloResumen)
+    metodo_pago = Column(String(50), primary_key=True)  # '' si el movimiento no tiene método
+    saldo = Column(Numeric(14, 2), nullable=False)
+
+    created_at = Column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SaldoCheckpoint {self.dia} {self.modulo}/{self.metodo_pago} ${self.saldo}>"
+
+
+# ==================== CONSULTAS DE SALDO ====================
+
+def _partes_saldo(modulo: str, hasta_dia: Optional[date]):
+    """Último checkpoint (<= hasta_dia) + netos diarios posteriores del resumen"""
+    ultimo = select(func.max(SaldoCheckpoint.dia)).where(SaldoCheckpoint.modulo == modulo)
+    if hasta_dia:
+        ultimo = ultimo.where(SaldoCheckpoint.dia <= hasta_dia)
+    ultimo = ultimo.scalar_subquery()
+
+    desde_checkpoint = select(
+        SaldoCheckpoint.metodo_pago,
+        SaldoCheckpoint.saldo.label("monto")
+    ).where(
+        SaldoCheckpoint.modulo == modulo,
+        SaldoCheckpoint.dia == ultimo
+    )
+
+    posteriores = select(
+        ResumenDiario.metodo_pago,
+        (ResumenDiario.ingresos - ResumenDiario.egresos).label("monto")
+    ).where(
+        ResumenDiario.modulo == modulo,
+        ResumenDiario.dia > func.coalesce(ultimo, _SIN_CHECKPOINT)
+    )
+    if hasta_dia:
+        posteriores = posteriores.where(ResumenDiario.dia <= hasta_dia)
+
+    # Sin correlación: expr_saldo se usa dentro de consultas que ya leen resumen_diario
+    return union_all(desde_checkpoint, posteriores.correlate(None)).subquery()
+
+
+def expr_saldo(modulo: str, hasta_dia: Optional[date] = None):
+    """
+    Subconsulta escalar con el saldo de un módulo al cierre de `hasta_dia`
+    (o el saldo actual). Sirve para incluirla en otra consulta.
+    """
+    partes = _partes_saldo(modulo, hasta_dia)
+    return select(func.coalesce(func.sum(partes.c.monto), 0)).scalar_subquery()
+
+
+def obtener_saldo(db, modulo: str, hasta_dia: Optional[date] = None) -> Decimal:
+    """Saldo de un módulo al cierre de `hasta_dia` (o el saldo actual)"""
+    return Decimal(db.execute(select(expr_saldo(modulo, hasta_dia))).scalar() or 0)
+
+
+def obtener_saldos_por_metodo(db, modulo: str, hasta_dia: Optional[date] = None) -> Dict[str, Decimal]:
+    """Saldo por método de pago de un módulo al cierre de `hasta_dia` (o actual)"""
+    partes = _partes_saldo(modulo, hasta_dia)
+    filas = db.execute(
+        select(partes.c.metodo_pago, func.sum(partes.c.monto))
+        .group_by(partes.c.metodo_pago)
+        .order_by(partes.c.metodo_pago)
+    )
+    return {metodo: Decimal(total or 0) for metodo, total in filas}
+
+
+# ==================== GENERACIÓN ====================
+
+def generar_checkpoints(conexion, hasta: Optional[date] = None) -> int:
+    """
+    Agregar los checkpoints que falten hasta `hasta` (por defecto ayer, el
+    último día cerrado). Bloquea la tabla para no cruzarse con una
+    invalidación concurrente. Devuelve la cantidad de filas insertadas.
+    """
+    hasta = hasta or hoy_negocio() - timedelta(days=1)
+    tabla = SaldoCheckpoint.__table__
+
+    conexion.execute(text("LOCK TABLE saldos_checkpoint IN SHARE ROW EXCLUSIVE MODE"))
+
+    ultimo = conexion.execute(select(func.max(tabla.c.dia))).scalar()
+    if ultimo and ultimo >= hasta:
+        return 0
+
+    saldos: Dict[tuple, Decimal] = {}
+    if ultimo:
+        for modulo, metodo, valor in conexion.execute(
+            select(tabla.c.modulo, tabla.c.metodo_pago, tabla.c.saldo).where(tabla.c.dia == ultimo)
+        ):
+            saldos[(modulo, metodo)] = valor
+
+    netos = conexion.execute(
+        select(
+            ResumenDiario.dia,
+            ResumenDiario.modulo,
+            ResumenDiario.metodo_pago,
+            func.sum(ResumenDiario.ingresos - ResumenDiario.egresos)
+        ).where(
+            ResumenDiario.dia > (ultimo or _SIN_CHECKPOINT),
+            ResumenDiario.dia <= hasta
+        ).group_by(
+            ResumenDiario.dia, ResumenDiario.modulo, ResumenDiario.metodo_pago
+        ).order_by(ResumenDiario.dia)
+    )
+
+    ahora = utcnow()
+    filas = []
+
+    def cerrar(dia: date):
+        # Todos los métodos conocidos de cada módulo quedan con checkpoint ese día
+        for (modulo, metodo), valor in saldos.items():
+            filas.append({
+                "dia": dia, "modulo": modulo, "metodo_pago": metodo,
+                "saldo": valor, "created_at": ahora
+            })
+
+    dia_actual = None
+    for dia, modulo, metodo, neto in netos:
+        if dia_actual is not None and dia != dia_actual:
+            cerrar(dia_actual)
+        dia_actual = dia
+        saldos[(modulo, metodo)] = saldos.get((modulo, metodo), Decimal(0)) + (neto or 0)
+    if dia_actual is not None:
+        cerrar(dia_actual)
+    if dia_actual != hasta:
+        cerrar(hasta)
+
+    for i in range(0, len(filas), _FILAS_POR_INSERT):
+        stmt = pg_insert(tabla).values(filas[i:i + _FILAS_POR_INSERT]).on_conflict_do_nothing()
+        conexion.execute(stmt)
+
+    return len(filas)
+
+
+def invalidar_checkpoints(conexion, desde: Optional[date] = None) -> None:
+    """Borrar los checkpoints desde `desde` (o todos); se regeneran en la siguiente corrida"""
+    stmt = delete(SaldoCheckpoint.__table__)
+    if desde:
+        stmt = stmt.where(SaldoCheckpoint.__table__.c.dia >= desde)
+    conexion.execute(stmt)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidar_por_movimientos_pasados(session, flush_context):
+    """
+    Si el flush toca movimientos de un día ya cerrado (fechas retroactivas,
+    correcciones), borrar los checkpoints desde ese día en la misma transacción.
+    """
+    tipos = (MovimientoCaja, MovimientoTesoreria)
+    dias = []
+
+    for movimiento in session.new:
+        if isinstance(movimiento, tipos):
+            dias.append(_clave_y_monto(movimiento)[0][0])
+
+    for movimiento in session.deleted:
+        if isinstance(movimiento, tipos):
+            dias.append(_clave_y_monto(movimiento, anterior=True)[0][0])
+
+    for movimiento in session.dirty:
+        if isinstance(movimiento, tipos) and _cambio_relevante(movimiento):
+            dias.append(_clave_y_monto(movimiento, anterior=True)[0][0])
+            dias.append(_clave_y_monto(movimiento)[0][0])
+
+    # Solo hay checkpoints de días cerrados: los movimientos de hoy no invalidan nada
+    if dias and min(dias) < hoy_negocio():
+        invalidar_checkpoints(session.connection(), min(dias))
+
+
+# ==================== VERIFICACIÓN ====================
+
+# Saldos de cada checkpoint recalculados desde todos los movimientos (sin
+# pasar por resumen_diario). Devuelve solo las filas que no coinciden.
+_SQL_VERIFICAR = """
+WITH netos AS (
+    SELECT (created_at AT TIME ZONE 'UTC' AT TIME ZONE :zona)::date AS dia,
+           'caja' AS modulo,
+           COALESCE(metodo_pago, '') AS metodo_pago,
+           SUM(monto) AS neto
+    FROM movimientos_caja
+    GROUP BY 1, 2, 3
+    UNION ALL
+    SELECT (fecha_movimiento AT TIME ZONE 'UTC' AT TIME ZONE :zona)::date,
+           'tesoreria',
+           lower(metodo_pago::text),
+           SUM(monto)
+    FROM movimientos_tesoreria
+    GROUP BY 1, 2, 3
+),
+dias AS (
+    SELECT DISTINCT dia, modulo FROM saldos_checkpoint
+),
+recalculado AS (
+    SELECT d.dia, d.modulo, n.metodo_pago, SUM(n.neto) AS saldo
+    FROM dias d
+    JOIN netos n ON n.modulo = d.modulo AND n.dia <= d.dia
+    GROUP BY d.dia, d.modulo, n.metodo_pago
+)
+SELECT COALESCE(c.dia, r.dia) AS dia,
+       COALESCE(c.modulo, r.modulo) AS modulo,
+       COALESCE(c.metodo_pago, r.metodo_pago) AS metodo_pago,
+       c.saldo AS saldo_checkpoint,
+       r.saldo AS saldo_recalculado
+FROM saldos_checkpoint c
+FULL OUTER JOIN recalculado r
+  ON r.dia = c.dia AND r.modulo = c.modulo AND r.metodo_pago = c.metodo_pago
+WHERE COALESCE(c.saldo, 0) <> COALESCE(r.saldo, 0)
+ORDER BY 1, 2, 3
+"""
+
+
+def verificar_checkpoints(conexion) -> list:
+    """Checkpoints que no coinciden con el recálculo completo (vacío si todo cuadra)"""
+    from app.core.config import settings
+
+    return conexion.execute(text(_SQL_VERIFICAR), {"zona": settings.TIMEZONE}).all()
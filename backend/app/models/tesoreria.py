@@ -1,14 +1,14 @@
 """
 Modelos de Tesorería (Caja Fuerte)
 """
-from sqlalchemy import Column, String, Numeric, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, String, Numeric, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
 import uuid
 import enum
 
 from app.db.database import Base
+from app.utils.fechas import utcnow
 
 
 class TipoMovimientoTesoreria(str, enum.Enum):
@@ -70,8 +70,8 @@ class MovimientoTesoreria(Base):
     numero_comprobante = Column(String(50), nullable=True)  # Número de factura, cheque, etc.
     
     # Auditoría
-    fecha_movimiento = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    fecha_movimiento = Column(DateTime, default=utcnow, nullable=False)
+    created_at = Column(DateTime, default=utcnow)
     created_by = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=False)
     
     # Relaciones
@@ -79,6 +79,12 @@ class MovimientoTesoreria(Base):
     usuario = relationship("Usuario", foreign_keys=[created_by])
     desglose_efectivo = relationship("DesgloseEfectivoTesoreria", back_populates="movimiento", uselist=False)
     
+    # Índices (ver migrations/add_indices_ledger.sql y add_indices_keyset.sql)
+    __table_args__ = (
+        Index('idx_movimientos_tesoreria_fecha_id', fecha_movimiento, id),
+        Index('idx_movimientos_tesoreria_metodo_fecha', metodo_pago, fecha_movimiento),
+    )
+    
     def __repr__(self):
         signo = "+" if self.monto >= 0 else "-"
         return f"<MovimientoTesoreria {self.tipo} {signo}${abs(self.monto)}>"
@@ -108,7 +114,7 @@ class DesgloseEfectivoTesoreria(Base):
     monedas_50 = Column(Numeric(10, 0), default=0, nullable=False)
     
     # Auditoría
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
     
     # Relación
     movimiento = relationship("MovimientoTesoreria", back_populates="desglose_efectivo")
@@ -149,7 +155,7 @@ class ConfiguracionTesoreria(Base):
     email_notificacion = Column(String(200), nullable=True)
     
     # Última actualización
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     updated_by = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"))
     
     # Relación
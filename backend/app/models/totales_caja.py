@@ -0,0 +1,191 @@
+"""
+Totales acumulados de cada caja (columnas total_* de cajas)
+
+Se mantienen incrementalmente en el mismo flush (y por lo tanto en la misma
+transacción) que inserta, modifica o elimina movimientos de caja, incluidos
+los que reescribe cambiar_metodo_pago. Así el cierre y el resumen de una
+caja leen una fila en lugar de recorrer todos sus movimientos.
+
+- El UPDATE de cada caja toma el lock de su fila: cerrar_caja la bloquea
+  (FOR UPDATE) y no puede cruzarse con un cobro concurrente.
+- scripts/totales_caja.py --verificar compara las columnas contra los
+  movimientos; sin argumentos las recalcula.
+"""
+from sqlalchemy import event, inspect, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from decimal import Decimal
+from typing import Dict
+
+from app.models.caja import Caja, MovimientoCaja, TipoMovimiento
+from app.models.resumen_diario import _valor
+
+# Atributos de un movimiento que cambian los totales de su caja
+_CAMPOS = ("caja_id", "tipo", "metodo_pago", "monto", "ingresa_efectivo")
+
+# Columna del total por método de pago (metodo_pago en minúsculas)
+COLUMNAS_METODO = {
+    "efectivo": "total_efectivo",
+    "tarjeta_debito": "total_tarjeta_debito",
+    "tarjeta_credito": "total_tarjeta_credito",
+    "transferencia": "total_transferencia",
+    "credismart": "total_credismart",
+    "sistecredito": "total_sistecredito",
+}
+
+COLUMNAS_TOTALES = (
+    "total_ingresos",
+    "total_ingresos_efectivo",
+    "total_egresos",
+    "total_rtm",
+    "total_comision_soat",
+) + tuple(COLUMNAS_METODO.values())
+
+
+def _aportes(movimiento, anterior: bool = False):
+    """Caja del movimiento y lo que suma a cada columna de totales"""
+    caja_id = _valor(movimiento, "caja_id", anterior)
+    monto = Decimal(str(_valor(movimiento, "monto", anterior) or 0))
+    aportes = {}
+
+    if monto > 0:
+        aportes["total_ingresos"] = monto
+        if _valor(movimiento, "ingresa_efectivo", anterior):
+            aportes["total_ingresos_efectivo"] = monto
+
+        tipo = _valor(movimiento, "tipo", anterior)
+        if tipo == TipoMovimiento.RTM:
+            aportes["total_rtm"] = monto
+        elif tipo == TipoMovimiento.COMISION_SOAT:
+            aportes["total_comision_soat"] = monto
+
+        metodo = (_valor(movimiento, "metodo_pago", anterior) or "").lower()
+        if metodo in COLUMNAS_METODO:
+            aportes[COLUMNAS_METODO[metodo]] = monto
+    else:
+        aportes["total_egresos"] = abs(monto)
+
+    return caja_id, aportes
+
+
+def _acumular(deltas: Dict, movimiento, signo: int, anterior: bool = False):
+    caja_id, aportes = _aportes(movimiento, anterior)
+    if caja_id is None:
+        return
+    totales = deltas.setdefault(caja_id, {})
+    for columna, monto in aportes.items():
+        totales[columna] = totales.get(columna, Decimal(0)) + signo * monto
+
+
+def _cambio_relevante(movimiento) -> bool:
+    """True si el flush modifica algún campo que afecta los totales"""
+    estado = inspect(movimiento)
+    return any(estado.attrs[campo].history.has_changes() for campo in _CAMPOS)
+
+
+@event.listens_for(Session, "after_flush")
+def _actualizar_totales_caja(session, flush_context):
+    """
+    Aplicar a los totales de cada caja los movimientos insertados,
+    modificados o eliminados en este flush.
+    """
+    deltas: Dict = {}
+
+    for movimiento in session.new:
+        if isinstance(movimiento, MovimientoCaja):
+            _acumular(deltas, movimiento, 1)
+
+    for movimiento in session.deleted:
+        if isinstance(movimiento, MovimientoCaja):
+            _acumular(deltas, movimiento, -1, anterior=True)
+
+    for movimiento in session.dirty:
+        if isinstance(movimiento, MovimientoCaja) and _cambio_relevante(movimiento):
+            _acumular(deltas, movimiento, -1, anterior=True)
+            _acumular(deltas, movimiento, 1)
+
+    if not deltas:
+        return
+
+    tabla = Caja.__table__
+    conexion = session.connection()
+    cajas_en_sesion = {
+        objeto.id: objeto for objeto in session.identity_map.values() if isinstance(objeto, Caja)
+    }
+
+    # Orden fijo de cajas para que dos transacciones concurrentes no se bloqueen mutuamente
+    for caja_id in sorted(deltas, key=str):
+        cambios = {columna: monto for columna, monto in deltas[caja_id].items() if monto}
+        if not cambios:
+            continue
+        stmt = (
+            update(tabla)
+            .where(tabla.c.id == caja_id)
+            .values({columna: tabla.c[columna] + monto for columna, monto in cambios.items()})
+            .returning(*[tabla.c[columna] for columna in cambios])
+        )
+        fila = conexion.execute(stmt).first()
+
+        # La Caja cargada en la sesión refleja el valor nuevo sin otra consulta
+        caja = cajas_en_sesion.get(caja_id)
+        if caja is not None and fila is not None:
+            for columna, valor in zip(cambios, fila):
+                set_committed_value(caja, columna, valor)
+
+
+# ==================== VERIFICACIÓN Y RECÁLCULO ====================
+
+# Totales de cada caja calculados desde sus movimientos (misma clasificación que _aportes)
+_SQL_CALCULADOS = """
+SELECT c.id AS caja_id,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0), 0) AS total_ingresos,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND m.ingresa_efectivo), 0) AS total_ingresos_efectivo,
+       COALESCE(SUM(-m.monto) FILTER (WHERE m.monto <= 0), 0) AS total_egresos,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND m.tipo = 'RTM'), 0) AS total_rtm,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND m.tipo = 'COMISION_SOAT'), 0) AS total_comision_soat,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'efectivo'), 0) AS total_efectivo,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'tarjeta_debito'), 0) AS total_tarjeta_debito,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'tarjeta_credito'), 0) AS total_tarjeta_credito,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'transferencia'), 0) AS total_transferencia,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'credismart'), 0) AS total_credismart,
+       COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'sistecredito'), 0) AS total_sistecredito
+FROM cajas c
+LEFT JOIN movimientos_caja m ON m.caja_id = c.id
+GROUP BY c.id
+"""
+
+
+def verificar_totales_caja(conexion) -> list:
+    """
+    Cajas cuyas columnas no coinciden con sus movimientos (vacío si todo
+    cuadra). Cada elemento es (caja_id, columna, valor_tabla, valor_calculado).
+    """
+    columnas = ", ".join(f"c.{columna}" for columna in COLUMNAS_TOTALES)
+    calculados = conexion.execute(text(_SQL_CALCULADOS)).mappings().all()
+    actuales = {
+        fila.id: fila for fila in conexion.execute(text(f"SELECT c.id, {columnas} FROM cajas c"))
+    }
+
+    diferencias = []
+    for calculado in calculados:
+        actual = actuales.get(calculado["caja_id"])
+        for columna in COLUMNAS_TOTALES:
+            valor = getattr(actual, columna) if actual is not None else None
+            if valor != calculado[columna]:
+                diferencias.append((calculado["caja_id"], columna, valor, calculado[columna]))
+    return diferencias
+
+
+def reconstruir_totales_caja(conexion) -> int:
+    """
+    Recalcular las columnas de todas las cajas desde sus movimientos.
+    Bloquea las cajas durante el recálculo para que ningún flush concurrente
+    quede a medias. Devuelve la cantidad de cajas actualizadas.
+    """
+    conexion.execute(text("LOCK TABLE cajas IN SHARE ROW EXCLUSIVE MODE"))
+
+    asignaciones = ", ".join(f"{columna} = t.{columna}" for columna in COLUMNAS_TOTALES)
+    resultado = conexion.execute(text(
+        f"UPDATE cajas SET {asignaciones} FROM ({_SQL_CALCULADOS}) t WHERE cajas.id = t.caja_id"
+    ))
+    return resultado.rowcount
@@ -4,11 +4,11 @@ Modelo de Usuario
 from sqlalchemy import Column, String, Boolean, DateTime, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
 import uuid
 import enum
 
 from app.db.database import Base
+from app.utils.fechas import utcnow
 
 
 class RolEnum(str, enum.Enum):
@@ -31,8 +31,8 @@ class Usuario(Base):
     activo = Column(Boolean, default=True, nullable=False)
     
     # Auditoría
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow, nullable=False)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     # Relaciones
     reset_tokens = relationship("PasswordResetToken", back_populates="usuario", cascade="all, delete-orphan")
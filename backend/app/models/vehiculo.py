@@ -1,14 +1,15 @@
 """
 Modelo de Vehículos en Proceso
 """
-from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
+from datetime import datetime
 import uuid
 import enum
 
 from app.db.database import Base
+from app.utils.fechas import utcnow
 
 
 class EstadoVehiculo(str, enum.Enum):
@@ -78,13 +79,22 @@ class VehiculoProceso(Base):
     caja_id = Column(UUID(as_uuid=True), ForeignKey("cajas.id"), nullable=True)
     registrado_por = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=False)
     cobrado_por = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=True)
-    fecha_registro = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    fecha_registro = Column(DateTime, default=utcnow, nullable=False)
     
     # Relaciones
     caja = relationship("Caja", back_populates="vehiculos")
     registrador = relationship("Usuario", foreign_keys=[registrado_por])
     cajero = relationship("Usuario", foreign_keys=[cobrado_por])
     
+    # Índices (ver migrations/add_indices_ledger.sql y add_indices_keyset.sql)
+    __table_args__ = (
+        Index('idx_vehiculos_pendientes', fecha_registro, postgresql_where=(estado == EstadoVehiculo.REGISTRADO)),
+        Index('idx_vehiculos_estado_fecha_registro', estado, fecha_registro),
+        Index('idx_vehiculos_fecha_registro_id', fecha_registro, id),
+        Index('idx_vehiculos_caja_estado', caja_id, estado),
+        Index('idx_vehiculos_fecha_pago', fecha_pago),
+    )
+    
     def __repr__(self):
         return f"<VehiculoProceso {self.placa} - {self.estado}>"
     
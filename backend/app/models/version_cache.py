@@ -0,0 +1,51 @@
+"""
+Modelo de Versiones de Cache - Contadores para invalidar caches entre workers
+
+Cada proceso guarda en memoria datos que cambian poco (tarifas, comisiones).
+Quien los modifica incrementa el contador en la misma transacción del cambio;
+los demás workers comparan su versión con la de la base de datos y recargan
+si quedó atrás.
+"""
+from sqlalchemy import Column, String, BigInteger, DateTime, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.database import Base
+from app.utils.fechas import utcnow
+
+# Nombres de los contadores
+VERSION_TARIFAS = "tarifas"
+VERSION_USUARIOS = "usuarios"
+
+
+class VersionCache(Base):
+    """Versión actual de un conjunto de datos cacheados en memoria"""
+    __tablename__ = "versiones_cache"
+
+    nombre = Column(String(50), primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<VersionCache {self.nombre}={self.version}>"
+
+
+def select_version(nombre: str):
+    """Consulta de la versión actual (None si el contador aún no existe)"""
+    return select(VersionCache.version).where(VersionCache.nombre == nombre)
+
+
+def incrementar_version(db, nombre: str):
+    """
+    Incrementar el contador dentro de la transacción actual.
+    Llamar antes del commit que guarda el cambio de los datos cacheados.
+    """
+    tabla = VersionCache.__table__
+    stmt = pg_insert(tabla).values(nombre=nombre, version=1, updated_at=utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.nombre],
+        set_={
+            "version": tabla.c.version + 1,
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+    db.execute(stmt)
@@ -4,7 +4,7 @@ Schemas de Tesorería
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from decimal import Decimal
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 
@@ -94,6 +94,15 @@ class MovimientoTesoreriaResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PuntoSerieTesoreria(BaseModel):
+    """Totales de un día, semana (desde el lunes) o mes de la serie"""
+    periodo: date  # Primer día del período
+    ingresos: Decimal
+    egresos: Decimal
+    neto: Decimal
+    cantidad: int
+
+
 class ResumenTesoreria(BaseModel):
     """Resumen de tesorería en un período"""
     saldo_actual: Decimal
@@ -108,6 +117,9 @@ class ResumenTesoreria(BaseModel):
     # Alertas
     saldo_bajo_umbral: bool
     umbral_minimo: Decimal
+    
+    # Serie por día / semana / mes (solo si se pide con ?serie=)
+    serie: Optional[List[PuntoSerieTesoreria]] = None
 
 
 class ProyeccionFlujo(BaseModel):
@@ -148,3 +160,4 @@ class EstadisticasTesoreria(BaseModel):
     movimientos_count: int
     categoria_mas_egreso: Optional[str]
     monto_categoria_mas_egreso: Optional[Decimal]
+    serie: Optional[List[PuntoSerieTesoreria]] = None
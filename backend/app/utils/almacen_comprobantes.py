@@ -0,0 +1,190 @@
+"""
+Almacén de comprobantes PDF en disco (direccionado por contenido)
+
+Un cierre de caja o un egreso registrado no cambia, así que cada comprobante
+se genera una sola vez y las descargas siguientes se sirven desde el archivo
+(FileResponse usa sendfile) con ETag; si el navegador ya lo tiene responde
+304 sin cuerpo.
+
+El archivo se llama <entidad_id>-<huella>.pdf, donde la huella es un hash de
+todos los datos que se imprimen (más VERSION_PLANTILLAS). Si se edita algo
+que sale en el comprobante (el movimiento, el nombre del cajero...) cambia
+la huella: se genera un archivo nuevo y se borran los anteriores de esa
+entidad. Además, al confirmar una transacción que modifica o elimina una
+caja o un movimiento de tesorería se borran sus comprobantes guardados.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from fastapi import Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Subir cuando cambie el diseño de los PDF para no servir los generados con el anterior
+VERSION_PLANTILLAS = 2
+
+TIPO_CIERRE_CAJA = "cierre_caja"
+TIPO_EGRESO = "egreso"
+
+# Generador de cada tipo ("modulo:funcion", se importa recién en el pool de render_pdf)
+GENERADORES = {
+    TIPO_CIERRE_CAJA: "app.utils.comprobantes_caja:generar_comprobante_cierre_caja",
+    TIPO_EGRESO: "app.utils.comprobantes:generar_comprobante_egreso",
+}
+
+
+@dataclass(frozen=True)
+class ComprobanteGuardado:
+    """Archivo de un comprobante ya generado"""
+    ruta: Path
+    etag: str
+
+
+class AlmacenComprobantes:
+    """Comprobantes generados, un directorio por tipo de documento"""
+
+    def __init__(self, directorio: str):
+        self.directorio = Path(directorio)
+
+    @staticmethod
+    def huella(datos: dict) -> str:
+        """Hash de los datos que se imprimen en el comprobante"""
+        contenido = json.dumps(
+            {"version": VERSION_PLANTILLAS, "datos": datos},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()[:32]
+
+    def _carpeta(self, tipo: str) -> Path:
+        return self.directorio / tipo
+
+    def guardado(self, tipo: str, entidad_id, datos: dict) -> Optional[ComprobanteGuardado]:
+        """Comprobante ya generado con estos datos, o None si hay que generarlo"""
+        huella = self.huella(datos)
+        ruta = self._carpeta(tipo) / f"{entidad_id}-{huella}.pdf"
+        return ComprobanteGuardado(ruta=ruta, etag=f'"{huella}"') if ruta.exists() else None
+
+    def obtener(
+        self,
+        tipo: str,
+        entidad_id,
+        datos: dict,
+        generar: Callable[[], bytes]
+    ) -> ComprobanteGuardado:
+        """
+        Comprobante de la entidad con estos datos; lo genera con `generar()`
+        (bytes del PDF) solo si no está en disco.
+        """
+        huella = self.huella(datos)
+        carpeta = self._carpeta(tipo)
+        ruta = carpeta / f"{entidad_id}-{huella}.pdf"
+
+        if not ruta.exists():
+            carpeta.mkdir(parents=True, exist_ok=True)
+            contenido = generar()
+
+            # Escritura atómica: otro worker nunca ve un PDF a medias
+            descriptor, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as archivo:
+                    archivo.write(contenido)
+                os.replace(temporal, ruta)
+            except BaseException:
+                if os.path.exists(temporal):
+                    os.unlink(temporal)
+                raise
+
+            # Versiones anteriores de la misma entidad
+            for anterior in carpeta.glob(f"{entidad_id}-*.pdf"):
+                if anterior != ruta:
+                    anterior.unlink(missing_ok=True)
+
+        return ComprobanteGuardado(ruta=ruta, etag=f'"{huella}"')
+
+    def invalidar(self, tipo: str, entidad_id) -> None:
+        """Borrar los comprobantes guardados de una entidad"""
+        for archivo in self._carpeta(tipo).glob(f"{entidad_id}-*.pdf"):
+            archivo.unlink(missing_ok=True)
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """True si el encabezado If-None-Match incluye el ETag (o es '*')"""
+    if not if_none_match:
+        return False
+    for valor in if_none_match.split(","):
+        valor = valor.strip()
+        if valor.startswith("W/"):
+            valor = valor[2:]
+        if valor == "*" or valor == etag:
+            return True
+    return False
+
+
+def respuesta_comprobante(
+    comprobante: ComprobanteGuardado,
+    nombre_archivo: str,
+    if_none_match: Optional[str] = None
+) -> Response:
+    """FileResponse del comprobante, o 304 si el cliente ya tiene esta versión"""
+    headers = {
+        "ETag": comprobante.etag,
+        # Documento privado: el navegador lo guarda pero revalida con If-None-Match
+        "Cache-Control": "private, no-cache",
+    }
+    if _etag_coincide(if_none_match, comprobante.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        comprobante.ruta,
+        media_type="application/pdf",
+        filename=nombre_archivo,
+        headers=headers
+    )
+
+
+# Instancia global (un directorio compartido por todos los workers)
+almacen_comprobantes = AlmacenComprobantes(settings.COMPROBANTES_DIR)
+
+
+# ==================== INVALIDACIÓN POR EDICIÓN ====================
+
+@event.listens_for(Session, "after_flush")
+def _anotar_comprobantes_modificados(session, flush_context):
+    """Anotar cajas y movimientos de tesorería modificados o eliminados en este flush"""
+    from app.models.caja import Caja
+    from app.models.tesoreria import MovimientoTesoreria
+
+    pendientes = session.info.setdefault("comprobantes_invalidar", set())
+    for objeto in list(session.dirty) + list(session.deleted):
+        if isinstance(objeto, Caja):
+            pendientes.add((TIPO_CIERRE_CAJA, objeto.id))
+        elif isinstance(objeto, MovimientoTesoreria):
+            pendientes.add((TIPO_EGRESO, objeto.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_comprobantes(session):
+    """Borrar los comprobantes anotados una vez confirmada la transacción"""
+    pendientes = session.info.pop("comprobantes_invalidar", None)
+    for tipo, entidad_id in pendientes or ():
+        try:
+            almacen_comprobantes.invalidar(tipo, entidad_id)
+        except OSError:
+            logger.exception("No se pudo borrar el comprobante %s %s", tipo, entidad_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_comprobantes(session):
+    session.info.pop("comprobantes_invalidar", None)
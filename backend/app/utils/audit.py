@@ -1,12 +1,159 @@
 """
 Utilidades para Auditoría
+
+Los registros se encolan en memoria y un hilo en segundo plano los inserta
+por lotes, así los endpoints no esperan un segundo commit después de la
+transacción de negocio. Si el escritor no está corriendo (scripts) o la cola
+está llena, el registro se guarda de forma síncrona como antes.
 """
-from typing import Optional, Dict, Any
+import logging
+import queue
+import threading
+import uuid
+from typing import Optional, Dict, Any, List
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from fastapi import Request
 
+from app.core.config import settings
+from app.db.database import SessionLocal
 from app.models.audit_log import AuditLog, AuditAction
 from app.models.usuario import Usuario
+from app.utils.fechas import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== ESCRITOR EN SEGUNDO PLANO ====================
+
+class EscritorAuditoria:
+    """Cola acotada de registros de auditoría + hilo que los inserta por lotes"""
+
+    _FIN = object()
+
+    def __init__(self, maximo_cola: int, lote_maximo: int, intervalo: float):
+        self._cola: "queue.Queue" = queue.Queue(maxsize=maximo_cola)
+        self._lote_maximo = lote_maximo
+        self._intervalo = intervalo
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self) -> None:
+        """Arrancar el hilo escritor (startup de la aplicación)"""
+        if self.activo:
+            return
+        self._hilo = threading.Thread(target=self._ejecutar, name="escritor-auditoria", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float = 10.0) -> None:
+        """Escribir lo pendiente y detener el hilo (shutdown de la aplicación)"""
+        if not self.activo:
+            return
+        self._cola.put(self._FIN)
+        self._hilo.join(timeout)
+        self._hilo = None
+
+    def encolar(self, registro: Dict[str, Any]) -> bool:
+        """Encolar un registro; False si el escritor no corre o la cola está llena"""
+        if not self.activo:
+            return False
+        try:
+            self._cola.put_nowait(registro)
+            return True
+        except queue.Full:
+            return False
+
+    def _ejecutar(self) -> None:
+        terminar = False
+        while not terminar:
+            try:
+                primero = self._cola.get(timeout=self._intervalo)
+            except queue.Empty:
+                continue
+
+            lote: List[Dict[str, Any]] = []
+            siguiente = primero
+            while True:
+                if siguiente is self._FIN:
+                    terminar = True
+                else:
+                    lote.append(siguiente)
+                if len(lote) >= self._lote_maximo:
+                    break
+                try:
+                    siguiente = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+
+            if lote:
+                self._escribir(lote)
+
+        # Lo que haya quedado detrás del marcador de fin
+        pendientes = []
+        while True:
+            try:
+                registro = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if registro is not self._FIN:
+                pendientes.append(registro)
+        if pendientes:
+            self._escribir(pendientes)
+
+    def _escribir(self, lote: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), lote)
+            db.commit()
+            return
+        except Exception:
+            db.rollback()
+            logger.exception("No se pudo guardar un lote de %d registros de auditoría; reintentando uno por uno", len(lote))
+        finally:
+            db.close()
+
+        self._escribir_uno_por_uno(lote)
+
+    def _escribir_uno_por_uno(self, lote: List[Dict[str, Any]]) -> None:
+        """Un savepoint por registro: solo se pierden los que vuelven a fallar"""
+        db = SessionLocal()
+        perdidos = []
+        try:
+            for registro in lote:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(AuditLog), [registro])
+                except Exception as e:
+                    perdidos.append(registro)
+                    # Solo el error del driver: el de SQLAlchemy repite la sentencia y los parámetros
+                    motivo = str(getattr(e, "orig", e)).strip().splitlines()[0]
+                    logger.error("Registro de auditoría perdido (%s): %s", motivo, registro)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("No se pudo guardar ningún registro del lote de %d", len(lote))
+            for registro in lote:
+                if registro not in perdidos:
+                    logger.error("Registro de auditoría perdido: %s", registro)
+            return
+        finally:
+            db.close()
+
+        if perdidos:
+            logger.warning("Auditoría: %d de %d registros del lote guardados", len(lote) - len(perdidos), len(lote))
+
+
+escritor_auditoria = EscritorAuditoria(
+    settings.AUDITORIA_COLA_MAXIMO,
+    settings.AUDITORIA_LOTE_MAXIMO,
+    settings.AUDITORIA_INTERVALO_SEGUNDOS
+)
+
+
+# ==================== REGISTROS ====================
 
 
 def create_audit_log(
@@ -33,7 +180,7 @@ def create_audit_log(
         error_message: Mensaje de error si aplica
     
     Returns:
-        AuditLog: El registro creado
+        AuditLog: El registro creado (puede estar aún en la cola de escritura)
     """
     # Extraer información del request
     ip_address = None
@@ -49,8 +196,10 @@ def create_audit_log(
         
         user_agent = request.headers.get("User-Agent")
     
-    # Crear registro
-    audit_log = AuditLog(
+    # Crear registro (id y fecha se fijan aquí, no al insertar el lote)
+    registro = dict(
+        id=uuid.uuid4(),
+        created_at=utcnow(),
         action=action.value if hasattr(action, 'value') else action,
         description=description,
         usuario_id=usuario.id if usuario else None,
@@ -64,8 +213,12 @@ def create_audit_log(
         error_message=error_message
     )
     
-    db.add(audit_log)
-    db.commit()
+    audit_log = AuditLog(**registro)
+    
+    # Escritura en segundo plano; síncrona si la cola está llena o no hay escritor
+    if not escritor_auditoria.encolar(registro):
+        db.add(audit_log)
+        db.commit()
     
     return audit_log
 
@@ -0,0 +1,126 @@
+"""
+Cache de usuarios autenticados (TTL + LRU por id)
+
+get_current_user corre en cada request autenticado; sin cache es la consulta
+más frecuente del sistema. Se guarda una copia inmutable del usuario (sin el
+hash de la contraseña) por USUARIOS_CACHE_TTL_SEGUNDOS, con un máximo de
+USUARIOS_CACHE_MAXIMO entradas (se descarta la menos usada).
+
+Invalidación:
+- usuarios.py y auth.py sacan al usuario del cache de este worker después
+  del commit de cualquier cambio (edición, estado, contraseña, eliminación).
+- Además incrementan el contador 'usuarios' de versiones_cache; los demás
+  workers lo revisan como máximo cada USUARIOS_VERIFICACION_SEGUNDOS y
+  vacían su cache si cambió.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.models.usuario import Usuario, RolEnum
+from app.models.version_cache import VERSION_USUARIOS, select_version
+
+
+@dataclass(frozen=True)
+class UsuarioAutenticado:
+    """Copia inmutable de los datos del usuario que usan los endpoints"""
+    id: UUID
+    email: str
+    nombre_completo: str
+    rol: RolEnum
+    activo: bool
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def desde_modelo(cls, usuario: Usuario) -> "UsuarioAutenticado":
+        return cls(
+            id=usuario.id,
+            email=usuario.email,
+            nombre_completo=usuario.nombre_completo,
+            rol=usuario.rol,
+            activo=usuario.activo,
+            created_at=usuario.created_at,
+            updated_at=usuario.updated_at
+        )
+
+
+class CacheUsuarios:
+    """Cache por proceso de usuarios autenticados, sincronizado por versión"""
+
+    def __init__(self, ttl: float, maximo: int, intervalo_verificacion: float):
+        self._ttl = ttl
+        self._maximo = maximo
+        self._intervalo = intervalo_verificacion
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[UUID, Tuple[float, UsuarioAutenticado]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._verificado_en = 0.0
+
+    def obtener(self, user_id: UUID) -> Optional[UsuarioAutenticado]:
+        """Usuario en cache o None si no está o ya expiró"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(user_id)
+            if entrada is None:
+                return None
+            expira_en, usuario = entrada
+            if ahora >= expira_en:
+                del self._entradas[user_id]
+                return None
+            self._entradas.move_to_end(user_id)
+            return usuario
+
+    def guardar(self, usuario: Usuario) -> UsuarioAutenticado:
+        """Guardar una copia del usuario y devolverla"""
+        copia = UsuarioAutenticado.desde_modelo(usuario)
+        with self._lock:
+            self._entradas[copia.id] = (time.monotonic() + self._ttl, copia)
+            self._entradas.move_to_end(copia.id)
+            while len(self._entradas) > self._maximo:
+                self._entradas.popitem(last=False)
+        return copia
+
+    def invalidar(self, user_id: UUID) -> None:
+        """Sacar a un usuario del cache (llamar después del commit del cambio)"""
+        with self._lock:
+            self._entradas.pop(user_id, None)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def _debe_verificar(self) -> bool:
+        return time.monotonic() - self._verificado_en >= self._intervalo
+
+    def _aplicar_version(self, version: int) -> None:
+        with self._lock:
+            if version != self._version:
+                self._entradas.clear()
+                self._version = version
+            self._verificado_en = time.monotonic()
+
+    def sincronizar(self, db) -> None:
+        """
+        Vaciar el cache si otro worker modificó usuarios (sesión síncrona).
+        Dentro del intervalo de verificación no consulta la base de datos.
+        """
+        if self._debe_verificar():
+            self._aplicar_version(db.execute(select_version(VERSION_USUARIOS)).scalar() or 0)
+
+    async def sincronizar_async(self, db) -> None:
+        """Igual que sincronizar() pero con AsyncSession"""
+        if self._debe_verificar():
+            self._aplicar_version((await db.execute(select_version(VERSION_USUARIOS))).scalar() or 0)
+
+
+cache_usuarios = CacheUsuarios(
+    settings.USUARIOS_CACHE_TTL_SEGUNDOS,
+    settings.USUARIOS_CACHE_MAXIMO,
+    settings.USUARIOS_VERIFICACION_SEGUNDOS
+)
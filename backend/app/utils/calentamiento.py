@@ -0,0 +1,67 @@
+"""
+Calentamiento del worker antes de aceptar tráfico
+
+Uvicorn no abre el socket del worker hasta que terminan los eventos de
+startup, así que lo que se haga aquí lo paga el arranque y no el primer
+request de cada cliente:
+- abrir las conexiones de ambos pools (handshake TCP/TLS y autenticación)
+- cargar el motor de tarifas y los usuarios activos en el cache de usuarios
+"""
+import asyncio
+import time
+
+from sqlalchemy import select, text
+
+from app.core.config import settings
+from app.models.usuario import Usuario
+from app.utils.cache_usuarios import cache_usuarios
+from app.utils.motor_tarifas import motor_tarifas
+
+
+def calentar_pool(engine, conexiones: int) -> None:
+    """Abrir `conexiones` conexiones del pool síncrono y devolverlas"""
+    abiertas = []
+    try:
+        for _ in range(conexiones):
+            conexion = engine.connect()
+            abiertas.append(conexion)
+            conexion.execute(text("SELECT 1"))
+    finally:
+        for conexion in abiertas:
+            conexion.close()
+
+
+async def calentar_pool_async(async_engine, conexiones: int) -> None:
+    """Abrir `conexiones` conexiones del pool asíncrono en paralelo y devolverlas"""
+    abiertas = []
+
+    async def abrir():
+        conexion = await async_engine.connect()
+        abiertas.append(conexion)
+        await conexion.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*(abrir() for _ in range(conexiones)))
+    finally:
+        for conexion in abiertas:
+            await conexion.close()
+
+
+def calentar_caches(db) -> None:
+    """Cargar tarifas y usuarios activos en los caches en memoria del worker"""
+    motor_tarifas.obtener(db)
+    cache_usuarios.sincronizar(db)
+    usuarios = db.execute(
+        select(Usuario).where(Usuario.activo == True).limit(settings.USUARIOS_CACHE_MAXIMO)
+    ).scalars()
+    for usuario in usuarios:
+        cache_usuarios.guardar(usuario)
+
+
+def calentar_worker(engine, session_factory) -> float:
+    """Pool síncrono y caches; devuelve los segundos que tomó"""
+    inicio = time.perf_counter()
+    calentar_pool(engine, settings.DB_POOL_SIZE)
+    with session_factory() as db:
+        calentar_caches(db)
+    return time.perf_counter() - inicio
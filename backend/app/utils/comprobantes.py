@@ -1,17 +1,142 @@
 """
 Utilidad para generar comprobantes de egreso en PDF
 """
-from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
 from io import BytesIO
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
-import os
+
+from app.utils.plantillas_pdf import (
+    AZUL_MARINO,
+    BORDE,
+    BORDE_SUAVE,
+    FONDO_VALOR,
+    FONDO_ETIQUETA,
+    FONDO_AMARILLO,
+    ROJO,
+    Encabezado,
+    construir_pdf,
+    estilo_parrafo
+)
+
+
+# ==================== PLANTILLA (se arma una vez por proceso) ====================
+
+ENCABEZADO = Encabezado(
+    titulo="COMPROBANTE DE EGRESO",
+    subtitulo="CDA La Florida",
+    lado_logo=1.5*inch,
+    titulo_pt=18,
+    subtitulo_pt=12,
+    espacio_logo=0.1*inch,
+    espacio_titulo=12,
+    espacio_final=20 + 0.2*inch
+)
+
+LABEL_STYLE = estilo_parrafo('Label', fontSize=10, textColor=colors.gray, fontName='Helvetica-Bold')
+
+INFO_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TEXTCOLOR', (0, 0), (0, -1), AZUL_MARINO),
+    ('TEXTCOLOR', (2, 0), (2, -1), AZUL_MARINO),
+    ('BACKGROUND', (1, 0), (1, -1), FONDO_VALOR),
+    ('BACKGROUND', (3, 0), (3, -1), FONDO_VALOR),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, BORDE),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+DETALLES_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TEXTCOLOR', (0, 0), (0, -1), AZUL_MARINO),
+    ('BACKGROUND', (0, 0), (0, -1), FONDO_ETIQUETA),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, BORDE),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+])
+
+DESGLOSE_STYLE = TableStyle([
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+    ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDE_SUAVE),
+    ('BACKGROUND', (0, 0), (-1, -1), FONDO_AMARILLO),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+MONTO_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 14),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('BACKGROUND', (0, 0), (-1, -1), ROJO),  # Rojo para egreso
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('LEFTPADDING', (0, 0), (-1, -1), 15),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+])
+
+FIRMAS_STYLE = TableStyle([
+    ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('TOPPADDING', (0, 0), (-1, 0), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 5),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+])
+
+CATEGORIAS_MAP = {
+    'nomina': 'Nómina y Salarios',
+    'servicios_publicos': 'Servicios Públicos',
+    'arriendo': 'Arriendo',
+    'proveedores': 'Proveedores',
+    'compra_inventario': 'Compra de Inventario',
+    'mantenimiento': 'Mantenimiento',
+    'impuestos': 'Impuestos',
+    'otros_gastos': 'Otros Gastos'
+}
+
+METODOS_MAP = {
+    'efectivo': 'Efectivo',
+    'transferencia': 'Transferencia Bancaria',
+    'cheque': 'Cheque',
+    'consignacion': 'Consignación'
+}
+
+DENOMINACIONES = [
+    ('billetes_100000', '$100.000', 100000),
+    ('billetes_50000', '$50.000', 50000),
+    ('billetes_20000', '$20.000', 20000),
+    ('billetes_10000', '$10.000', 10000),
+    ('billetes_5000', '$5.000', 5000),
+    ('billetes_2000', '$2.000', 2000),
+    ('billetes_1000', '$1.000', 1000),
+    ('monedas_1000', '$1.000 (monedas)', 1000),
+    ('monedas_500', '$500', 500),
+    ('monedas_200', '$200', 200),
+    ('monedas_100', '$100', 100),
+    ('monedas_50', '$50', 50),
+]
+
+
+# ==================== GENERACIÓN ====================
+
 
 
 def generar_comprobante_egreso(
@@ -42,166 +167,47 @@ def generar_comprobante_egreso(
     Returns:
         BytesIO con el PDF generado
     """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    
-    titulo_style = ParagraphStyle(
-        'TituloComprobante',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#0a1d3d'),  # Azul marino
-        alignment=TA_CENTER,
-        spaceAfter=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitulo_style = ParagraphStyle(
-        'SubtituloComprobante',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.HexColor('#0a1d3d'),
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    label_style = ParagraphStyle(
-        'Label',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.gray,
-        fontName='Helvetica-Bold'
-    )
-    
-    valor_style = ParagraphStyle(
-        'Valor',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.black
-    )
-    
-    # Elementos del documento
+    # Elementos del documento (logo, título y pie van en el canvas, ver ENCABEZADO)
     elementos = []
     
-    # Logo (si existe)
-    logo_path = os.path.join(os.path.dirname(__file__), 'logo_cda.png')
-    if os.path.exists(logo_path):
-        logo = Image(logo_path, width=1.5*inch, height=1.5*inch, kind='proportional')
-        logo.hAlign = 'CENTER'
-        elementos.append(logo)
-        elementos.append(Spacer(1, 0.1*inch))
-    
-    # Encabezado
-    elementos.append(Paragraph("COMPROBANTE DE EGRESO", titulo_style))
-    elementos.append(Paragraph("CDA La Florida", subtitulo_style))
-    elementos.append(Spacer(1, 0.2*inch))
-    
     # Información del comprobante
     info_data = [
         ["Comprobante N°:", numero_comprobante, "Fecha:", fecha.strftime("%d/%m/%Y %H:%M")],
     ]
     
     info_table = Table(info_data, colWidths=[1.5*inch, 2*inch, 1*inch, 2*inch])
-    info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0a1d3d')),
-        ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#0a1d3d')),
-        ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#f5f5f5')),
-        ('BACKGROUND', (3, 0), (3, -1), colors.HexColor('#f5f5f5')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cccccc')),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    info_table.setStyle(INFO_STYLE)
     elementos.append(info_table)
     elementos.append(Spacer(1, 0.3*inch))
     
     # Detalles del egreso
-    categorias_map = {
-        'nomina': 'Nómina y Salarios',
-        'servicios_publicos': 'Servicios Públicos',
-        'arriendo': 'Arriendo',
-        'proveedores': 'Proveedores',
-        'compra_inventario': 'Compra de Inventario',
-        'mantenimiento': 'Mantenimiento',
-        'impuestos': 'Impuestos',
-        'otros_gastos': 'Otros Gastos'
-    }
-    
-    metodos_map = {
-        'efectivo': 'Efectivo',
-        'transferencia': 'Transferencia Bancaria',
-        'cheque': 'Cheque',
-        'consignacion': 'Consignación'
-    }
-    
     detalles_data = [
         ["Pagado a:", beneficiario],
-        ["Categoría:", categorias_map.get(categoria, categoria)],
+        ["Categoría:", CATEGORIAS_MAP.get(categoria, categoria)],
         ["Concepto:", concepto],
-        ["Método de pago:", metodos_map.get(metodo_pago, metodo_pago)],
+        ["Método de pago:", METODOS_MAP.get(metodo_pago, metodo_pago)],
     ]
     
     detalles_table = Table(detalles_data, colWidths=[2*inch, 4.5*inch])
-    detalles_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0a1d3d')),
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f4f8')),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cccccc')),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    detalles_table.setStyle(DETALLES_STYLE)
     elementos.append(detalles_table)
     elementos.append(Spacer(1, 0.3*inch))
     
     # Desglose de efectivo (si aplica)
     if metodo_pago == 'efectivo' and desglose_efectivo:
-        elementos.append(Paragraph("<b>Desglose de Efectivo:</b>", label_style))
-        elementos.append(Spacer(1, 0.1*inch))
-        
         desglose_items = []
-        denominaciones = [
-            ('billetes_100000', '$100.000', 100000),
-            ('billetes_50000', '$50.000', 50000),
-            ('billetes_20000', '$20.000', 20000),
-            ('billetes_10000', '$10.000', 10000),
-            ('billetes_5000', '$5.000', 5000),
-            ('billetes_2000', '$2.000', 2000),
-            ('billetes_1000', '$1.000', 1000),
-            ('monedas_1000', '$1.000 (monedas)', 1000),
-            ('monedas_500', '$500', 500),
-            ('monedas_200', '$200', 200),
-            ('monedas_100', '$100', 100),
-            ('monedas_50', '$50', 50),
-        ]
-        
-        for key, label, valor in denominaciones:
+        for key, label, valor in DENOMINACIONES:
             cantidad = int(desglose_efectivo.get(key, 0))
             if cantidad > 0:
                 subtotal = cantidad * valor
                 desglose_items.append([label, f"× {cantidad}", f"${subtotal:,.0f}"])
         
+        elementos.append(Paragraph("<b>Desglose de Efectivo:</b>", LABEL_STYLE))
+        elementos.append(Spacer(1, 0.1*inch))
+        
         if desglose_items:
             desglose_table = Table(desglose_items, colWidths=[2*inch, 1.5*inch, 2*inch])
-            desglose_table.setStyle(TableStyle([
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-                ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fffbeb')),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            desglose_table.setStyle(DESGLOSE_STYLE)
             elementos.append(desglose_table)
             elementos.append(Spacer(1, 0.2*inch))
     
@@ -211,19 +217,7 @@ def generar_comprobante_egreso(
     ]
     
     monto_table = Table(monto_data, colWidths=[3*inch, 3.5*inch])
-    monto_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 14),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#dc2626')),  # Rojo para egreso
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('LEFTPADDING', (0, 0), (-1, -1), 15),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-    ]))
+    monto_table.setStyle(MONTO_STYLE)
     elementos.append(monto_table)
     elementos.append(Spacer(1, 0.5*inch))
     
@@ -235,31 +229,16 @@ def generar_comprobante_egreso(
     ]
     
     firmas_table = Table(firmas_data, colWidths=[3.25*inch, 3.25*inch])
-    firmas_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('TOPPADDING', (0, 0), (-1, 0), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 5),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-    ]))
+    firmas_table.setStyle(FIRMAS_STYLE)
     elementos.append(firmas_table)
-    elementos.append(Spacer(1, 0.3*inch))
     
-    # Pie de página
+    # Construir PDF (pie de página en el canvas)
     fecha_generacion = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    pie_style = ParagraphStyle(
-        'Pie',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.gray,
-        alignment=TA_CENTER
+    return construir_pdf(
+        elementos,
+        ENCABEZADO,
+        texto_pie=f"Documento generado el {fecha_generacion}",
+        pie_pt=8,
+        margen_superior=0.5*inch,
+        margen_inferior=0.5*inch
     )
-    elementos.append(Paragraph(f"Documento generado el {fecha_generacion}", pie_style))
-    
-    # Construir PDF
-    doc.build(elementos)
-    buffer.seek(0)
-    
-    return buffer
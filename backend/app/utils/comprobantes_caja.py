@@ -1,18 +1,169 @@
 """
 Utilidad para generar comprobantes de cierre de caja en PDF
 """
-from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
 from io import BytesIO
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Optional
-import os
+from xml.sax.saxutils import escape
 
+from app.utils.plantillas_pdf import (
+    AZUL_MARINO,
+    BORDE,
+    BORDE_SUAVE,
+    FONDO_VALOR,
+    FONDO_ETIQUETA,
+    FONDO_AMARILLO,
+    FONDO_VERDE,
+    ROJO,
+    VERDE,
+    Encabezado,
+    construir_pdf,
+    estilo_parrafo
+)
+
+
+# ==================== PLANTILLA (se arma una vez por proceso) ====================
+
+ENCABEZADO = Encabezado(
+    titulo="COMPROBANTE DE CIERRE DE CAJA",
+    subtitulo="CDA La Florida",
+    lado_logo=0.8*inch,
+    titulo_pt=14,
+    subtitulo_pt=10,
+    espacio_logo=0.05*inch,
+    espacio_titulo=6,
+    espacio_final=8 + 0.1*inch
+)
+
+SECCION_STYLE = estilo_parrafo(
+    'Seccion',
+    base='Heading2',
+    fontSize=10,
+    textColor=AZUL_MARINO,
+    fontName='Helvetica-Bold',
+    spaceAfter=4
+)
+
+OBSERVACIONES_STYLE = estilo_parrafo('Observaciones', fontSize=7, textColor=colors.black)
+
+INFO_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('TEXTCOLOR', (0, 0), (0, -1), AZUL_MARINO),
+    ('TEXTCOLOR', (2, 0), (2, -1), AZUL_MARINO),
+    ('BACKGROUND', (1, 0), (1, -1), FONDO_VALOR),
+    ('BACKGROUND', (3, 0), (3, -1), FONDO_VALOR),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDE),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+RESUMEN_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('TEXTCOLOR', (0, 0), (0, -1), AZUL_MARINO),
+    ('BACKGROUND', (0, 0), (0, -1), FONDO_ETIQUETA),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDE),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+
+def _estilo_detalle(fondo) -> TableStyle:
+    """Tabla etiqueta / valor compacta (estadísticas y métodos de pago)"""
+    return TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('TEXTCOLOR', (0, 0), (0, -1), AZUL_MARINO),
+        ('BACKGROUND', (0, 0), (-1, -1), fondo),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, BORDE_SUAVE),
+        ('TOPPADDING', (0, 0), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ])
+
+
+STATS_STYLE = _estilo_detalle(FONDO_AMARILLO)
+METODOS_STYLE = _estilo_detalle(FONDO_VERDE)
+
+DESGLOSE_STYLE = TableStyle([
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+    ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDE_SUAVE),
+    ('BACKGROUND', (0, 0), (-1, -1), FONDO_AMARILLO),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+
+def _estilo_destacado(fondo, tamano: int, padding: int) -> TableStyle:
+    """Fila blanca sobre color (total contado y diferencia)"""
+    return TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), tamano),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+        ('BACKGROUND', (0, 0), (-1, -1), fondo),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), padding),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ])
+
+
+TOTAL_STYLE = _estilo_destacado(AZUL_MARINO, 10, 5)
+SOBRANTE_STYLE = _estilo_destacado(VERDE, 11, 6)
+FALTANTE_STYLE = _estilo_destacado(ROJO, 11, 6)
+
+FIRMAS_STYLE = TableStyle([
+    ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('TOPPADDING', (0, 0), (-1, 0), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 3),
+    ('TOPPADDING', (0, 1), (-1, -1), 4),
+])
+
+TURNOS_MAP = {
+    'mañana': 'Mañana',
+    'tarde': 'Tarde',
+    'noche': 'Noche'
+}
+
+DENOMINACIONES = [
+    ('billetes_100000', 'Billetes de $100.000', 100000),
+    ('billetes_50000', 'Billetes de $50.000', 50000),
+    ('billetes_20000', 'Billetes de $20.000', 20000),
+    ('billetes_10000', 'Billetes de $10.000', 10000),
+    ('billetes_5000', 'Billetes de $5.000', 5000),
+    ('billetes_2000', 'Billetes de $2.000', 2000),
+    ('billetes_1000', 'Billetes de $1.000', 1000),
+    ('monedas_1000', 'Monedas de $1.000', 1000),
+    ('monedas_500', 'Monedas de $500', 500),
+    ('monedas_200', 'Monedas de $200', 200),
+    ('monedas_100', 'Monedas de $100', 100),
+    ('monedas_50', 'Monedas de $50', 50),
+]
+
+
+# ==================== GENERACIÓN ====================
 
 def generar_comprobante_cierre_caja(
     caja_id: str,
@@ -68,102 +219,28 @@ def generar_comprobante_cierre_caja(
     Returns:
         BytesIO con el PDF generado
     """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.3*inch, bottomMargin=0.3*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
-    
     # Convertir fechas UTC a hora de Colombia (UTC-5)
     colombia_offset = timedelta(hours=-5)
     fecha_apertura_local = fecha_apertura + colombia_offset
     fecha_cierre_local = fecha_cierre + colombia_offset
     fecha_generacion_local = datetime.utcnow() + colombia_offset
     
-    # Estilos compactos
-    styles = getSampleStyleSheet()
-    
-    titulo_style = ParagraphStyle(
-        'TituloComprobante',
-        parent=styles['Heading1'],
-        fontSize=14,
-        textColor=colors.HexColor('#0a1d3d'),
-        alignment=TA_CENTER,
-        spaceAfter=6,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitulo_style = ParagraphStyle(
-        'SubtituloComprobante',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#0a1d3d'),
-        alignment=TA_CENTER,
-        spaceAfter=8
-    )
-    
-    label_style = ParagraphStyle(
-        'Label',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.gray,
-        fontName='Helvetica-Bold'
-    )
-    
-    seccion_style = ParagraphStyle(
-        'Seccion',
-        parent=styles['Heading2'],
-        fontSize=10,
-        textColor=colors.HexColor('#0a1d3d'),
-        fontName='Helvetica-Bold',
-        spaceAfter=4
-    )
-    
-    # Elementos del documento
+    # Elementos del documento (logo, título y pie van en el canvas, ver ENCABEZADO)
     elementos = []
     
-    # Logo compacto (si existe)
-    logo_path = os.path.join(os.path.dirname(__file__), 'logo_cda.png')
-    if os.path.exists(logo_path):
-        logo = Image(logo_path, width=0.8*inch, height=0.8*inch, kind='proportional')
-        logo.hAlign = 'CENTER'
-        elementos.append(logo)
-        elementos.append(Spacer(1, 0.05*inch))
-    
-    # Encabezado compacto
-    elementos.append(Paragraph("COMPROBANTE DE CIERRE DE CAJA", titulo_style))
-    elementos.append(Paragraph("CDA La Florida", subtitulo_style))
-    elementos.append(Spacer(1, 0.1*inch))
-    
     # Información de la caja
-    turnos_map = {
-        'mañana': 'Mañana',
-        'tarde': 'Tarde',
-        'noche': 'Noche'
-    }
-    
     info_data = [
-        ["Cajero:", cajero_nombre, "Turno:", turnos_map.get(turno, turno)],
+        ["Cajero:", cajero_nombre, "Turno:", TURNOS_MAP.get(turno, turno)],
         ["Apertura:", fecha_apertura_local.strftime("%d/%m/%Y %H:%M"), "Cierre:", fecha_cierre_local.strftime("%d/%m/%Y %H:%M")],
     ]
     
     info_table = Table(info_data, colWidths=[1*inch, 2*inch, 0.8*inch, 1.7*inch])
-    info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0a1d3d')),
-        ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#0a1d3d')),
-        ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#f5f5f5')),
-        ('BACKGROUND', (3, 0), (3, -1), colors.HexColor('#f5f5f5')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    info_table.setStyle(INFO_STYLE)
     elementos.append(info_table)
     elementos.append(Spacer(1, 0.1*inch))
     
     # Resumen financiero
-    elementos.append(Paragraph("RESUMEN FINANCIERO", seccion_style))
+    elementos.append(Paragraph("RESUMEN FINANCIERO", SECCION_STYLE))
     
     resumen_data = [
         ["Monto inicial:", f"${float(monto_inicial):,.0f}"],
@@ -173,24 +250,13 @@ def generar_comprobante_cierre_caja(
     ]
     
     resumen_table = Table(resumen_data, colWidths=[2.5*inch, 3*inch])
-    resumen_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0a1d3d')),
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f4f8')),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    resumen_table.setStyle(RESUMEN_STYLE)
     elementos.append(resumen_table)
     elementos.append(Spacer(1, 0.1*inch))
     
     # Estadísticas del turno
     if vehiculos_cobrados > 0 or total_rtm > 0 or total_soat > 0:
-        elementos.append(Paragraph("ESTADÍSTICAS DEL TURNO", seccion_style))
+        elementos.append(Paragraph("ESTADÍSTICAS DEL TURNO", SECCION_STYLE))
         
         stats_data = [
             ["Vehículos cobrados:", str(vehiculos_cobrados)],
@@ -199,76 +265,38 @@ def generar_comprobante_cierre_caja(
         ]
         
         stats_table = Table(stats_data, colWidths=[2.5*inch, 3*inch])
-        stats_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 7),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0a1d3d')),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fffbeb')),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ]))
+        stats_table.setStyle(STATS_STYLE)
         elementos.append(stats_table)
         elementos.append(Spacer(1, 0.08*inch))
     
     # Métodos de pago
+    metodos_data = []
+    if total_efectivo > 0:
+        metodos_data.append(["Efectivo:", f"${float(total_efectivo):,.0f}"])
+    if total_tarjeta_debito > 0:
+        metodos_data.append(["Tarjeta débito:", f"${float(total_tarjeta_debito):,.0f}"])
+    if total_tarjeta_credito > 0:
+        metodos_data.append(["Tarjeta crédito:", f"${float(total_tarjeta_credito):,.0f}"])
+    if total_transferencia > 0:
+        metodos_data.append(["Transferencia:", f"${float(total_transferencia):,.0f}"])
+    if total_credismart > 0:
+        metodos_data.append(["CrediSmart:", f"${float(total_credismart):,.0f}"])
+    if total_sistecredito > 0:
+        metodos_data.append(["SisteCredito:", f"${float(total_sistecredito):,.0f}"])
+    
     if any([total_efectivo, total_tarjeta_debito, total_tarjeta_credito, total_transferencia, total_credismart, total_sistecredito]):
-        elementos.append(Paragraph("MÉTODOS DE PAGO", seccion_style))
-        
-        metodos_data = []
-        if total_efectivo > 0:
-            metodos_data.append(["Efectivo:", f"${float(total_efectivo):,.0f}"])
-        if total_tarjeta_debito > 0:
-            metodos_data.append(["Tarjeta débito:", f"${float(total_tarjeta_debito):,.0f}"])
-        if total_tarjeta_credito > 0:
-            metodos_data.append(["Tarjeta crédito:", f"${float(total_tarjeta_credito):,.0f}"])
-        if total_transferencia > 0:
-            metodos_data.append(["Transferencia:", f"${float(total_transferencia):,.0f}"])
-        if total_credismart > 0:
-            metodos_data.append(["CrediSmart:", f"${float(total_credismart):,.0f}"])
-        if total_sistecredito > 0:
-            metodos_data.append(["SisteCredito:", f"${float(total_sistecredito):,.0f}"])
-        
+        elementos.append(Paragraph("MÉTODOS DE PAGO", SECCION_STYLE))
         if metodos_data:
             metodos_table = Table(metodos_data, colWidths=[2.5*inch, 3*inch])
-            metodos_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 7),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0a1d3d')),
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#e8f5e9')),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-                ('TOPPADDING', (0, 0), (-1, -1), 3),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ]))
+            metodos_table.setStyle(METODOS_STYLE)
             elementos.append(metodos_table)
             elementos.append(Spacer(1, 0.08*inch))
     
     # Desglose de efectivo
-    elementos.append(Paragraph("ARQUEO FÍSICO - DESGLOSE DE EFECTIVO", seccion_style))
+    elementos.append(Paragraph("ARQUEO FÍSICO - DESGLOSE DE EFECTIVO", SECCION_STYLE))
     
     desglose_items = []
-    denominaciones = [
-        ('billetes_100000', 'Billetes de $100.000', 100000),
-        ('billetes_50000', 'Billetes de $50.000', 50000),
-        ('billetes_20000', 'Billetes de $20.000', 20000),
-        ('billetes_10000', 'Billetes de $10.000', 10000),
-        ('billetes_5000', 'Billetes de $5.000', 5000),
-        ('billetes_2000', 'Billetes de $2.000', 2000),
-        ('billetes_1000', 'Billetes de $1.000', 1000),
-        ('monedas_1000', 'Monedas de $1.000', 1000),
-        ('monedas_500', 'Monedas de $500', 500),
-        ('monedas_200', 'Monedas de $200', 200),
-        ('monedas_100', 'Monedas de $100', 100),
-        ('monedas_50', 'Monedas de $50', 50),
-    ]
-    
-    for key, label, valor in denominaciones:
+    for key, label, valor in DENOMINACIONES:
         cantidad = int(desglose_efectivo.get(key, 0))
         if cantidad > 0:
             subtotal = cantidad * valor
@@ -278,16 +306,7 @@ def generar_comprobante_cierre_caja(
         desglose_items.append(["(Sin efectivo)", "", "$0"])
     
     desglose_table = Table(desglose_items, colWidths=[2.2*inch, 1.3*inch, 2*inch])
-    desglose_table.setStyle(TableStyle([
-        ('FONTSIZE', (0, 0), (-1, -1), 7),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fffbeb')),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-    ]))
+    desglose_table.setStyle(DESGLOSE_STYLE)
     elementos.append(desglose_table)
     elementos.append(Spacer(1, 0.05*inch))
     
@@ -297,24 +316,11 @@ def generar_comprobante_cierre_caja(
     ]
     
     total_table = Table(total_data, colWidths=[2.5*inch, 3*inch])
-    total_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#0a1d3d')),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    total_table.setStyle(TOTAL_STYLE)
     elementos.append(total_table)
     elementos.append(Spacer(1, 0.08*inch))
     
     # Diferencia (destacada)
-    color_diferencia = colors.HexColor('#16a34a') if diferencia >= 0 else colors.HexColor('#dc2626')
     signo_diferencia = "SOBRANTE" if diferencia >= 0 else "FALTANTE"
     
     diferencia_data = [
@@ -322,32 +328,14 @@ def generar_comprobante_cierre_caja(
     ]
     
     diferencia_table = Table(diferencia_data, colWidths=[2.5*inch, 3*inch])
-    diferencia_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('BACKGROUND', (0, 0), (-1, -1), color_diferencia),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    diferencia_table.setStyle(SOBRANTE_STYLE if diferencia >= 0 else FALTANTE_STYLE)
     elementos.append(diferencia_table)
     elementos.append(Spacer(1, 0.1*inch))
     
     # Observaciones
     if observaciones:
-        elementos.append(Paragraph("OBSERVACIONES", seccion_style))
-        obs_style = ParagraphStyle(
-            'Observaciones',
-            parent=styles['Normal'],
-            fontSize=7,
-            textColor=colors.black
-        )
-        elementos.append(Paragraph(observaciones, obs_style))
+        elementos.append(Paragraph("OBSERVACIONES", SECCION_STYLE))
+        elementos.append(Paragraph(escape(observaciones), OBSERVACIONES_STYLE))
         elementos.append(Spacer(1, 0.08*inch))
     
     # Firmas
@@ -358,31 +346,17 @@ def generar_comprobante_cierre_caja(
     ]
     
     firmas_table = Table(firmas_data, colWidths=[2.75*inch, 2.75*inch])
-    firmas_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('TOPPADDING', (0, 0), (-1, 0), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 3),
-        ('TOPPADDING', (0, 1), (-1, -1), 4),
-    ]))
+    firmas_table.setStyle(FIRMAS_STYLE)
     elementos.append(firmas_table)
-    elementos.append(Spacer(1, 0.05*inch))
     
-    # Pie de página
+    # Construir PDF (pie de página en el canvas)
     fecha_generacion = fecha_generacion_local.strftime("%d/%m/%Y %H:%M:%S")
-    pie_style = ParagraphStyle(
-        'Pie',
-        parent=styles['Normal'],
-        fontSize=6,
-        textColor=colors.gray,
-        alignment=TA_CENTER
+    return construir_pdf(
+        elementos,
+        ENCABEZADO,
+        texto_pie=f"Documento generado el {fecha_generacion} | Caja ID: {caja_id}",
+        pie_pt=6,
+        margen_superior=0.3*inch,
+        margen_inferior=0.3*inch,
+        margen_lateral=0.5*inch
     )
-    elementos.append(Paragraph(f"Documento generado el {fecha_generacion} | Caja ID: {caja_id}", pie_style))
-    
-    # Construir PDF
-    doc.build(elementos)
-    buffer.seek(0)
-    
-    return buffer
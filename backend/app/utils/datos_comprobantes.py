@@ -0,0 +1,85 @@
+"""
+Datos que se imprimen en cada comprobante PDF
+
+Los usan la descarga individual (cajas / tesorería) y la exportación masiva
+de reportes; también determinan la huella del archivo guardado en
+almacen_comprobantes, así que un mismo documento produce los mismos datos
+venga de donde venga.
+"""
+from decimal import Decimal
+from typing import Optional
+
+from app.models.tesoreria import MetodoPagoTesoreria
+
+_DENOMINACIONES = (
+    'billetes_100000', 'billetes_50000', 'billetes_20000', 'billetes_10000',
+    'billetes_5000', 'billetes_2000', 'billetes_1000',
+    'monedas_1000', 'monedas_500', 'monedas_200', 'monedas_100', 'monedas_50',
+)
+
+
+def desglose_a_dict(desglose) -> dict:
+    """Cantidad de cada denominación de un desglose de efectivo (caja o tesorería)"""
+    return {campo: int(getattr(desglose, campo) or 0) for campo in _DENOMINACIONES}
+
+
+def datos_cierre_caja(caja, desglose, vehiculos_cobrados: int) -> dict:
+    """Argumentos de generar_comprobante_cierre_caja para una caja cerrada"""
+    return dict(
+        caja_id=str(caja.id),
+        cajero_nombre=caja.usuario.nombre_completo,
+        turno=caja.turno.value,
+        fecha_apertura=caja.fecha_apertura,
+        fecha_cierre=caja.fecha_cierre,
+        monto_inicial=caja.monto_inicial,
+        total_ingresos_efectivo=Decimal(str(caja.total_ingresos_efectivo)),
+        total_egresos=Decimal(str(caja.total_egresos)),
+        saldo_esperado=Decimal(str(caja.saldo_esperado)),
+        monto_final_fisico=caja.monto_final_fisico,
+        diferencia=caja.diferencia,
+        desglose_efectivo=desglose_a_dict(desglose),
+        observaciones=caja.observaciones_cierre,
+        vehiculos_cobrados=vehiculos_cobrados,
+        total_rtm=caja.total_rtm,
+        total_soat=caja.total_comision_soat,
+        total_efectivo=caja.total_efectivo,
+        total_tarjeta_debito=caja.total_tarjeta_debito,
+        total_tarjeta_credito=caja.total_tarjeta_credito,
+        total_transferencia=caja.total_transferencia,
+        total_credismart=caja.total_credismart,
+        total_sistecredito=caja.total_sistecredito
+    )
+
+
+def nombre_archivo_cierre(caja) -> str:
+    return f"comprobante_cierre_caja_{caja.fecha_cierre.strftime('%Y%m%d_%H%M')}.pdf"
+
+
+def numero_comprobante_egreso(movimiento) -> str:
+    return movimiento.numero_comprobante or f"EGR-{str(movimiento.id)[:8].upper()}"
+
+
+def datos_egreso(movimiento, autorizado_por: Optional[str]) -> dict:
+    """Argumentos de generar_comprobante_egreso (desglose_efectivo ya cargado)"""
+    desglose_dict = desglose_a_dict(movimiento.desglose_efectivo) if movimiento.desglose_efectivo else None
+
+    # Obtener valores de los enums
+    categoria_str = movimiento.categoria_egreso.value if movimiento.categoria_egreso else "otros_gastos"
+    metodo_pago_str = movimiento.metodo_pago.value if isinstance(movimiento.metodo_pago, MetodoPagoTesoreria) else str(movimiento.metodo_pago)
+
+    return dict(
+        numero_comprobante=numero_comprobante_egreso(movimiento),
+        fecha=movimiento.fecha_movimiento,
+        beneficiario=movimiento.concepto.split(" - ")[0] if " - " in movimiento.concepto else "N/A",
+        concepto=movimiento.concepto,
+        categoria=categoria_str,
+        monto=abs(movimiento.monto),
+        metodo_pago=metodo_pago_str,
+        autorizado_por=autorizado_por or "N/A",
+        desglose_efectivo=desglose_dict
+    )
+
+
+def nombre_archivo_egreso(movimiento) -> str:
+    fecha_str = movimiento.fecha_movimiento.strftime("%Y%m%d")
+    return f"Comprobante_Egreso_{numero_comprobante_egreso(movimiento)}_{fecha_str}.pdf"
@@ -0,0 +1,176 @@
+"""
+Composición exacta de montos con las denominaciones disponibles
+
+Problema de cambio acotado (bounded knapsack): componer un monto con la
+menor cantidad de billetes y monedas sin pasarse del inventario. El greedy
+(mayor denominación primero) falla con inventario limitado, p. ej. sin
+billetes de $20,000 pero con suficientes de $10,000 y $5,000.
+
+1. Factibilidad: por cada sufijo de denominaciones se calcula un bitset
+   (int de Python) con todos los montos alcanzables, usando división binaria
+   de las cantidades: cada paso es un shift-or sobre todo el rango de una vez.
+2. Mínimo de piezas: búsqueda de mayor a menor denominación con memo por
+   (denominación, monto restante), descartando ramas cuyo resto no es
+   alcanzable y cortando por cota inferior de piezas.
+
+Las soluciones se memorizan por (monto, inventario) y la búsqueda tiene un
+tiempo máximo; si se agota devuelve la mejor combinación encontrada.
+"""
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from math import gcd
+from typing import Dict, Optional, Tuple
+
+from app.models.inventario_denominaciones import DENOMINACIONES
+
+# Tiempo máximo de búsqueda del mínimo de piezas (la factibilidad siempre se resuelve)
+LIMITE_SEGUNDOS = 0.5
+
+# Valores distintos de mayor a menor (billetes y monedas de $1,000 se combinan)
+_VALORES = tuple(sorted({valor for _, valor in DENOMINACIONES}, reverse=True))
+_UNIDAD = 0
+for _valor in _VALORES:
+    _UNIDAD = gcd(_UNIDAD, _valor)
+
+
+@dataclass(frozen=True)
+class SugerenciaDesglose:
+    """Combinación sugerida para un monto"""
+    desglose: Dict[str, int]  # campo -> cantidad (solo las que se usan)
+    piezas: int
+    optimo: bool  # False si se agotó el tiempo antes de probar que es mínima
+
+    @property
+    def total(self) -> int:
+        valores = dict(DENOMINACIONES)
+        return sum(valores[campo] * cantidad for campo, cantidad in self.desglose.items())
+
+
+def _alcanzables_por_sufijo(valores: Tuple[int, ...], stock: Tuple[int, ...], monto: int) -> list:
+    """
+    alcanzables[i] tiene el bit k encendido si k (en unidades) se puede formar
+    solo con las denominaciones i en adelante
+    """
+    mascara = (1 << (monto + 1)) - 1
+    alcanzables = [0] * (len(valores) + 1)
+    alcanzables[-1] = 1  # Con nada se forma 0
+    for i in range(len(valores) - 1, -1, -1):
+        bits = alcanzables[i + 1]
+        restante, bloque = stock[i], 1
+        # Cantidades 1, 2, 4, ... + resto: cualquier cantidad 0..stock es una suma de bloques
+        while restante > 0 and bits != mascara:
+            tomar = min(bloque, restante)
+            bits = (bits | (bits << (tomar * valores[i]))) & mascara
+            restante -= tomar
+            bloque <<= 1
+        alcanzables[i] = bits
+    return alcanzables
+
+
+class _TiempoAgotado(Exception):
+    pass
+
+
+def _minimo_piezas(valores, stock, monto, alcanzables, limite: float):
+    """(piezas, cantidades por valor, optimo) con la menor cantidad de piezas"""
+    n = len(valores)
+    memo: Dict[Tuple[int, int], Optional[Tuple[int, Tuple[int, ...]]]] = {}
+    fin = time.monotonic() + limite
+    mejor_global = [None]
+
+    def mejor(i: int, resto: int) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        if resto == 0:
+            return 0, (0,) * (n - i)
+        if i == n or not (alcanzables[i] >> resto) & 1:
+            return None
+        clave = (i, resto)
+        if clave in memo:
+            return memo[clave]
+        if time.monotonic() > fin:
+            raise _TiempoAgotado()
+
+        valor = valores[i]
+        siguiente = valores[i + 1] if i + 1 < n else None
+        resultado = None
+        for cantidad in range(min(stock[i], resto // valor), -1, -1):
+            nuevo_resto = resto - cantidad * valor
+            if resultado is not None:
+                # Cota inferior: el resto necesita al menos ceil(resto / siguiente) piezas
+                cota = cantidad + (-(-nuevo_resto // siguiente) if siguiente else (0 if nuevo_resto == 0 else 1))
+                if cota >= resultado[0]:
+                    break
+            if not (alcanzables[i + 1] >> nuevo_resto) & 1:
+                continue
+            sub = mejor(i + 1, nuevo_resto)
+            if sub is not None and (resultado is None or cantidad + sub[0] < resultado[0]):
+                resultado = (cantidad + sub[0], (cantidad,) + sub[1])
+                if i == 0:
+                    mejor_global[0] = resultado
+
+        memo[clave] = resultado
+        return resultado
+
+    try:
+        resultado = mejor(0, monto)
+        return resultado[0], resultado[1], True
+    except _TiempoAgotado:
+        if mejor_global[0] is not None:
+            return mejor_global[0][0], mejor_global[0][1], False
+        return _primera_factible(valores, stock, monto, alcanzables)
+
+
+def _primera_factible(valores, stock, monto, alcanzables):
+    """Cualquier combinación válida (greedy guiado por los bitsets, sin retroceso)"""
+    cantidades = []
+    resto = monto
+    for i, valor in enumerate(valores):
+        cantidad = min(stock[i], resto // valor)
+        while not (alcanzables[i + 1] >> (resto - cantidad * valor)) & 1:
+            cantidad -= 1
+        cantidades.append(cantidad)
+        resto -= cantidad * valor
+    return sum(cantidades), tuple(cantidades), False
+
+
+@lru_cache(maxsize=1024)
+def _resolver(monto: int, stock: Tuple[int, ...], limite: float):
+    """Solución memorizada por (monto en unidades, inventario por valor)"""
+    valores = tuple(valor // _UNIDAD for valor in _VALORES)
+    alcanzables = _alcanzables_por_sufijo(valores, stock, monto)
+    if not (alcanzables[0] >> monto) & 1:
+        return None
+    return _minimo_piezas(valores, stock, monto, alcanzables, limite)
+
+
+def sugerir_desglose(
+    monto: int,
+    disponible: Dict[str, int],
+    limite_segundos: float = LIMITE_SEGUNDOS
+) -> Optional[SugerenciaDesglose]:
+    """
+    Combinación con la menor cantidad de piezas para entregar `monto` con el
+    inventario `disponible` (campo -> cantidad). None si no es posible.
+    """
+    if monto <= 0 or monto % _UNIDAD:
+        return None
+
+    stock = tuple(
+        sum(max(int(disponible.get(campo, 0)), 0) for campo, v in DENOMINACIONES if v == valor)
+        for valor in _VALORES
+    )
+    solucion = _resolver(monto // _UNIDAD, stock, limite_segundos)
+    if solucion is None:
+        return None
+    piezas, cantidades, optimo = solucion
+
+    # Repartir cada valor entre sus campos en el orden de DENOMINACIONES (billetes antes que monedas)
+    desglose: Dict[str, int] = {}
+    por_valor = dict(zip(_VALORES, cantidades))
+    for campo, valor in DENOMINACIONES:
+        usar = min(por_valor[valor], max(int(disponible.get(campo, 0)), 0))
+        if usar:
+            desglose[campo] = usar
+            por_valor[valor] -= usar
+
+    return SugerenciaDesglose(desglose=desglose, piezas=piezas, optimo=optimo)
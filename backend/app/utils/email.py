@@ -1,9 +1,9 @@
 """
 Utilidad para envío de emails
+
+smtplib (y con él ssl) y email.mime se importan al enviar el primer correo,
+no al arrancar el worker.
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from app.core.config import settings
 
 
@@ -19,6 +19,10 @@ def enviar_email(destinatario: str, asunto: str, cuerpo_html: str) -> bool:
     Returns:
         True si se envió correctamente, False en caso contrario
     """
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
     try:
         # Crear mensaje
         mensaje = MIMEMultipart("alternative")
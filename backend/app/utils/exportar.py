@@ -0,0 +1,89 @@
+"""
+Exportación de reportes a CSV / Excel en streaming
+
+Las filas llegan como un generador (normalmente un cursor del servidor con
+yield_per) y se escriben por bloques, así la memoria del worker no depende
+de cuántas filas tenga el rango pedido.
+"""
+import csv
+import io
+import tempfile
+from typing import Iterable, Iterator, Sequence
+
+from fastapi.responses import StreamingResponse
+
+FORMATOS_EXPORTACION = ("csv", "xlsx")
+
+# Filas por bloque enviado al cliente (CSV)
+_FILAS_POR_BLOQUE = 500
+
+# Tamaño de los bloques leídos del archivo temporal (XLSX)
+_BYTES_POR_BLOQUE = 64 * 1024
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def generar_csv(encabezados: Sequence[str], filas: Iterable[Sequence]) -> Iterator[bytes]:
+    """CSV por bloques (UTF-8 con BOM para que Excel respete las tildes)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    yield "\ufeff".encode("utf-8")
+    writer.writerow(encabezados)
+
+    for i, fila in enumerate(filas, start=1):
+        writer.writerow(fila)
+        if i % _FILAS_POR_BLOQUE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def generar_xlsx(encabezados: Sequence[str], filas: Iterable[Sequence], titulo: str = "Reporte") -> Iterator[bytes]:
+    """
+    XLSX con un workbook write-only de openpyxl: las filas se vuelcan a disco
+    a medida que se agregan y el archivo final se envía desde un temporal.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    hoja = workbook.create_sheet(title=titulo[:31])
+    hoja.append(list(encabezados))
+    for fila in filas:
+        hoja.append(list(fila))
+
+    with tempfile.TemporaryFile() as archivo:
+        workbook.save(archivo)
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(_BYTES_POR_BLOQUE)
+            if not bloque:
+                break
+            yield bloque
+
+
+def respuesta_exportacion(
+    formato: str,
+    nombre_archivo: str,
+    encabezados: Sequence[str],
+    filas: Iterable[Sequence],
+    titulo: str = "Reporte"
+) -> StreamingResponse:
+    """StreamingResponse con el reporte en el formato pedido (csv | xlsx)"""
+    if formato == "xlsx":
+        contenido = generar_xlsx(encabezados, filas, titulo)
+    else:
+        contenido = generar_csv(encabezados, filas)
+
+    return StreamingResponse(
+        contenido,
+        media_type=_MEDIA_TYPES[formato],
+        headers={
+            "Content-Disposition": f"attachment; filename={nombre_archivo}.{formato}"
+        }
+    )
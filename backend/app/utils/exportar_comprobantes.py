@@ -0,0 +1,155 @@
+"""
+Exportación masiva de comprobantes PDF en un ZIP en streaming
+
+El ZIP se escribe sobre un destino no seekable (zipfile usa descriptores de
+datos) y cada entrada se envía al cliente apenas se agrega:
+- los comprobantes que ya están en almacen_comprobantes salen primero, así
+  los primeros bytes llegan de inmediato
+- mientras tanto los que faltan se generan en el pool de render_pdf, como
+  máximo EXPORTACION_COMPROBANTES_SIMULTANEOS a la vez (deja cupo para las
+  descargas individuales), y entran al ZIP en el orden en que terminan
+- los PDF se copian desde disco por bloques; en memoria solo queda la
+  lista de entradas (datos de cada comprobante, no los archivos)
+
+Si algún comprobante no se pudo generar, el ZIP termina con ERRORES.txt.
+"""
+import logging
+import shutil
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Sequence
+
+from app.utils.almacen_comprobantes import almacen_comprobantes, ComprobanteGuardado, GENERADORES
+from app.utils.render_pdf import ejecutor_render
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de los bloques copiados del PDF guardado al ZIP
+_BYTES_POR_BLOQUE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class EntradaComprobante:
+    """Un comprobante del ZIP: qué documento es y con qué nombre se guarda"""
+    tipo: str
+    entidad_id: str
+    datos: dict
+    nombre_archivo: str
+
+
+class _SalidaZip:
+    """Destino de ZipFile sin seek: guarda lo escrito hasta que el generador lo envía"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _obtener(entrada: EntradaComprobante) -> ComprobanteGuardado:
+    """Corre en un hilo: genera el PDF en el pool de render si no está guardado"""
+    generar = GENERADORES[entrada.tipo]
+    return almacen_comprobantes.obtener(
+        entrada.tipo,
+        entrada.entidad_id,
+        entrada.datos,
+        lambda: ejecutor_render.renderizar(generar, entrada.datos)
+    )
+
+
+def _agregar(archivo_zip: zipfile.ZipFile, nombre: str, comprobante: ComprobanteGuardado) -> None:
+    """Copiar el PDF guardado al ZIP por bloques"""
+    info = zipfile.ZipInfo(nombre, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.file_size = comprobante.ruta.stat().st_size
+    with open(comprobante.ruta, "rb") as origen, archivo_zip.open(info, "w") as destino:
+        shutil.copyfileobj(origen, destino, _BYTES_POR_BLOQUE)
+
+
+def _nombres_unicos(entradas: Sequence[EntradaComprobante]) -> List[str]:
+    """Ruta dentro del ZIP de cada entrada (carpeta por tipo, sin nombres repetidos)"""
+    usados = set()
+    nombres = []
+    for entrada in entradas:
+        nombre = f"{entrada.tipo}/{entrada.nombre_archivo}"
+        if nombre in usados:
+            base, _, extension = nombre.rpartition(".")
+            nombre = f"{base}_{str(entrada.entidad_id)[:8]}.{extension}"
+        usados.add(nombre)
+        nombres.append(nombre)
+    return nombres
+
+
+def generar_zip_comprobantes(entradas: Sequence[EntradaComprobante], simultaneos: int) -> Iterator[bytes]:
+    """Bloques del ZIP con los comprobantes de `entradas`"""
+    simultaneos = max(1, simultaneos)
+    guardados = []
+    faltantes = []
+    for entrada, nombre in zip(entradas, _nombres_unicos(entradas)):
+        comprobante = almacen_comprobantes.guardado(entrada.tipo, entrada.entidad_id, entrada.datos)
+        if comprobante is not None:
+            guardados.append((nombre, comprobante))
+        else:
+            faltantes.append((entrada, nombre))
+
+    salida = _SalidaZip()
+    errores = []
+    pool = ThreadPoolExecutor(max_workers=simultaneos, thread_name_prefix="exportar-comprobantes")
+    pendientes = iter(faltantes)
+    en_curso = {}
+
+    def lanzar():
+        # Ventana acotada: nunca más de `simultaneos` renders pedidos a la vez
+        while len(en_curso) < simultaneos:
+            siguiente = next(pendientes, None)
+            if siguiente is None:
+                return
+            en_curso[pool.submit(_obtener, siguiente[0])] = siguiente
+
+    def recoger(espera) -> list:
+        """(nombre, comprobante) de los renders terminados; espera=None bloquea hasta el primero"""
+        terminados = []
+        listos, _ = wait(list(en_curso), timeout=espera, return_when=FIRST_COMPLETED)
+        for futuro in listos:
+            entrada, nombre = en_curso.pop(futuro)
+            try:
+                terminados.append((nombre, futuro.result()))
+            except Exception as error:
+                logger.exception("No se pudo generar el comprobante %s %s", entrada.tipo, entrada.entidad_id)
+                errores.append(f"{nombre}: {getattr(error, 'detail', error)}")
+        lanzar()
+        return terminados
+
+    try:
+        with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+            lanzar()
+
+            # Primero los ya guardados (sin esperar renders), sumando los que vayan terminando
+            for nombre, comprobante in guardados:
+                for nombre_listo, generado in [(nombre, comprobante)] + recoger(0):
+                    _agregar(archivo_zip, nombre_listo, generado)
+                    yield salida.vaciar()
+
+            while en_curso:
+                for nombre, comprobante in recoger(None):
+                    _agregar(archivo_zip, nombre, comprobante)
+                    yield salida.vaciar()
+
+            if errores:
+                archivo_zip.writestr("ERRORES.txt", "\n".join(errores) + "\n")
+        # Al cerrar el ZIP se escribe el directorio central
+        yield salida.vaciar()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
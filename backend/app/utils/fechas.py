@@ -0,0 +1,126 @@
+"""
+Utilidades de fechas en la zona horaria del negocio (settings.TIMEZONE)
+
+Las columnas DateTime de la base de datos guardan la hora UTC sin zona
+(naive). Un día, semana o mes "de negocio" en Bogotá se traduce a un
+rango semiabierto [inicio, fin) en UTC naive, comparable directamente con
+esas columnas y aprovechable por sus índices (a diferencia de
+func.date(columna) == fecha).
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Tuple
+
+import pytz
+
+from app.core.config import settings
+
+RangoUTC = Tuple[datetime, datetime]
+
+_zona = pytz.timezone(settings.TIMEZONE)
+
+
+def utcnow() -> datetime:
+    """
+    Hora actual en UTC naive, como la guardan las columnas DateTime (sin zona).
+    asyncpg rechaza datetimes con zona en esas columnas; psycopg2 los
+    aceptaba pero los convertía con la zona de la sesión de PostgreSQL.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def zona_negocio():
+    """Zona horaria configurada para el negocio"""
+    return _zona
+
+
+def ahora_negocio() -> datetime:
+    """Fecha y hora actual en la zona del negocio (aware)"""
+    return datetime.now(timezone.utc).astimezone(_zona)
+
+
+def hoy_negocio() -> date:
+    """Fecha de hoy en la zona del negocio (no la del servidor)"""
+    return ahora_negocio().date()
+
+
+def inicio_dia_utc(fecha: date) -> datetime:
+    """Medianoche local de `fecha` expresada en UTC naive"""
+    local = _zona.localize(datetime.combine(fecha, time.min))
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def rango_dia(fecha: date) -> RangoUTC:
+    """Rango UTC [inicio, fin) de un día de negocio"""
+    return inicio_dia_utc(fecha), inicio_dia_utc(fecha + timedelta(days=1))
+
+
+def rango_dias(fecha_desde: date, fecha_hasta: date) -> RangoUTC:
+    """Rango UTC [inicio, fin) desde el día `fecha_desde` hasta el día `fecha_hasta` inclusive"""
+    return inicio_dia_utc(fecha_desde), inicio_dia_utc(fecha_hasta + timedelta(days=1))
+
+
+def rango_semana(fecha: date) -> RangoUTC:
+    """Rango UTC [inicio, fin) de la semana (lunes a domingo) que contiene `fecha`"""
+    lunes = fecha - timedelta(days=fecha.weekday())
+    return rango_dias(lunes, lunes + timedelta(days=6))
+
+
+def rango_mes(anio: int, mes: int) -> RangoUTC:
+    """Rango UTC [inicio, fin) de un mes de negocio"""
+    primer_dia = date(anio, mes, 1)
+    siguiente = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return inicio_dia_utc(primer_dia), inicio_dia_utc(siguiente)
+
+
+def dias_del_mes(anio: int, mes: int) -> int:
+    """Cantidad de días del mes"""
+    siguiente = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return (siguiente - date(anio, mes, 1)).days
+
+
+def a_hora_negocio(momento_utc: datetime) -> datetime:
+    """Timestamp UTC naive de la base de datos expresado en la zona del negocio (aware)"""
+    if momento_utc.tzinfo is None:
+        momento_utc = momento_utc.replace(tzinfo=timezone.utc)
+    return momento_utc.astimezone(_zona)
+
+
+def fecha_negocio(momento_utc: datetime) -> date:
+    """Día de negocio al que pertenece un timestamp UTC naive de la base de datos"""
+    return a_hora_negocio(momento_utc).date()
+
+
+def parse_fecha(valor: str):
+    """Parsear 'YYYY-MM-DD'; devuelve None si el formato no es válido"""
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+# Unidades de las series por período (nombre en la API -> unidad de date_trunc)
+UNIDADES_SERIE = {"dia": "day", "semana": "week", "mes": "month"}
+
+
+def inicio_periodo(fecha: date, unidad: str) -> date:
+    """Primer día del día / semana (lunes) / mes que contiene `fecha`"""
+    if unidad == "semana":
+        return fecha - timedelta(days=fecha.weekday())
+    if unidad == "mes":
+        return fecha.replace(day=1)
+    return fecha
+
+
+def periodos(fecha_desde: date, fecha_hasta: date, unidad: str) -> List[date]:
+    """Inicio de cada período de `unidad` entre dos fechas (inclusive)"""
+    actual = inicio_periodo(fecha_desde, unidad)
+    resultado = []
+    while actual <= fecha_hasta:
+        resultado.append(actual)
+        if unidad == "semana":
+            actual += timedelta(days=7)
+        elif unidad == "mes":
+            actual = date(actual.year + actual.month // 12, actual.month % 12 + 1, 1)
+        else:
+            actual += timedelta(days=1)
+    return resultado
@@ -0,0 +1,148 @@
+"""
+Instrumentación SQL por request
+
+Los eventos before/after_cursor_execute de SQLAlchemy (motor síncrono y el
+asíncrono, que comparten la clase Engine) cuentan cada sentencia contra las
+estadísticas del request en curso, guardadas en una ContextVar: los
+endpoints sync (threadpool) y async (greenlet de asyncpg) heredan el mismo
+objeto y lo actualizan en el lugar.
+
+Por request se registra:
+- cantidad de sentencias y tiempo total en la base de datos
+- huella de cada sentencia (texto normalizado, sin literales ni listas de
+  parámetros); si una misma huella se repite SQL_UMBRAL_N_MAS_1 veces o más
+  el request se marca como posible N+1 (lazy loads dentro de un bucle)
+
+En desarrollo se exponen como headers X-SQL-*; en producción se escribe una
+línea de log por request (WARNING si hay posible N+1).
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.sql")
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETRO = r"(?:\$\d+|%\([^)]*\)s|%s|\?)(?:::\w+)?"
+_PARAMETROS = re.compile(rf"{_PARAMETRO}(?:\s*,\s*{_PARAMETRO})*")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_sentencia(sentencia: str) -> str:
+    """Texto de la sentencia sin literales, con cada lista de parámetros como '?'"""
+    texto = _PARAMETROS.sub("?", sentencia)
+    texto = _LITERALES.sub("?", texto)
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+class EstadisticasSQL:
+    """Sentencias ejecutadas durante un request"""
+
+    def __init__(self):
+        self.sentencias = 0
+        self.segundos = 0.0
+        self.huellas: Counter = Counter()
+        self._textos = {}
+
+    def registrar(self, sentencia: str, segundos: float) -> None:
+        texto = normalizar_sentencia(sentencia)
+        huella = hashlib.sha1(texto.encode("utf-8")).hexdigest()[:10]
+        self.sentencias += 1
+        self.segundos += segundos
+        self.huellas[huella] += 1
+        self._textos.setdefault(huella, texto)
+
+    def repetidas(self, umbral: int) -> List[Tuple[str, int]]:
+        """(huella, veces) de las sentencias que alcanzan el umbral de N+1"""
+        return [(huella, veces) for huella, veces in self.huellas.most_common() if veces >= umbral]
+
+    def texto(self, huella: str) -> str:
+        return self._textos.get(huella, "")
+
+
+_estadisticas: ContextVar[Optional[EstadisticasSQL]] = ContextVar("estadisticas_sql", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if _estadisticas.get() is not None:
+        conn.info.setdefault("inicios_sql", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    estadisticas = _estadisticas.get()
+    inicios = conn.info.get("inicios_sql")
+    if estadisticas is None or not inicios:
+        return
+    estadisticas.registrar(statement, time.perf_counter() - inicios.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _error_al_ejecutar(contexto):
+    # La sentencia falló: after_cursor_execute no llega, descartar su inicio
+    inicios = contexto.connection.info.get("inicios_sql") if contexto.connection is not None else None
+    if inicios:
+        inicios.pop()
+
+
+class InstrumentacionSQLMiddleware:
+    """Middleware ASGI: estadísticas SQL de cada request HTTP"""
+
+    def __init__(self, app, umbral_n_mas_1: int = 5, headers: bool = False):
+        self.app = app
+        self.umbral = umbral_n_mas_1
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estadisticas = EstadisticasSQL()
+        token = _estadisticas.set(estadisticas)
+
+        async def enviar(mensaje):
+            # Lo ejecutado hasta que empieza la respuesta (en streaming puede haber más después)
+            if mensaje["type"] == "http.response.start" and self.headers:
+                repetidas = estadisticas.repetidas(self.umbral)
+                headers = list(mensaje.get("headers", []))
+                headers.append((b"x-sql-count", str(estadisticas.sentencias).encode()))
+                headers.append((b"x-sql-time-ms", f"{estadisticas.segundos * 1000:.1f}".encode()))
+                if repetidas:
+                    valor = ", ".join(f"{huella}={veces}" for huella, veces in repetidas)
+                    headers.append((b"x-sql-repeated", valor.encode()))
+                mensaje["headers"] = headers
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _estadisticas.reset(token)
+            self._log(scope, estadisticas)
+
+    def _log(self, scope, estadisticas: EstadisticasSQL) -> None:
+        if not estadisticas.sentencias:
+            return
+        ruta = f"{scope.get('method', '')} {scope.get('path', '')}"
+        repetidas = estadisticas.repetidas(self.umbral)
+        if repetidas:
+            huella, veces = repetidas[0]
+            logger.warning(
+                "Posible N+1 en %s: %d sentencias, %.1f ms; repetida %d veces: %s",
+                ruta, estadisticas.sentencias, estadisticas.segundos * 1000,
+                veces, estadisticas.texto(huella)[:300]
+            )
+        elif not self.headers:
+            logger.info(
+                "%s: %d sentencias, %.1f ms en la base de datos",
+                ruta, estadisticas.sentencias, estadisticas.segundos * 1000
+            )
+
@@ -0,0 +1,422 @@
+"""
+Métricas en formato de texto de Prometheus (GET /metrics)
+
+Registro en memoria del proceso, sin dependencias ni servicios externos:
+- latencia de requests por plantilla de ruta, método y status (histograma)
+- pool de conexiones de SQLAlchemy: conexiones en uso, overflow, tamaño y
+  tiempo de espera para obtener una conexión (histograma)
+- contadores de negocio: cobros, cierres de caja y PDF generados
+
+En el camino caliente solo hay un perf_counter, una búsqueda binaria en los
+buckets y un lock de pocos microsegundos.
+
+Cada worker tiene su propio registro en memoria. Con gunicorn todos los
+workers comparten el puerto y cada scrape llega a uno cualquiera, así que
+con METRICAS_DIR definido (python run.py --produccion lo define) cada
+worker publica una instantánea de su registro en ese directorio cada
+METRICAS_INTERVALO_SEGUNDOS y GET /metrics combina las de todos:
+- contadores e histogramas se suman entre workers; los de workers que ya
+  terminaron (reciclados por max_requests) se acumulan en historico.json
+  para que los totales no retrocedan
+- los gauges del pool son de cada proceso: se exponen con la etiqueta
+  worker=<pid> y desaparecen cuando el worker termina
+Un worker que termina de forma abrupta pierde lo contado desde su última
+instantánea.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+# Buckets en segundos (límite superior inclusive, como en Prometheus)
+BUCKETS_REQUEST = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_ESPERA_POOL = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(etiquetas: Etiquetas) -> str:
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in etiquetas) + "}"
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _etiquetas_de_json(etiquetas: list) -> Etiquetas:
+    return tuple(tuple(par) for par in etiquetas)
+
+
+class Contador:
+    """Contador monótono con etiquetas"""
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._valores: Dict[Etiquetas, float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, cantidad: float = 1, **etiquetas: str) -> None:
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def instantanea(self) -> Dict[Etiquetas, float]:
+        with self._lock:
+            return dict(self._valores)
+
+    @staticmethod
+    def combinar(partes: List[Tuple[str, Dict[Etiquetas, float]]]) -> Dict[Etiquetas, float]:
+        """Suma de los valores de todos los workers"""
+        total: Dict[Etiquetas, float] = {}
+        for _, valores in partes:
+            for etiquetas, valor in valores.items():
+                total[etiquetas] = total.get(etiquetas, 0) + valor
+        return total
+
+    def exponer(self, valores: Optional[Dict[Etiquetas, float]] = None) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        if valores is None:
+            valores = self.instantanea()
+        for etiquetas, valor in valores.items():
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(etiquetas)} {_numero(valor)}")
+        return lineas
+
+
+class Histograma:
+    """Histograma con buckets fijos y etiquetas"""
+
+    def __init__(self, nombre: str, ayuda: str, buckets: Tuple[float, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        # etiquetas -> [conteo por bucket (+Inf al final), suma]
+        self._series: Dict[Etiquetas, list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **etiquetas: str) -> None:
+        clave = tuple(sorted(etiquetas.items()))
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def instantanea(self) -> Dict[Etiquetas, list]:
+        with self._lock:
+            return {etiquetas: [list(conteos), suma] for etiquetas, (conteos, suma) in self._series.items()}
+
+    @staticmethod
+    def combinar(partes: List[Tuple[str, Dict[Etiquetas, list]]]) -> Dict[Etiquetas, list]:
+        """Suma bucket a bucket (y de las sumas) de todos los workers"""
+        total: Dict[Etiquetas, list] = {}
+        for _, series in partes:
+            for etiquetas, (conteos, suma) in series.items():
+                acumulada = total.get(etiquetas)
+                if acumulada is None:
+                    total[etiquetas] = [list(conteos), suma]
+                else:
+                    acumulada[0] = [a + b for a, b in zip(acumulada[0], conteos)]
+                    acumulada[1] += suma
+        return total
+
+    def exponer(self, series: Optional[Dict[Etiquetas, list]] = None) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        if series is None:
+            series = self.instantanea()
+        for etiquetas, (conteos, suma) in series.items():
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_formatear_etiquetas(etiquetas)} {repr(suma)}")
+            lineas.append(f"{self.nombre}_count{_formatear_etiquetas(etiquetas)} {acumulado}")
+        return lineas
+
+
+class Medidor:
+    """Gauge calculado al exponer (lee el valor actual de una función)"""
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._fuentes: List[Tuple[Etiquetas, Callable[[], float]]] = []
+
+    def agregar_fuente(self, leer: Callable[[], float], **etiquetas: str) -> None:
+        self._fuentes.append((tuple(sorted(etiquetas.items())), leer))
+
+    def instantanea(self) -> Dict[Etiquetas, float]:
+        return {etiquetas: leer() for etiquetas, leer in self._fuentes}
+
+    @staticmethod
+    def combinar(partes: List[Tuple[str, Dict[Etiquetas, float]]]) -> Dict[Etiquetas, float]:
+        """Un valor por worker (etiqueta worker=<pid>): un gauge de proceso no se suma"""
+        return {
+            etiquetas + (("worker", worker),): valor
+            for worker, valores in partes
+            for etiquetas, valor in valores.items()
+        }
+
+    def exponer(self, valores: Optional[Dict[Etiquetas, float]] = None) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} gauge"]
+        if valores is None:
+            valores = self.instantanea()
+        for etiquetas, valor in valores.items():
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(etiquetas)} {_numero(valor)}")
+        return lineas
+
+
+# ==================== MÉTRICAS DE LA APLICACIÓN ====================
+
+duracion_requests = Histograma(
+    "http_request_duration_seconds",
+    "Duración de los requests HTTP por plantilla de ruta",
+    BUCKETS_REQUEST
+)
+espera_pool = Histograma(
+    "db_pool_checkout_wait_seconds",
+    "Tiempo de espera para obtener una conexión del pool",
+    BUCKETS_ESPERA_POOL
+)
+conexiones_en_uso = Medidor("db_pool_checked_out", "Conexiones del pool en uso")
+conexiones_overflow = Medidor("db_pool_overflow", "Conexiones abiertas por encima de pool_size")
+tamano_pool = Medidor("db_pool_size", "Tamaño configurado del pool")
+
+cobros = Contador("cda_cobros_total", "Cobros registrados")
+cierres_caja = Contador("cda_cierres_caja_total", "Cajas cerradas")
+pdfs_generados = Contador("cda_pdfs_generados_total", "Comprobantes PDF generados")
+
+_METRICAS = (
+    duracion_requests,
+    espera_pool,
+    conexiones_en_uso,
+    conexiones_overflow,
+    tamano_pool,
+    cobros,
+    cierres_caja,
+    pdfs_generados,
+)
+
+
+def exponer_metricas() -> str:
+    """Todas las métricas en formato de texto de Prometheus (0.0.4), de todos los workers si se publican"""
+    combinadas = publicador_metricas.combinar() if publicador_metricas.activo else {}
+    lineas = []
+    for metrica in _METRICAS:
+        lineas.extend(metrica.exponer(combinadas.get(metrica.nombre)))
+    return "\n".join(lineas) + "\n"
+
+
+# ==================== VARIOS WORKERS ====================
+
+_HISTORICO = "historico.json"
+
+
+def _pid_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Existe, pero es de otro usuario
+        pass
+    return True
+
+
+def _leer_json(ruta: str) -> dict:
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _escribir_json(ruta: str, datos: dict) -> None:
+    """Escritura atómica: quien lee nunca ve un archivo a medias"""
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo)
+    os.replace(temporal, ruta)
+
+
+def _a_json(datos: dict) -> list:
+    return [[list(etiquetas), valor] for etiquetas, valor in datos.items()]
+
+
+def _de_json(datos: list) -> dict:
+    return {_etiquetas_de_json(etiquetas): valor for etiquetas, valor in datos}
+
+
+class PublicadorMetricas:
+    """Hilo que publica periódicamente el registro de este worker en METRICAS_DIR"""
+
+    def __init__(self):
+        self._directorio: Optional[str] = None
+        self._intervalo = 0.0
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self) -> None:
+        """Arrancar la publicación (startup del worker); sin METRICAS_DIR no hace nada"""
+        if self.activo or not settings.METRICAS_DIR:
+            return
+        self._directorio = settings.METRICAS_DIR
+        self._intervalo = settings.METRICAS_INTERVALO_SEGUNDOS
+        os.makedirs(self._directorio, exist_ok=True)
+        self._detener.clear()
+        self.publicar()
+        self._hilo = threading.Thread(target=self._ejecutar, name="publicador-metricas", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        """Última publicación y fin del hilo (shutdown del worker)"""
+        if not self.activo:
+            return
+        self._detener.set()
+        self._hilo.join(self._intervalo + 1)
+        self._hilo = None
+        self.publicar()
+
+    def _ejecutar(self) -> None:
+        while not self._detener.wait(self._intervalo):
+            self.publicar()
+
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self._directorio, nombre)
+
+    def publicar(self) -> None:
+        """Escribir la instantánea de este worker (<pid>.json)"""
+        datos = {metrica.nombre: _a_json(metrica.instantanea()) for metrica in _METRICAS}
+        _escribir_json(self._ruta(f"{os.getpid()}.json"), datos)
+
+    def combinar(self) -> Dict[str, dict]:
+        """Métricas de todos los workers; las de workers terminados pasan al histórico"""
+        self.publicar()
+        acumulables = [m.nombre for m in _METRICAS if not isinstance(m, Medidor)]
+
+        with open(self._ruta(".lock"), "w") as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            historico = _leer_json(self._ruta(_HISTORICO))
+            vivos = []
+            terminados = []
+            for nombre in os.listdir(self._directorio):
+                pid = nombre[:-len(".json")]
+                if not (nombre.endswith(".json") and pid.isdigit()):
+                    continue
+                datos = _leer_json(self._ruta(nombre))
+                if _pid_vivo(int(pid)):
+                    vivos.append((pid, datos))
+                else:
+                    terminados.append((pid, datos, nombre))
+
+            if terminados:
+                for metrica in _METRICAS:
+                    if metrica.nombre not in acumulables:
+                        continue
+                    partes = [("historico", _de_json(historico.get(metrica.nombre, [])))]
+                    partes += [(pid, _de_json(datos.get(metrica.nombre, []))) for pid, datos, _ in terminados]
+                    historico[metrica.nombre] = _a_json(metrica.combinar(partes))
+                _escribir_json(self._ruta(_HISTORICO), historico)
+                for _, _, nombre in terminados:
+                    os.remove(self._ruta(nombre))
+
+        combinadas = {}
+        for metrica in _METRICAS:
+            partes = [(pid, _de_json(datos.get(metrica.nombre, []))) for pid, datos in vivos]
+            if metrica.nombre in acumulables:
+                partes.append(("historico", _de_json(historico.get(metrica.nombre, []))))
+            combinadas[metrica.nombre] = metrica.combinar(partes)
+        return combinadas
+
+
+publicador_metricas = PublicadorMetricas()
+
+
+# ==================== POOL DE CONEXIONES ====================
+
+def _medir_espera(pool, obtener):
+    inicio = time.perf_counter()
+    try:
+        return obtener()
+    finally:
+        espera_pool.observar(time.perf_counter() - inicio, pool=pool._nombre_metricas)
+
+
+class QueuePoolMedido(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout (incluye abrir la conexión
+    si hace falta). Los eventos del pool solo avisan después del checkout.
+    """
+    _nombre_metricas = "sync"
+
+    def _do_get(self):
+        return _medir_espera(self, super()._do_get)
+
+
+class AsyncQueuePoolMedido(AsyncAdaptedQueuePool):
+    """Igual que QueuePoolMedido, para el motor asíncrono"""
+    _nombre_metricas = "async"
+
+    def _do_get(self):
+        return _medir_espera(self, super()._do_get)
+
+
+def registrar_pool(engine, nombre: str) -> None:
+    """Exponer los gauges del pool de `engine` (síncrono) con la etiqueta pool=nombre"""
+    # engine.pool se lee en cada exposición: dispose() lo reemplaza por uno nuevo
+    conexiones_en_uso.agregar_fuente(lambda: engine.pool.checkedout(), pool=nombre)
+    conexiones_overflow.agregar_fuente(lambda: max(engine.pool.overflow(), 0), pool=nombre)
+    tamano_pool.agregar_fuente(lambda: engine.pool.size(), pool=nombre)
+
+
+# ==================== MIDDLEWARE ====================
+
+class MetricasMiddleware:
+    """Middleware ASGI: duración de cada request por plantilla de ruta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = {"status": "500"}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = str(mensaje["status"])
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # Plantilla (/api/v1/cajas/{caja_id}), no la ruta real: cardinalidad acotada
+            ruta = scope.get("route")
+            duracion_requests.observar(
+                time.perf_counter() - inicio,
+                method=scope.get("method", ""),
+                route=getattr(ruta, "path", "sin_ruta"),
+                status=estado["status"]
+            )
@@ -0,0 +1,297 @@
+"""
+Middleware HTTP en ASGI puro (sin BaseHTTPMiddleware)
+
+BaseHTTPMiddleware corre cada request en una tarea aparte y pasa la
+respuesta por un stream intermedio; estos middleware solo envuelven `send`
+y no copian el cuerpo, así las respuestas en streaming (exportaciones,
+ZIP de comprobantes) siguen saliendo por bloques.
+
+- SecurityHeadersMiddleware: headers de seguridad en todas las respuestas
+- CompresionMiddleware: gzip o brotli (si está instalado) según
+  Accept-Encoding, para contenido de texto/JSON desde COMPRESION_MINIMO_BYTES
+  o en streaming
+- ETagMiddleware: ETag fuerte para las respuestas JSON de GET y 304 Not
+  Modified si el cliente ya tiene esa versión (el endpoint se ejecuta, pero
+  no se envía ni se comprime el cuerpo)
+
+Orden: ETag queda dentro de la compresión, así la huella es la del JSON sin
+comprimir. Al comprimir, la compresión agrega la codificación al ETag
+("abc" -> "abc-gzip"), porque cada representación necesita su propio
+validador fuerte; ETagMiddleware acepta ambas formas en If-None-Match.
+"""
+import hashlib
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli se usa solo gzip
+    brotli = None
+
+# Tipos de contenido que vale la pena comprimir (PDF, ZIP y XLSX ya vienen comprimidos)
+_TIPOS_COMPRIMIBLES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+_CODIFICACIONES = ("br", "gzip")
+
+
+def _tipo_base(headers: Headers) -> str:
+    return headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+# ==================== SEGURIDAD ====================
+
+class SecurityHeadersMiddleware:
+    """
+    Middleware para agregar headers de seguridad HTTP
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                headers = MutableHeaders(scope=mensaje)
+
+                # Headers de seguridad
+                headers["X-Content-Type-Options"] = "nosniff"
+                headers["X-Frame-Options"] = "DENY"
+                headers["X-XSS-Protection"] = "1; mode=block"
+                headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+
+                # Content Security Policy
+                if settings.ENVIRONMENT == "production":
+                    headers["Content-Security-Policy"] = "default-src 'self'"
+
+                # No revelar información del servidor
+                if "server" in headers:
+                    del headers["server"]
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
+
+
+# ==================== COMPRESIÓN ====================
+
+class _Compresor:
+    """gzip (zlib) o brotli con la misma interfaz incremental"""
+
+    def __init__(self, codificacion: str, nivel_gzip: int, calidad_brotli: int):
+        self.codificacion = codificacion
+        if codificacion == "br":
+            self._brotli = brotli.Compressor(quality=calidad_brotli)
+        else:
+            self._zlib = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def bloque(self, datos: bytes) -> bytes:
+        """Comprimir un bloque y vaciar el buffer (el cliente lo recibe ya)"""
+        if self.codificacion == "br":
+            return self._brotli.process(datos) + self._brotli.flush()
+        return self._zlib.compress(datos) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def final(self, datos: bytes = b"") -> bytes:
+        if self.codificacion == "br":
+            return self._brotli.process(datos) + self._brotli.finish()
+        return self._zlib.compress(datos) + self._zlib.flush()
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """Codificación a usar según Accept-Encoding (brotli si se puede, si no gzip)"""
+    aceptadas = set()
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if parametros.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        aceptadas.add(nombre.strip())
+    for codificacion in _CODIFICACIONES:
+        if codificacion in aceptadas and (codificacion != "br" or brotli is not None):
+            return codificacion
+    return None
+
+
+class CompresionMiddleware:
+    """Comprimir respuestas de texto/JSON grandes o en streaming"""
+
+    def __init__(self, app, minimo_bytes: int = 1024, nivel_gzip: int = 6, calidad_brotli: int = 4):
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+        self.nivel_gzip = nivel_gzip
+        self.calidad_brotli = calidad_brotli
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compresor: Optional[_Compresor] = None
+        sin_cambios = False
+
+        async def enviar(mensaje):
+            nonlocal inicio, compresor, sin_cambios
+
+            if mensaje["type"] == "http.response.start":
+                # Se retiene hasta ver el primer bloque del cuerpo
+                inicio = mensaje
+                return
+
+            if mensaje["type"] != "http.response.body":
+                if inicio is not None:
+                    await send(inicio)
+                    inicio = None
+                await send(mensaje)
+                return
+
+            cuerpo = mensaje.get("body", b"")
+            mas_cuerpo = mensaje.get("more_body", False)
+
+            if inicio is not None:
+                start, inicio = inicio, None
+                headers = MutableHeaders(scope=start)
+                comprimir = (
+                    200 <= start["status"] < 300 and start["status"] != 204
+                    and "content-encoding" not in headers
+                    and _tipo_base(headers).startswith(_TIPOS_COMPRIMIBLES)
+                    and (mas_cuerpo or len(cuerpo) >= self.minimo_bytes)
+                )
+                if _tipo_base(headers).startswith(_TIPOS_COMPRIMIBLES):
+                    headers.add_vary_header("Accept-Encoding")
+                if not comprimir:
+                    sin_cambios = True
+                    await send(start)
+                    await send(mensaje)
+                    return
+
+                compresor = _Compresor(codificacion, self.nivel_gzip, self.calidad_brotli)
+                headers["Content-Encoding"] = codificacion
+                etag = headers.get("etag")
+                if etag and etag.startswith('"'):
+                    headers["ETag"] = f'"{etag[1:-1]}-{codificacion}"'
+
+                if not mas_cuerpo:
+                    comprimido = compresor.final(cuerpo)
+                    headers["Content-Length"] = str(len(comprimido))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": comprimido})
+                    return
+
+                # Streaming: el largo final no se conoce
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send(start)
+                await send({"type": "http.response.body", "body": compresor.bloque(cuerpo), "more_body": True})
+                return
+
+            if sin_cambios:
+                await send(mensaje)
+            elif mas_cuerpo:
+                await send({"type": "http.response.body", "body": compresor.bloque(cuerpo), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compresor.final(cuerpo)})
+
+        await self.app(scope, receive, enviar)
+
+
+# ==================== ETAG / 304 ====================
+
+def _etag_coincidente(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Valor de If-None-Match que corresponde a `etag` (directo o con el sufijo
+    de codificación que agrega CompresionMiddleware), o None
+    """
+    for valor in if_none_match.split(","):
+        valor = valor.strip()
+        candidato = valor[2:] if valor.startswith("W/") else valor
+        if candidato in ("*", etag):
+            return valor if candidato != "*" else etag
+        for codificacion in _CODIFICACIONES:
+            if candidato == f'"{etag[1:-1]}-{codificacion}"':
+                return candidato
+    return None
+
+
+class ETagMiddleware:
+    """ETag fuerte y 304 Not Modified para las respuestas JSON de GET"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        inicio = None
+        sin_cambios = False
+
+        async def enviar(mensaje):
+            nonlocal inicio, sin_cambios
+
+            if mensaje["type"] == "http.response.start":
+                inicio = mensaje
+                return
+
+            if mensaje["type"] != "http.response.body" or sin_cambios:
+                if inicio is not None:
+                    await send(inicio)
+                    inicio = None
+                await send(mensaje)
+                return
+
+            start, inicio = inicio, None
+            headers = MutableHeaders(scope=start)
+            cuerpo = mensaje.get("body", b"")
+
+            # Solo JSON completo en un bloque (no streaming) y sin ETag propio
+            if (
+                start["status"] != 200
+                or mensaje.get("more_body", False)
+                or "etag" in headers
+                or _tipo_base(headers) != "application/json"
+            ):
+                sin_cambios = True
+                await send(start)
+                await send(mensaje)
+                return
+
+            etag = f'"{hashlib.blake2b(cuerpo, digest_size=16).hexdigest()}"'
+            # Datos privados: el navegador guarda la respuesta pero siempre revalida
+            if "cache-control" not in headers:
+                headers["Cache-Control"] = "private, no-cache"
+
+            coincidente = _etag_coincidente(if_none_match, etag) if if_none_match else None
+            if coincidente is None:
+                headers["ETag"] = etag
+                await send(start)
+                await send(mensaje)
+                return
+
+            # 304: mismos headers de caché, sin cuerpo
+            headers["ETag"] = coincidente
+            for nombre in ("content-length", "content-type"):
+                if nombre in headers:
+                    del headers[nombre]
+            await send({"type": "http.response.start", "status": 304, "headers": start["headers"]})
+            await send({"type": "http.response.body", "body": b""})
+
+        await self.app(scope, receive, enviar)
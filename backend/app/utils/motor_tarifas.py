@@ -0,0 +1,186 @@
+"""
+Motor de tarifas en memoria (Tarifa y ComisionSOAT)
+
+Las tarifas y comisiones cambian pocas veces al año, pero se consultan en
+cada registro, edición, cobro y venta de SOAT. El motor las carga una vez
+por proceso en un índice por tipo de vehículo e intervalos de antigüedad y
+vigencia, así que calcular un precio no toca la base de datos.
+
+Coherencia entre workers: los endpoints de tarifas incrementan el contador
+'tarifas' de versiones_cache en la misma transacción del cambio. Cada worker
+revisa ese contador como máximo cada TARIFAS_VERIFICACION_SEGUNDOS y recarga
+si su versión quedó atrás. El worker que hizo el cambio invalida al instante.
+"""
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.tarifa import Tarifa, ComisionSOAT
+from app.models.version_cache import VERSION_TARIFAS, select_version
+
+
+@dataclass(frozen=True)
+class TarifaVigente:
+    """Copia inmutable de una Tarifa activa"""
+    id: UUID
+    tipo_vehiculo: str
+    antiguedad_min: int
+    antiguedad_max: Optional[int]
+    vigencia_inicio: date
+    vigencia_fin: date
+    valor_rtm: Decimal
+    valor_terceros: Decimal
+    valor_total: Decimal
+
+    def aplica(self, antiguedad: int, fecha: date) -> bool:
+        return (
+            self.vigencia_inicio <= fecha <= self.vigencia_fin
+            and (self.antiguedad_max is None or antiguedad <= self.antiguedad_max)
+        )
+
+
+@dataclass(frozen=True)
+class ComisionVigente:
+    """Copia inmutable de una ComisionSOAT activa"""
+    id: UUID
+    tipo_vehiculo: str
+    valor_comision: Decimal
+    vigencia_inicio: date
+    vigencia_fin: Optional[date]
+
+    def aplica(self, fecha: date) -> bool:
+        return self.vigencia_inicio <= fecha and (self.vigencia_fin is None or fecha <= self.vigencia_fin)
+
+
+class IndiceTarifas:
+    """Snapshot inmutable de tarifas y comisiones activas"""
+
+    def __init__(self, tarifas: List[Tarifa], comisiones: List[ComisionSOAT]):
+        # tipo_vehiculo -> (antiguedad_min ordenadas, tarifas en el mismo orden)
+        por_tipo: Dict[str, List[TarifaVigente]] = {}
+        for t in tarifas:
+            por_tipo.setdefault(t.tipo_vehiculo, []).append(TarifaVigente(
+                id=t.id,
+                tipo_vehiculo=t.tipo_vehiculo,
+                antiguedad_min=t.antiguedad_min,
+                antiguedad_max=t.antiguedad_max,
+                vigencia_inicio=t.vigencia_inicio,
+                vigencia_fin=t.vigencia_fin,
+                valor_rtm=t.valor_rtm,
+                valor_terceros=t.valor_terceros,
+                valor_total=t.valor_total
+            ))
+        self.tarifas: Dict[str, Tuple[List[int], List[TarifaVigente]]] = {}
+        for tipo, lista in por_tipo.items():
+            lista.sort(key=lambda t: (t.antiguedad_min, t.vigencia_inicio))
+            self.tarifas[tipo] = ([t.antiguedad_min for t in lista], lista)
+
+        # tipo -> comisiones de la más reciente a la más antigua
+        self.comisiones: Dict[str, List[ComisionVigente]] = {}
+        for c in comisiones:
+            self.comisiones.setdefault(c.tipo_vehiculo, []).append(ComisionVigente(
+                id=c.id,
+                tipo_vehiculo=c.tipo_vehiculo,
+                valor_comision=c.valor_comision,
+                vigencia_inicio=c.vigencia_inicio,
+                vigencia_fin=c.vigencia_fin
+            ))
+        for lista in self.comisiones.values():
+            lista.sort(key=lambda c: c.vigencia_inicio, reverse=True)
+
+    def tarifa(self, tipo_vehiculo: str, antiguedad: int, fecha: date) -> Optional[TarifaVigente]:
+        entrada = self.tarifas.get(tipo_vehiculo)
+        if not entrada:
+            return None
+        minimos, lista = entrada
+        # Candidatas: antiguedad_min <= antiguedad, de la banda más alta a la más baja
+        for i in range(bisect_right(minimos, antiguedad) - 1, -1, -1):
+            if lista[i].aplica(antiguedad, fecha):
+                return lista[i]
+        return None
+
+    def comision(self, tipo_comision: str, fecha: date) -> Optional[ComisionVigente]:
+        for c in self.comisiones.get(tipo_comision, ()):
+            if c.aplica(fecha):
+                return c
+        return None
+
+
+def _select_tarifas_activas():
+    return select(Tarifa).where(Tarifa.activa == True)
+
+
+def _select_comisiones_activas():
+    return select(ComisionSOAT).where(ComisionSOAT.activa == True)
+
+
+class MotorTarifas:
+    """Cache por proceso de tarifas y comisiones, sincronizado por versión"""
+
+    def __init__(self, intervalo_verificacion: float):
+        self._intervalo = intervalo_verificacion
+        self._lock = threading.Lock()
+        self._indice: Optional[IndiceTarifas] = None
+        self._version: Optional[int] = None
+        self._verificado_en = 0.0
+
+    def _vigente(self, indice: Optional[IndiceTarifas]) -> bool:
+        return indice is not None and time.monotonic() - self._verificado_en < self._intervalo
+
+    def _publicar(self, version: int, tarifas, comisiones) -> IndiceTarifas:
+        indice = IndiceTarifas(tarifas, comisiones)
+        with self._lock:
+            self._indice = indice
+            self._version = version
+            self._verificado_en = time.monotonic()
+        return indice
+
+    def _marcar_verificado(self):
+        with self._lock:
+            self._verificado_en = time.monotonic()
+
+    def obtener(self, db) -> IndiceTarifas:
+        """
+        Índice vigente, recargándolo si otro worker cambió las tarifas (sesión síncrona).
+        Sin cambios y dentro del intervalo de verificación no consulta la base de datos.
+        """
+        indice = self._indice
+        if self._vigente(indice):
+            return indice
+        version = db.execute(select_version(VERSION_TARIFAS)).scalar() or 0
+        if indice is not None and version == self._version:
+            self._marcar_verificado()
+            return indice
+        tarifas = db.execute(_select_tarifas_activas()).scalars().all()
+        comisiones = db.execute(_select_comisiones_activas()).scalars().all()
+        return self._publicar(version, tarifas, comisiones)
+
+    async def obtener_async(self, db) -> IndiceTarifas:
+        """Igual que obtener() pero con AsyncSession"""
+        indice = self._indice
+        if self._vigente(indice):
+            return indice
+        version = (await db.execute(select_version(VERSION_TARIFAS))).scalar() or 0
+        if indice is not None and version == self._version:
+            self._marcar_verificado()
+            return indice
+        tarifas = (await db.execute(_select_tarifas_activas())).scalars().all()
+        comisiones = (await db.execute(_select_comisiones_activas())).scalars().all()
+        return self._publicar(version, tarifas, comisiones)
+
+    def invalidar(self) -> None:
+        """Forzar recarga en la próxima consulta (llamar después del commit del cambio)"""
+        with self._lock:
+            self._indice = None
+            self._version = None
+
+
+motor_tarifas = MotorTarifas(settings.TARIFAS_VERIFICACION_SEGUNDOS)
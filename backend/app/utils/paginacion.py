@@ -0,0 +1,80 @@
+"""
+Paginación por cursor (keyset) sobre (timestamp, id)
+
+En lugar de offset(skip), cada página continúa desde la última fila de la
+anterior: WHERE (fecha, id) < (:fecha, :id) ORDER BY fecha DESC, id DESC.
+Con el índice (fecha, id) cada página cuesta lo mismo sin importar qué tan
+atrás esté en el histórico.
+
+El cursor es opaco para el cliente (base64 de "fecha|id"). Los endpoints
+que ya devolvían una lista lo envían en el header X-Next-Cursor para no
+cambiar la forma de la respuesta.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+HEADER_NEXT_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(momento: datetime, id_: UUID) -> str:
+    """Cursor opaco a partir de la fecha e id de la última fila de la página"""
+    crudo = f"{momento.isoformat()}|{id_}".encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Fecha e id codificados en el cursor; 400 si el cursor no es válido"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode("utf-8")
+        momento, id_ = crudo.split("|", 1)
+        return datetime.fromisoformat(momento), UUID(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def consulta_keyset(query, columna_fecha, columna_id, cursor: Optional[str], limit: int):
+    """Query de una página keyset: filtro del cursor, orden descendente y limit + 1 filas"""
+    if cursor:
+        momento, id_ = decodificar_cursor(cursor)
+        query = query.filter(tuple_(columna_fecha, columna_id) < tuple_(momento, id_))
+
+    return query.order_by(columna_fecha.desc(), columna_id.desc()).limit(limit + 1)
+
+
+def paginar_keyset(query, columna_fecha, columna_id, cursor: Optional[str], limit: int):
+    """
+    Aplicar paginación keyset descendente (más recientes primero) a un query.
+
+    Devuelve (items, next_cursor); next_cursor es None en la última página.
+    """
+    # Los endpoints validan limit >= 1; con 0 no habría última fila para el cursor
+    limit = max(limit, 1)
+
+    filas = consulta_keyset(query, columna_fecha, columna_id, cursor, limit).all()
+
+    if len(filas) <= limit:
+        return filas, None
+
+    items = filas[:limit]
+    ultimo = items[-1]
+    next_cursor = codificar_cursor(
+        getattr(ultimo, columna_fecha.key),
+        getattr(ultimo, columna_id.key)
+    )
+    return items, next_cursor
+
+
+def agregar_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Enviar el cursor de la siguiente página en el header X-Next-Cursor"""
+    if next_cursor:
+        response.headers[HEADER_NEXT_CURSOR] = next_cursor
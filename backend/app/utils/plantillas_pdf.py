@@ -0,0 +1,164 @@
+"""
+Plantillas de comprobantes PDF
+
+Lo que no cambia entre documentos se prepara una sola vez por proceso:
+- colores, estilos de párrafo y TableStyle (los módulos de comprobantes los
+  definen a nivel de módulo con estas utilidades)
+- el logo: se decodifica y se reduce al tamaño de impresión la primera vez
+  (antes cada PDF leía y comprimía el PNG original)
+
+El encabezado (logo, título, subtítulo) y el pie de página son fijos, así que
+se dibujan directo en el canvas en lugar de pasar por flowables de platypus;
+las tablas con datos siguen siendo platypus.
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from typing import List, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import SimpleDocTemplate
+
+RUTA_LOGO = os.path.join(os.path.dirname(__file__), 'logo_cda.png')
+
+# Resolución a la que se guarda el logo reducido (suficiente para impresión)
+_DPI_LOGO = 200
+
+# Colores de los comprobantes
+AZUL_MARINO = colors.HexColor('#0a1d3d')
+BORDE = colors.HexColor('#cccccc')
+BORDE_SUAVE = colors.HexColor('#e0e0e0')
+FONDO_VALOR = colors.HexColor('#f5f5f5')
+FONDO_ETIQUETA = colors.HexColor('#f0f4f8')
+FONDO_AMARILLO = colors.HexColor('#fffbeb')
+FONDO_VERDE = colors.HexColor('#e8f5e9')
+ROJO = colors.HexColor('#dc2626')
+VERDE = colors.HexColor('#16a34a')
+
+_estilos_base = getSampleStyleSheet()
+
+
+def estilo_parrafo(nombre: str, base: str = 'Normal', **atributos) -> ParagraphStyle:
+    """ParagraphStyle derivado de la hoja de estilos de reportlab (creada una sola vez)"""
+    return ParagraphStyle(nombre, parent=_estilos_base[base], **atributos)
+
+
+@lru_cache(maxsize=None)
+def logo(lado: float) -> Optional[ImageReader]:
+    """Logo decodificado y reducido para imprimirse en un cuadro de `lado` puntos"""
+    if not os.path.exists(RUTA_LOGO):
+        return None
+    try:
+        from PIL import Image as ImagenPIL
+    except ImportError:
+        return ImageReader(RUTA_LOGO)
+
+    with ImagenPIL.open(RUTA_LOGO) as imagen:
+        imagen.load()
+        lado_px = max(1, int(lado / 72 * _DPI_LOGO))
+        reducida = imagen.copy()
+    reducida.thumbnail((lado_px, lado_px))  # Solo reduce y mantiene la proporción
+    lector = ImageReader(reducida)
+    lector.getRGBData()  # Decodificar ahora; ImageReader guarda el resultado
+    return lector
+
+
+def _medidas_logo(lado: float):
+    """(imagen, ancho, alto) del logo dentro de un cuadro de `lado` puntos"""
+    imagen = logo(lado)
+    if imagen is None:
+        return None, 0, 0
+    ancho_px, alto_px = imagen.getSize()
+    escala = min(lado / ancho_px, lado / alto_px)
+    return imagen, ancho_px * escala, alto_px * escala
+
+
+@dataclass(frozen=True)
+class Encabezado:
+    """Logo, título y subtítulo centrados en la parte superior de la primera página"""
+    titulo: str
+    subtitulo: str
+    lado_logo: float        # Cuadro del logo (proporcional)
+    titulo_pt: float
+    subtitulo_pt: float
+    espacio_logo: float     # Entre el logo y el título
+    espacio_titulo: float   # Entre el título y el subtítulo
+    espacio_final: float    # Entre el subtítulo y el contenido
+
+    @property
+    def alto(self) -> float:
+        """Alto total que ocupa (se suma al margen superior del documento)"""
+        _, _, alto_logo = _medidas_logo(self.lado_logo)
+        if alto_logo:
+            alto_logo += self.espacio_logo
+        return (
+            alto_logo
+            + self.titulo_pt * 1.2 + self.espacio_titulo
+            + self.subtitulo_pt * 1.2 + self.espacio_final
+        )
+
+    def dibujar(self, canvas, ancho_pagina: float, y_superior: float) -> None:
+        y = y_superior
+        imagen, ancho_logo, alto_logo = _medidas_logo(self.lado_logo)
+        if imagen is not None:
+            canvas.drawImage(imagen, (ancho_pagina - ancho_logo) / 2, y - alto_logo, ancho_logo, alto_logo, mask='auto')
+            y -= alto_logo + self.espacio_logo
+
+        canvas.setFillColor(AZUL_MARINO)
+        y -= self.titulo_pt
+        canvas.setFont('Helvetica-Bold', self.titulo_pt)
+        canvas.drawCentredString(ancho_pagina / 2, y, self.titulo)
+
+        y -= self.titulo_pt * 0.2 + self.espacio_titulo + self.subtitulo_pt
+        canvas.setFont('Helvetica', self.subtitulo_pt)
+        canvas.drawCentredString(ancho_pagina / 2, y, self.subtitulo)
+
+
+def construir_pdf(
+    elementos: List,
+    encabezado: Encabezado,
+    texto_pie: str,
+    pie_pt: float,
+    margen_superior: float,
+    margen_inferior: float,
+    margen_lateral: float = inch
+) -> BytesIO:
+    """
+    Armar el PDF (carta): encabezado en el canvas de la primera página, pie
+    en todas y los `elementos` platypus en el espacio restante.
+    """
+    buffer = BytesIO()
+    ancho_pagina, alto_pagina = letter
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        topMargin=margen_superior + encabezado.alto,
+        bottomMargin=margen_inferior + pie_pt * 2,
+        leftMargin=margen_lateral,
+        rightMargin=margen_lateral
+    )
+
+    def pie(canvas):
+        canvas.setFont('Helvetica', pie_pt)
+        canvas.setFillColor(colors.gray)
+        canvas.drawCentredString(ancho_pagina / 2, margen_inferior, texto_pie)
+
+    def primera_pagina(canvas, _doc):
+        canvas.saveState()
+        encabezado.dibujar(canvas, ancho_pagina, alto_pagina - margen_superior)
+        pie(canvas)
+        canvas.restoreState()
+
+    def paginas_siguientes(canvas, _doc):
+        canvas.saveState()
+        pie(canvas)
+        canvas.restoreState()
+
+    doc.build(elementos, onFirstPage=primera_pagina, onLaterPages=paginas_siguientes)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,104 @@
+"""
+Ejecutor de render de comprobantes PDF
+
+reportlab es Python puro y usa CPU durante todo el render; hecho dentro del
+event loop (o en muchos hilos a la vez) frena al resto de requests. Los
+comprobantes de comprobantes.py y comprobantes_caja.py se generan en un pool
+de procesos acotado (RENDER_PDF_PROCESOS) y nunca hay más de
+RENDER_PDF_MAXIMO_SIMULTANEOS renders en curso o en cola por worker; si no
+hay cupo en RENDER_PDF_ESPERA_SEGUNDOS se responde 503 en lugar de acumular
+trabajo.
+
+Con RENDER_PDF_PROCESOS = 0 se usa un pool de hilos (entornos donde no se
+pueden crear procesos).
+
+El generador se puede pasar como "modulo:funcion": se importa dentro del
+pool, así el worker web no carga reportlab (ver GENERADORES en
+almacen_comprobantes).
+"""
+import importlib
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Union
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.utils.metricas import pdfs_generados
+
+
+def _resolver(generar: Union[Callable, str]) -> Callable:
+    """Función generadora a partir de "modulo:funcion" (o la función misma)"""
+    if callable(generar):
+        return generar
+    modulo, _, nombre = generar.partition(":")
+    return getattr(importlib.import_module(modulo), nombre)
+
+
+def _nombre_documento(generar: Union[Callable, str]) -> str:
+    """Nombre de la función generadora (etiqueta de la métrica de PDF generados)"""
+    return generar.rpartition(":")[2] if isinstance(generar, str) else generar.__name__
+
+
+def _renderizar(generar: Union[Callable, str], datos: dict) -> bytes:
+    """Corre en el proceso del pool: genera el PDF y devuelve sus bytes"""
+    return _resolver(generar)(**datos).getvalue()
+
+
+class EjecutorRender:
+    """Pool acotado para generar PDF fuera del event loop"""
+
+    def __init__(self, procesos: int, maximo_simultaneos: int, espera_segundos: float):
+        self._procesos = procesos
+        self._maximo = maximo_simultaneos
+        self._espera = espera_segundos
+        self._cupos = threading.BoundedSemaphore(maximo_simultaneos)
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _obtener_pool(self) -> Executor:
+        # Se crea al primer render: los workers que no generan PDF no levantan procesos
+        with self._lock:
+            if self._pool is None:
+                if self._procesos > 0:
+                    # spawn: no hereda hilos ni conexiones abiertas del worker
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self._procesos,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self._maximo, thread_name_prefix="render-pdf")
+            return self._pool
+
+    def renderizar(self, generar: Union[Callable, str], datos: dict) -> bytes:
+        """
+        Generar un PDF con `generar(**datos)` en el pool y devolver sus bytes.
+        Bloquea el hilo que llama (usar desde endpoints sync o run_in_threadpool).
+        """
+        if not self._cupos.acquire(timeout=self._espera):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Hay demasiados comprobantes generándose. Intenta de nuevo en unos segundos."
+            )
+        try:
+            contenido = self._obtener_pool().submit(_renderizar, generar, datos).result()
+        finally:
+            self._cupos.release()
+        pdfs_generados.incrementar(documento=_nombre_documento(generar))
+        return contenido
+
+    def detener(self) -> None:
+        """Cerrar el pool (shutdown de la aplicación)"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+# Instancia global (un pool por worker)
+ejecutor_render = EjecutorRender(
+    settings.RENDER_PDF_PROCESOS,
+    settings.RENDER_PDF_MAXIMO_SIMULTANEOS,
+    settings.RENDER_PDF_ESPERA_SEGUNDOS
+)
@@ -0,0 +1,127 @@
+"""
+Benchmark de arranque del worker
+
+1. Tiempo de importación de app.main (python -X importtime): total, los
+   paquetes que más pesan y si se cargaron los módulos que deberían
+   importarse recién al usarse (reportlab, smtplib, openpyxl).
+2. Tiempo hasta el primer request: levanta uvicorn con app.main:app y mide
+   cuánto tarda /health en responder 200 (incluye init_db, checkpoints y
+   la verificación de la huella del esquema). Requiere la base de datos
+   configurada en .env; se omite con --sin-servidor.
+
+Uso:
+    python benchmarks/bench_arranque.py --arranques 5
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from statistics import median
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Deben quedar fuera del arranque (se importan en el primer uso)
+MODULOS_DIFERIDOS = ("reportlab", "smtplib", "openpyxl")
+
+
+def _importtime() -> dict:
+    """Microsegundos acumulados por módulo al importar app.main"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=DIRECTORIO_BACKEND,
+        capture_output=True,
+        text=True
+    )
+    if resultado.returncode != 0:
+        print(resultado.stderr[-2000:])
+        raise SystemExit("No se pudo importar app.main")
+
+    acumulado = {}
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, propio_acumulado_nombre = linea.split(":", 1)
+        _, acumulado_us, nombre = propio_acumulado_nombre.split("|")
+        acumulado[nombre.strip()] = int(acumulado_us)
+    return acumulado
+
+
+def _reporte_importacion(top: int) -> None:
+    acumulado = _importtime()
+
+    # Paquete de primer nivel: el acumulado de su módulo raíz
+    por_paquete = defaultdict(int)
+    for nombre, microsegundos in acumulado.items():
+        if "." not in nombre:
+            por_paquete[nombre] = max(por_paquete[nombre], microsegundos)
+
+    print(f"Importar app.main: {acumulado.get('app.main', 0) / 1000:.1f} ms")
+    print()
+    print(f"{'paquete':<30} {'ms':>8}")
+    for nombre, microsegundos in sorted(por_paquete.items(), key=lambda item: -item[1])[:top]:
+        print(f"{nombre:<30} {microsegundos / 1000:>8.1f}")
+    print()
+    for modulo in MODULOS_DIFERIDOS:
+        estado = "CARGADO al arrancar" if modulo in acumulado else "diferido"
+        print(f"{modulo:<30} {estado}")
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _primer_request(espera_maxima: float) -> float:
+    """Segundos desde lanzar uvicorn hasta el primer /health con 200"""
+    puerto = _puerto_libre()
+    inicio = time.perf_counter()
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(puerto)],
+        cwd=DIRECTORIO_BACKEND,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - inicio < espera_maxima:
+            if servidor.poll() is not None:
+                raise SystemExit("uvicorn terminó antes de responder (¿base de datos disponible?)")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/health", timeout=1) as respuesta:
+                    if respuesta.status == 200:
+                        return time.perf_counter() - inicio
+            except OSError:
+                time.sleep(0.02)
+        raise SystemExit(f"Sin respuesta de /health en {espera_maxima:.0f} s")
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación y de arranque del worker")
+    parser.add_argument("--arranques", type=int, default=5, help="Arranques de uvicorn a medir")
+    parser.add_argument("--top", type=int, default=15, help="Paquetes a listar")
+    parser.add_argument("--espera", type=float, default=60.0, help="Segundos máximos por arranque")
+    parser.add_argument("--sin-servidor", action="store_true", help="Solo medir la importación")
+    args = parser.parse_args()
+
+    _reporte_importacion(args.top)
+
+    if args.sin_servidor:
+        return
+
+    # El primer arranque puede aplicar el esquema y guardar la huella; se reporta aparte
+    tiempos = [_primer_request(args.espera) for _ in range(max(args.arranques, 1))]
+    print()
+    print(f"Primer request (primer arranque):   {tiempos[0] * 1000:>8.0f} ms")
+    if len(tiempos) > 1:
+        print(f"Primer request (siguientes, p50):   {median(tiempos[1:]) * 1000:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmark de get_current_user (cache de usuarios autenticados)
+
+Resuelve la dependencia get_current_user + get_admin N veces contra la base
+de datos configurada y compara:
+  - sin_cache: el cache se vacía antes de cada llamada (una consulta por request)
+  - con_cache: el usuario ya está en cache (sin consultas)
+
+Muestra microsegundos por llamada y sentencias SQL emitidas.
+
+Uso:
+    python benchmarks/bench_cache_usuarios.py --email admin@cdalaflorida.com --iteraciones 5000
+"""
+import argparse
+import os
+import sys
+import time
+from statistics import median
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app.core.deps import get_current_user, get_admin
+from app.core.security import create_access_token
+from app.db.database import SessionLocal, engine
+from app.models.usuario import Usuario
+from app.utils.cache_usuarios import cache_usuarios
+
+
+def _medir(token: str, iteraciones: int, vaciar_cache: bool, sentencias: list) -> tuple:
+    tiempos = []
+    sentencias.clear()
+    for _ in range(iteraciones):
+        if vaciar_cache:
+            cache_usuarios.limpiar()
+        db = SessionLocal()
+        try:
+            inicio = time.perf_counter()
+            get_admin(get_current_user(token=token, db=db))
+            tiempos.append(time.perf_counter() - inicio)
+        finally:
+            db.close()
+    return tiempos, len(sentencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de get_current_user")
+    parser.add_argument("--email", default="admin@cdalaflorida.com", help="Usuario administrador existente")
+    parser.add_argument("--iteraciones", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        usuario = db.query(Usuario).filter(Usuario.email == args.email).first()
+    finally:
+        db.close()
+    if usuario is None:
+        sys.exit(f"No existe el usuario {args.email}")
+    token = create_access_token({"sub": str(usuario.id)})
+
+    sentencias = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    # Calentar conexiones del pool y la verificación de versión
+    _medir(token, 50, True, sentencias)
+
+    print(f"{'modo':<10} {'us/llamada (mediana)':>22} {'p99 us':>10} {'consultas':>10}")
+    for modo, vaciar in (("sin_cache", True), ("con_cache", False)):
+        tiempos, total_sql = _medir(token, args.iteraciones, vaciar, sentencias)
+        ordenados = sorted(tiempos)
+        p99 = ordenados[int(len(ordenados) * 0.99) - 1]
+        print(f"{modo:<10} {median(tiempos) * 1e6:>22.1f} {p99 * 1e6:>10.1f} {total_sql:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Prueba de carga con la mezcla de tráfico de un día del CDA
+
+Clientes concurrentes repartidos en tres perfiles (proporción de --clientes):
+  - recepcion (30%): registra vehículos
+  - cajero (50%): consulta /vehiculos/pendientes y cobra el primero que
+    ningún otro cajero haya tomado
+  - admin (20%): abre el dashboard general y descarga comprobantes de
+    cierre de caja y de egreso
+Cada cliente espera --pausa segundos (±50%) entre acciones, como un usuario
+real; con --pausa 0 se mide el throughput máximo. Las muestras de los
+primeros --calentamiento segundos se descartan.
+
+Destino:
+  --url http://...  servidor ya levantado (run.py, o run.py --produccion)
+  --en-proceso      app.main:app en este mismo proceso vía httpx.ASGITransport,
+                    sin servidor HTTP. Usa la DATABASE_URL del .env: una
+                    PostgreSQL local desechable, p. ej.
+                    docker run -e POSTGRES_PASSWORD=... -p 5432:5432 postgres:16
+
+Reporta throughput y p50/p95/p99 por endpoint. Con --salida guarda el
+resultado en JSON (incluye el commit), y con --comparar muestra la
+diferencia contra otra corrida y termina con código 1 si algún p95 empeora
+más de --tolerancia %.
+
+IMPORTANTE: registra y cobra vehículos reales. Usar SOLO contra una base de
+datos de pruebas, con una caja abierta para el usuario.
+
+Uso:
+    python benchmarks/bench_carga.py --en-proceso --clientes 30 --duracion 60 \\
+        --salida carga_nuevo.json --comparar carga_base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from statistics import median
+
+import httpx
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_concurrencia import _login, _percentil, _placa_aleatoria
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PERFILES = {"recepcion": 0.3, "cajero": 0.5, "admin": 0.2}
+
+# Acciones del administrador y su peso relativo
+ACCIONES_ADMIN = (("dashboard_general", 3), ("comprobante_cierre", 1), ("comprobante_egreso", 1))
+
+
+class Carga:
+    """Estado compartido por todos los clientes de una corrida"""
+
+    def __init__(self, client: httpx.AsyncClient, headers: dict, args):
+        self.client = client
+        self.headers = headers
+        self.args = args
+        self.muestras = []  # (endpoint, inicio relativo, segundos, status)
+        self.reclamados = set()  # Vehículos que ya tomó algún cajero
+        self.cajas_cerradas = []
+        self.egresos = []
+        self.inicio = time.perf_counter()
+
+    async def medir(self, nombre: str, metodo: str, ruta: str, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.client.request(metodo, ruta, headers=self.headers, **kwargs)
+            status = respuesta.status_code
+        except httpx.HTTPError:
+            respuesta, status = None, 0
+        self.muestras.append((nombre, inicio - self.inicio, time.perf_counter() - inicio, status))
+        return respuesta
+
+    async def pausa(self):
+        if self.args.pausa > 0:
+            await asyncio.sleep(self.args.pausa * random.uniform(0.5, 1.5))
+
+
+# ==================== PERFILES ====================
+
+async def _recepcion(carga: Carga):
+    await carga.medir("registrar", "POST", "/api/v1/vehiculos/registrar", json={
+        "placa": _placa_aleatoria(),
+        "tipo_vehiculo": random.choice(["moto", "moto", "carro"]),
+        "ano_modelo": random.randint(2005, 2024),
+        "cliente_nombre": "Cliente Carga",
+        "cliente_documento": "1234567890",
+        "tiene_soat": random.random() < 0.5
+    })
+
+
+async def _cajero(carga: Carga):
+    r = await carga.medir("pendientes", "GET", "/api/v1/vehiculos/pendientes")
+    if r is None or r.status_code != 200:
+        return
+    for vehiculo in r.json().get("vehiculos", []):
+        if vehiculo["id"] not in carga.reclamados:
+            carga.reclamados.add(vehiculo["id"])
+            await carga.medir("cobrar", "POST", "/api/v1/vehiculos/cobrar", json={
+                "vehiculo_id": vehiculo["id"],
+                "metodo_pago": random.choice(["efectivo", "efectivo", "tarjeta_debito", "transferencia"]),
+                "tiene_soat": False
+            })
+            return
+
+
+async def _admin(carga: Carga):
+    nombres = [nombre for nombre, _ in ACCIONES_ADMIN]
+    pesos = [peso for _, peso in ACCIONES_ADMIN]
+    accion = random.choices(nombres, weights=pesos)[0]
+
+    if accion == "comprobante_cierre" and carga.cajas_cerradas:
+        caja_id = random.choice(carga.cajas_cerradas)
+        await carga.medir(accion, "GET", f"/api/v1/cajas/{caja_id}/comprobante-cierre")
+    elif accion == "comprobante_egreso" and carga.egresos:
+        movimiento_id = random.choice(carga.egresos)
+        await carga.medir(accion, "GET", f"/api/v1/tesoreria/movimientos/{movimiento_id}/comprobante")
+    else:
+        await carga.medir("dashboard_general", "GET", "/api/v1/reportes/dashboard-general")
+
+
+ACCIONES_PERFIL = {"recepcion": _recepcion, "cajero": _cajero, "admin": _admin}
+
+
+def repartir_clientes(clientes: int) -> dict:
+    """Clientes por perfil según PERFILES (al menos uno de cada uno)"""
+    reparto = {perfil: max(1, round(clientes * proporcion)) for perfil, proporcion in PERFILES.items()}
+    reparto["cajero"] = max(1, clientes - reparto["recepcion"] - reparto["admin"])
+    return reparto
+
+
+# ==================== EJECUCIÓN ====================
+
+async def _preparar(carga: Carga):
+    """Cajas cerradas y egresos existentes para las descargas de comprobantes"""
+    r = await carga.client.get("/api/v1/cajas/historial", headers=carga.headers, params={"limit": 100})
+    if r.status_code == 200:
+        carga.cajas_cerradas = [c["id"] for c in r.json() if c.get("estado") == "cerrada"]
+    r = await carga.client.get("/api/v1/tesoreria/movimientos", headers=carga.headers, params={"limit": 200})
+    if r.status_code == 200:
+        carga.egresos = [m["id"] for m in r.json() if str(m.get("tipo")).lower() == "egreso"]
+
+
+async def _correr(client: httpx.AsyncClient, args) -> dict:
+    token = await _login(client, args.email, args.password)
+    carga = Carga(client, {"Authorization": f"Bearer {token}"}, args)
+    await _preparar(carga)
+
+    reparto = repartir_clientes(args.clientes)
+    fin = time.perf_counter() + args.calentamiento + args.duracion
+
+    async def cliente(perfil: str):
+        accion = ACCIONES_PERFIL[perfil]
+        # Desfasar el arranque para que no todos pidan lo mismo a la vez
+        await asyncio.sleep(random.uniform(0, min(args.pausa, 1.0)))
+        while time.perf_counter() < fin:
+            await accion(carga)
+            await carga.pausa()
+
+    carga.inicio = time.perf_counter()
+    await asyncio.gather(*(
+        cliente(perfil) for perfil, cantidad in reparto.items() for _ in range(cantidad)
+    ))
+    return _resumir(carga, reparto)
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=DIRECTORIO_BACKEND, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _resumir(carga: Carga, reparto: dict) -> dict:
+    args = carga.args
+    muestras = [m for m in carga.muestras if m[1] >= args.calentamiento]
+    resultado = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "destino": "en_proceso" if args.en_proceso else args.url,
+        "clientes": reparto,
+        "pausa_s": args.pausa,
+        "duracion_s": args.duracion,
+        "total_requests": len(muestras),
+        "requests_por_segundo": round(len(muestras) / args.duracion, 1),
+        "errores": sum(1 for m in muestras if m[3] == 0 or m[3] >= 400),
+        "endpoints": {}
+    }
+    for nombre in sorted({m[0] for m in muestras}):
+        latencias = [m[2] * 1000 for m in muestras if m[0] == nombre]
+        resultado["endpoints"][nombre] = {
+            "requests": len(latencias),
+            "requests_por_segundo": round(len(latencias) / args.duracion, 2),
+            "errores": sum(1 for m in muestras if m[0] == nombre and (m[3] == 0 or m[3] >= 400)),
+            "p50_ms": round(median(latencias), 1),
+            "p95_ms": round(_percentil(latencias, 95), 1),
+            "p99_ms": round(_percentil(latencias, 99), 1),
+            "max_ms": round(max(latencias), 1)
+        }
+    return resultado
+
+
+async def ejecutar(args) -> dict:
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+
+    if not args.en_proceso:
+        async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=60) as client:
+            return await _correr(client, args)
+
+    from app.main import app
+    # Sin servidor: los eventos de startup (init_db, calentamiento) se corren a mano
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://carga", timeout=60) as client:
+            return await _correr(client, args)
+
+
+# ==================== REPORTE ====================
+
+def _imprimir(resultado: dict):
+    clientes = ", ".join(f"{perfil}={cantidad}" for perfil, cantidad in resultado["clientes"].items())
+    print(f"\n{resultado['requests_por_segundo']} req/s "
+          f"({resultado['total_requests']} requests en {resultado['duracion_s']} s, "
+          f"{resultado['errores']} errores; clientes: {clientes})")
+    print(f"  {'endpoint':<20} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    for nombre, datos in resultado["endpoints"].items():
+        print(f"  {nombre:<20} {datos['requests_por_segundo']:>7} {datos['p50_ms']:>8} "
+              f"{datos['p95_ms']:>8} {datos['p99_ms']:>8} {datos['errores']:>8}")
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> bool:
+    """Imprimir la diferencia de p95 por endpoint; True si alguno empeoró más que la tolerancia"""
+    print(f"\nComparación contra {base.get('commit') or 'base'} ({base.get('fecha', '')}):")
+    print(f"  throughput: {base['requests_por_segundo']} -> {actual['requests_por_segundo']} req/s")
+    regresion = False
+    for nombre in sorted(set(actual["endpoints"]) | set(base["endpoints"])):
+        antes = base["endpoints"].get(nombre)
+        despues = actual["endpoints"].get(nombre)
+        if antes is None or despues is None:
+            print(f"  {nombre:<20} solo en {'la corrida actual' if antes is None else 'la base'}")
+            continue
+        cambio = (despues["p95_ms"] - antes["p95_ms"]) / antes["p95_ms"] * 100 if antes["p95_ms"] else 0.0
+        marca = ""
+        if cambio > tolerancia:
+            marca = "  <-- REGRESIÓN"
+            regresion = True
+        print(f"  {nombre:<20} p95 {antes['p95_ms']:>8} -> {despues['p95_ms']:>8} ms ({cambio:+.1f}%){marca}")
+    return regresion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con la mezcla de tráfico del CDA")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--en-proceso", action="store_true", help="Correr app.main:app en este proceso (sin servidor)")
+    parser.add_argument("--email", default="admin@cdalaflorida.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--clientes", type=int, default=30, help="Clientes concurrentes (repartidos por perfil)")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=5, help="Segundos iniciales descartados")
+    parser.add_argument("--pausa", type=float, default=0.5, help="Segundos entre acciones de cada cliente (0 = sin pausa)")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla aleatoria para repetir la mezcla")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--comparar", help="Resultado JSON de otra corrida para comparar")
+    parser.add_argument("--tolerancia", type=float, default=10.0, help="Empeoramiento de p95 tolerado (%%)")
+    args = parser.parse_args()
+
+    if args.semilla is not None:
+        random.seed(args.semilla)
+
+    resultado = asyncio.run(ejecutar(args))
+    _imprimir(resultado)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        if comparar(resultado, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
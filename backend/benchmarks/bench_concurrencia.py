@@ -0,0 +1,148 @@
+"""
+Benchmark de concurrencia para los endpoints de recepción y caja
+
+Mide requests/segundo y latencias bajo N clientes concurrentes contra un
+servidor ya levantado. Para comparar antes/después, correrlo con el mismo
+servidor (mismos workers, misma base de datos) en cada versión del código.
+
+IMPORTANTE: registra y cobra vehículos reales. Usar SOLO contra una base de
+datos de pruebas, con una caja abierta para el usuario cajero.
+
+Uso:
+    python benchmarks/bench_concurrencia.py --url http://localhost:8000 \\
+        --email admin@cdalaflorida.com --password admin123 \\
+        --concurrencia 50 --duracion 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from statistics import median
+
+import httpx
+
+
+def _placa_aleatoria() -> str:
+    letras = "".join(random.choices(string.ascii_uppercase, k=3))
+    numeros = "".join(random.choices(string.digits, k=3))
+    return f"{letras}{numeros}"
+
+
+def _percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _flujo_recepcion_caja(client: httpx.AsyncClient, headers: dict) -> list:
+    """Un ciclo: registrar, listar pendientes, cobrar y consultar resumen"""
+    tiempos = []
+
+    inicio = time.perf_counter()
+    r = await client.post("/api/v1/vehiculos/registrar", headers=headers, json={
+        "placa": _placa_aleatoria(),
+        "tipo_vehiculo": "moto",
+        "ano_modelo": random.randint(2005, 2024),
+        "cliente_nombre": "Cliente Benchmark",
+        "cliente_documento": "1234567890",
+        "tiene_soat": random.random() < 0.5
+    })
+    tiempos.append(("registrar", time.perf_counter() - inicio, r.status_code))
+    vehiculo_id = r.json().get("id") if r.status_code == 201 else None
+
+    inicio = time.perf_counter()
+    r = await client.get("/api/v1/vehiculos/pendientes", headers=headers)
+    tiempos.append(("pendientes", time.perf_counter() - inicio, r.status_code))
+
+    if vehiculo_id:
+        inicio = time.perf_counter()
+        r = await client.post("/api/v1/vehiculos/cobrar", headers=headers, json={
+            "vehiculo_id": vehiculo_id,
+            "metodo_pago": random.choice(["efectivo", "tarjeta_debito", "transferencia"]),
+            "tiene_soat": False
+        })
+        tiempos.append(("cobrar", time.perf_counter() - inicio, r.status_code))
+
+    inicio = time.perf_counter()
+    r = await client.get("/api/v1/cajas/activa/resumen", headers=headers)
+    tiempos.append(("resumen_caja", time.perf_counter() - inicio, r.status_code))
+
+    return tiempos
+
+
+async def ejecutar(args) -> dict:
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=30) as client:
+        token = await _login(client, args.email, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        muestras = []
+        fin = time.perf_counter() + args.duracion
+
+        async def cliente():
+            while time.perf_counter() < fin:
+                muestras.extend(await _flujo_recepcion_caja(client, headers))
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(args.concurrencia)))
+        transcurrido = time.perf_counter() - inicio
+
+    resultado = {
+        "url": args.url,
+        "concurrencia": args.concurrencia,
+        "duracion_s": round(transcurrido, 2),
+        "total_requests": len(muestras),
+        "requests_por_segundo": round(len(muestras) / transcurrido, 1),
+        "endpoints": {}
+    }
+    for nombre in sorted({m[0] for m in muestras}):
+        latencias = [m[1] * 1000 for m in muestras if m[0] == nombre]
+        errores = sum(1 for m in muestras if m[0] == nombre and m[2] >= 400)
+        resultado["endpoints"][nombre] = {
+            "requests": len(latencias),
+            "errores": errores,
+            "p50_ms": round(median(latencias), 1),
+            "p95_ms": round(_percentil(latencias, 95), 1),
+            "p99_ms": round(_percentil(latencias, 99), 1)
+        }
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrencia recepción/caja")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@cdalaflorida.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--duracion", type=float, default=20, help="Segundos de carga")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(ejecutar(args))
+
+    print(f"\n{resultado['requests_por_segundo']} req/s "
+          f"({resultado['total_requests']} requests, concurrencia {resultado['concurrencia']})")
+    for nombre, datos in resultado["endpoints"].items():
+        print(f"  {nombre:<14} p50={datos['p50_ms']}ms p95={datos['p95_ms']}ms "
+              f"p99={datos['p99_ms']}ms errores={datos['errores']}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
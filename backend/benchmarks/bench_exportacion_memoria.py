@@ -0,0 +1,135 @@
+"""
+Benchmark de memoria de la exportación de reportes
+
+Mide el pico de memoria (RSS) de generar un reporte de N filas con:
+  - json: lista de dicts + serialización completa (como la respuesta JSON)
+  - csv:  generar_csv en streaming
+  - xlsx: generar_xlsx (workbook write-only)
+
+Cada medición corre en un proceso nuevo para que los picos no se mezclen.
+Con --desde/--hasta usa los movimientos reales de la base de datos
+configurada (cursor del servidor) en lugar de filas sintéticas.
+
+Requiere Linux o macOS (módulo resource).
+
+Uso:
+    python benchmarks/bench_exportacion_memoria.py --filas 10000 100000 500000
+    python benchmarks/bench_exportacion_memoria.py --desde 2026-01-01 --hasta 2026-12-31
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODOS = ("json", "csv", "xlsx")
+
+ENCABEZADOS = [
+    "Fecha", "Hora", "Módulo", "Turno", "Tipo", "Concepto", "Categoría",
+    "Monto", "Método de pago", "Usuario", "Comprobante"
+]
+
+
+def _pico_rss_mb() -> float:
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _filas_sinteticas(n: int):
+    inicio = datetime(2026, 1, 1, 13, 0, 0)
+    for i in range(n):
+        momento = inicio + timedelta(seconds=37 * i)
+        yield (
+            momento.strftime("%Y-%m-%d"), momento.strftime("%H:%M:%S"), "Caja", "mañana",
+            "Ingreso", f"RTM ABC{i % 1000:03d} - Cliente Benchmark {i}", "rtm",
+            Decimal("205652.00"), "efectivo", "Cajero Benchmark", "N/A"
+        )
+
+
+def _filas(args_fuente):
+    if args_fuente["desde"]:
+        from app.api.v1.endpoints.reportes import _filas_movimientos
+        from app.utils.fechas import rango_dias, parse_fecha
+        inicio, fin = rango_dias(parse_fecha(args_fuente["desde"]), parse_fecha(args_fuente["hasta"]))
+        return _filas_movimientos(inicio, fin)
+    return _filas_sinteticas(args_fuente["filas"])
+
+
+def _medir(modo: str, args_fuente: dict, cola):
+    from app.utils.exportar import generar_csv, generar_xlsx
+
+    base = _pico_rss_mb()
+    inicio = time.perf_counter()
+    filas = 0
+    bytes_generados = 0
+
+    if modo == "json":
+        # Lo que hace hoy la respuesta JSON: todo a memoria y luego serializar
+        registros = [dict(zip(ENCABEZADOS, map(str, fila))) for fila in _filas(args_fuente)]
+        filas = len(registros)
+        bytes_generados = len(json.dumps({"movimientos": registros}).encode("utf-8"))
+    else:
+        def contar(generador_filas):
+            nonlocal filas
+            for fila in generador_filas:
+                filas += 1
+                yield fila
+
+        generador = generar_csv if modo == "csv" else generar_xlsx
+        for bloque in generador(ENCABEZADOS, contar(_filas(args_fuente))):
+            bytes_generados += len(bloque)
+
+    cola.put({
+        "modo": modo,
+        "filas": filas,
+        "pico_rss_mb": round(_pico_rss_mb(), 1),
+        "incremento_rss_mb": round(_pico_rss_mb() - base, 1),
+        "tamano_mb": round(bytes_generados / (1024 * 1024), 1),
+        "segundos": round(time.perf_counter() - inicio, 2)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de RSS de la exportación de reportes vs cantidad de filas")
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--desde", help="Usar movimientos reales desde este día (YYYY-MM-DD)")
+    parser.add_argument("--hasta", help="Día final inclusive (YYYY-MM-DD)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    fuentes = (
+        [{"desde": args.desde, "hasta": args.hasta, "filas": None}] if args.desde
+        else [{"desde": None, "hasta": None, "filas": n} for n in args.filas]
+    )
+
+    contexto = multiprocessing.get_context("spawn")
+    resultados = []
+    print(f"{'modo':<6} {'filas':>10} {'pico RSS':>10} {'incremento':>11} {'tamaño':>9} {'tiempo':>8}")
+    for fuente in fuentes:
+        for modo in args.modos:
+            cola = contexto.Queue()
+            proceso = contexto.Process(target=_medir, args=(modo, fuente, cola))
+            proceso.start()
+            resultado = cola.get()
+            proceso.join()
+            resultados.append(resultado)
+            print(f"{resultado['modo']:<6} {resultado['filas']:>10,} {resultado['pico_rss_mb']:>8} MB "
+                  f"{resultado['incremento_rss_mb']:>8} MB {resultado['tamano_mb']:>6} MB "
+                  f"{resultado['segundos']:>7}s")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
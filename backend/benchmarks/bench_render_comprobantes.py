@@ -0,0 +1,76 @@
+"""
+Benchmark: velocidad de render de los comprobantes PDF
+
+Genera N veces cada tipo de documento (egreso y cierre de caja) en el
+proceso actual, sin pool ni almacén, y reporta por tipo:
+  - primera llamada (incluye decodificar el logo y armar las plantillas)
+  - latencia por documento (p50 / p99) de las llamadas siguientes
+  - páginas por segundo
+
+Sirve para comparar app/utils/plantillas_pdf.py contra la versión anterior
+de los comprobantes (checkout del commit previo y misma línea de comando).
+
+Uso:
+    python benchmarks/bench_render_comprobantes.py --repeticiones 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from statistics import median
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_render_event_loop import DATOS_CIERRE, DATOS_EGRESO
+from app.utils.comprobantes import generar_comprobante_egreso
+from app.utils.comprobantes_caja import generar_comprobante_cierre_caja
+
+DOCUMENTOS = (
+    ("egreso", generar_comprobante_egreso, DATOS_EGRESO),
+    ("cierre_caja", generar_comprobante_cierre_caja, DATOS_CIERRE),
+)
+
+# Objetos página del PDF (no el nodo /Pages)
+_PAGINA = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def _p99(valores: list) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, int(len(ordenados) * 0.99) - 1)]
+
+
+def _medir(generar, datos: dict, repeticiones: int):
+    """(primera llamada, latencias siguientes, páginas por documento)"""
+    inicio = time.perf_counter()
+    contenido = generar(**datos).getvalue()
+    primera = time.perf_counter() - inicio
+    paginas = len(_PAGINA.findall(contenido))
+
+    latencias = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        generar(**datos).getvalue()
+        latencias.append(time.perf_counter() - inicio)
+    return primera, latencias, paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Páginas por segundo y latencia de los comprobantes PDF")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Repeticiones por tipo: {args.repeticiones}")
+    print()
+    print(f"{'documento':<12} {'primera ms':>11} {'p50 ms':>8} {'p99 ms':>8} {'páginas':>8} {'pág/s':>8}")
+    for nombre, generar, datos in DOCUMENTOS:
+        primera, latencias, paginas = _medir(generar, datos, args.repeticiones)
+        print(
+            f"{nombre:<12} {primera * 1000:>11.1f} {median(latencias) * 1000:>8.2f} "
+            f"{_p99(latencias) * 1000:>8.2f} {paginas:>8} {paginas * len(latencias) / sum(latencias):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: el event loop sigue atendiendo mientras se generan comprobantes
+
+Simula lo que pasa en un worker de uvicorn: N descargas de comprobantes
+(egreso y cierre de caja) en paralelo mientras otro "request" liviano hace
+ping al event loop cada pocos milisegundos. Compara:
+  - inline:   render dentro del event loop (como antes el endpoint async)
+  - ejecutor: render en el pool de app/utils/render_pdf.py vía run_in_threadpool
+
+Reporta el retraso de los pings (p50 / p99 / máximo) y PDFs por segundo.
+Con el ejecutor el retraso máximo debe quedar en unos pocos milisegundos.
+
+No usa la base de datos ni el almacén en disco.
+
+Uso:
+    python benchmarks/bench_render_event_loop.py --pdfs 40 --procesos 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from statistics import median
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.utils.comprobantes import generar_comprobante_egreso
+from app.utils.comprobantes_caja import generar_comprobante_cierre_caja
+from app.utils.render_pdf import EjecutorRender
+
+_DESGLOSE = {
+    'billetes_100000': 3, 'billetes_50000': 5, 'billetes_20000': 8, 'billetes_10000': 6,
+    'billetes_5000': 4, 'billetes_2000': 10, 'billetes_1000': 7, 'monedas_1000': 12,
+    'monedas_500': 9, 'monedas_200': 15, 'monedas_100': 20, 'monedas_50': 4,
+}
+
+DATOS_EGRESO = dict(
+    numero_comprobante="EGR-BENCH001",
+    fecha=datetime(2026, 10, 17, 15, 30),
+    beneficiario="Proveedor Benchmark",
+    concepto="Proveedor Benchmark - Compra de insumos de oficina",
+    categoria="otros_gastos",
+    monto=Decimal("1250000"),
+    metodo_pago="efectivo",
+    autorizado_por="Administrador",
+    desglose_efectivo=_DESGLOSE
+)
+
+DATOS_CIERRE = dict(
+    caja_id="0b7c6f1e-0000-4000-8000-000000000001",
+    cajero_nombre="Cajera Benchmark",
+    turno="mañana",
+    fecha_apertura=datetime(2026, 10, 17, 12, 0),
+    fecha_cierre=datetime(2026, 10, 17, 23, 0),
+    monto_inicial=Decimal("200000"),
+    total_ingresos_efectivo=Decimal("2350000"),
+    total_egresos=Decimal("150000"),
+    saldo_esperado=Decimal("2400000"),
+    monto_final_fisico=Decimal("2400000"),
+    diferencia=Decimal("0"),
+    desglose_efectivo=_DESGLOSE,
+    observaciones="Cierre de benchmark",
+    vehiculos_cobrados=42,
+    total_rtm=Decimal("2100000"),
+    total_soat=Decimal("250000"),
+    total_efectivo=Decimal("2350000"),
+    total_tarjeta_debito=Decimal("0"),
+    total_tarjeta_credito=Decimal("0"),
+    total_transferencia=Decimal("0"),
+    total_credismart=Decimal("0"),
+    total_sistecredito=Decimal("0")
+)
+
+DOCUMENTOS = (
+    (generar_comprobante_egreso, DATOS_EGRESO),
+    (generar_comprobante_cierre_caja, DATOS_CIERRE),
+)
+
+
+def _p99(valores: list) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, int(len(ordenados) * 0.99) - 1)]
+
+
+async def _pings(intervalo: float, retrasos: list, fin: asyncio.Event):
+    """Request liviano: cuánto tarda el loop en volver a atenderlo"""
+    while not fin.is_set():
+        esperado = time.perf_counter() + intervalo
+        await asyncio.sleep(intervalo)
+        retrasos.append(max(0.0, time.perf_counter() - esperado))
+
+
+async def _escenario(nombre: str, pdfs: int, descargar) -> None:
+    retrasos: list = []
+    fin = asyncio.Event()
+    ping = asyncio.create_task(_pings(0.005, retrasos, fin))
+    await asyncio.sleep(0.05)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(descargar(*DOCUMENTOS[i % len(DOCUMENTOS)]) for i in range(pdfs)))
+    duracion = time.perf_counter() - inicio
+
+    fin.set()
+    await ping
+    print(
+        f"{nombre:<10} {pdfs / duracion:>8.1f} {median(retrasos) * 1000:>10.1f} "
+        f"{_p99(retrasos) * 1000:>9.1f} {max(retrasos) * 1000:>9.1f}"
+    )
+
+
+async def main_async(args):
+    ejecutor = EjecutorRender(args.procesos, args.simultaneos, espera_segundos=600)
+
+    async def inline(generar, datos):
+        generar(**datos).getvalue()
+
+    async def con_ejecutor(generar, datos):
+        await run_in_threadpool(ejecutor.renderizar, generar, datos)
+
+    # Calentar el pool (arranque de procesos) fuera de la medición
+    await asyncio.gather(*(con_ejecutor(*DOCUMENTOS[0]) for _ in range(max(args.procesos, 1))))
+
+    print(f"PDFs por escenario: {args.pdfs}  (procesos: {args.procesos}, simultáneos: {args.simultaneos})")
+    print()
+    print(f"{'escenario':<10} {'PDF/s':>8} {'ping p50':>10} {'p99 ms':>9} {'máx ms':>9}")
+    await _escenario("inline", args.pdfs, inline)
+    await _escenario("ejecutor", args.pdfs, con_ejecutor)
+
+    ejecutor.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retraso del event loop mientras se generan PDF")
+    parser.add_argument("--pdfs", type=int, default=40)
+    parser.add_argument("--procesos", type=int, default=2, help="0 = pool de hilos")
+    parser.add_argument("--simultaneos", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
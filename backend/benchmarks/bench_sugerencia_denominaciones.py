@@ -0,0 +1,131 @@
+"""
+Benchmark de la sugerencia de denominaciones de tesorería
+
+Compara el greedy anterior (mayor denominación primero) con el solver exacto
+de app/utils/denominaciones.py sobre inventarios realistas y montos de
+$50,000 a varios millones:
+  - % de montos que cada uno logra componer
+  - piezas promedio cuando ambos lo logran
+  - tiempo por consulta (mediana / p99), sin y con memo
+
+No usa la base de datos.
+
+Uso:
+    python benchmarks/bench_sugerencia_denominaciones.py --consultas 2000 --monto-maximo 8000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from statistics import mean, median
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.inventario_denominaciones import DENOMINACIONES
+from app.utils import denominaciones
+
+
+def _greedy(monto: int, disponible: dict):
+    """Algoritmo anterior de _generar_sugerencia_denominaciones"""
+    resto, piezas = monto, 0
+    for campo, valor in DENOMINACIONES:
+        if resto <= 0:
+            break
+        usar = min(resto // valor, disponible.get(campo, 0))
+        resto -= usar * valor
+        piezas += usar
+    return piezas if resto == 0 else None
+
+
+def _inventario_aleatorio(rng: random.Random) -> dict:
+    """Caja fuerte típica: muchos billetes medianos, a veces sin alguna denominación"""
+    base = {
+        "billetes_100000": rng.randint(0, 40),
+        "billetes_50000": rng.randint(0, 80),
+        "billetes_20000": rng.randint(0, 120),
+        "billetes_10000": rng.randint(0, 150),
+        "billetes_5000": rng.randint(0, 150),
+        "billetes_2000": rng.randint(0, 200),
+        "billetes_1000": rng.randint(0, 200),
+        "monedas_1000": rng.randint(0, 150),
+        "monedas_500": rng.randint(0, 200),
+        "monedas_200": rng.randint(0, 200),
+        "monedas_100": rng.randint(0, 200),
+        "monedas_50": rng.randint(0, 100),
+    }
+    # Una o dos denominaciones agotadas (el caso donde falla el greedy)
+    for campo in rng.sample(list(base), rng.randint(1, 2)):
+        base[campo] = 0
+    return base
+
+
+def _monto_aleatorio(rng: random.Random, maximo: int) -> int:
+    monto = rng.randint(50_000, maximo)
+    redondeo = rng.choice((50, 100, 1000, 10000))
+    return max(redondeo, monto - monto % redondeo)
+
+
+def _p99(valores: list) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, int(len(ordenados) * 0.99) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sugerencia de denominaciones")
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--monto-maximo", type=int, default=8_000_000)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    casos = [(_monto_aleatorio(rng, args.monto_maximo), _inventario_aleatorio(rng)) for _ in range(args.consultas)]
+
+    tiempos_greedy, tiempos_exacto, tiempos_memo = [], [], []
+    exitos_greedy = exitos_exacto = no_optimos = 0
+    piezas_greedy, piezas_exacto = [], []
+
+    denominaciones._resolver.cache_clear()
+    for monto, disponible in casos:
+        inicio = time.perf_counter()
+        greedy = _greedy(monto, disponible)
+        tiempos_greedy.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        exacto = denominaciones.sugerir_desglose(monto, disponible)
+        tiempos_exacto.append(time.perf_counter() - inicio)
+
+        if greedy is not None:
+            exitos_greedy += 1
+        if exacto is not None:
+            exitos_exacto += 1
+            no_optimos += not exacto.optimo
+            if greedy is not None:
+                piezas_greedy.append(greedy)
+                piezas_exacto.append(exacto.piezas)
+
+    # Segunda pasada: últimas consultas repetidas (caben en el memo), resueltas sin buscar
+    for monto, disponible in casos[-512:]:
+        inicio = time.perf_counter()
+        denominaciones.sugerir_desglose(monto, disponible)
+        tiempos_memo.append(time.perf_counter() - inicio)
+
+    total = len(casos)
+    print(f"Consultas: {total}  (montos hasta ${args.monto_maximo:,.0f})")
+    print()
+    print(f"{'algoritmo':<14} {'compone':>9} {'mediana ms':>11} {'p99 ms':>9}")
+    for nombre, exitos, tiempos in (
+        ("greedy", exitos_greedy, tiempos_greedy),
+        ("exacto", exitos_exacto, tiempos_exacto),
+        ("exacto (memo)", exitos_exacto, tiempos_memo),
+    ):
+        print(f"{nombre:<14} {exitos / total:>8.1%} {median(tiempos) * 1000:>11.3f} {_p99(tiempos) * 1000:>9.3f}")
+    print()
+    if piezas_exacto:
+        print(f"Piezas promedio cuando ambos componen: greedy {mean(piezas_greedy):.1f} / exacto {mean(piezas_exacto):.1f}")
+    print(f"Soluciones sin optimalidad probada (tiempo agotado): {no_optimos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+-- Migración: Índices (fecha, id) para paginación por cursor
+-- Fecha: 2026-10-17
+-- Descripción: Los listados de vehículos, movimientos de tesorería e historial de cajas
+--              paginan con WHERE (fecha, id) < (:fecha, :id) ORDER BY fecha DESC, id DESC
+--              (app/utils/paginacion.py). Con el índice compuesto cada página es un
+--              recorrido corto del índice sin importar la profundidad.
+--              Reemplazan a los índices de una sola columna de add_indices_ledger.sql.
+
+-- ==================== VEHÍCULOS EN PROCESO ====================
+
+CREATE INDEX IF NOT EXISTS idx_vehiculos_fecha_registro_id
+    ON vehiculos_proceso(fecha_registro, id);
+
+DROP INDEX IF EXISTS idx_vehiculos_fecha_registro;
+
+-- ==================== CAJAS ====================
+
+CREATE INDEX IF NOT EXISTS idx_cajas_fecha_apertura_id
+    ON cajas(fecha_apertura, id);
+
+DROP INDEX IF EXISTS idx_cajas_fecha_apertura;
+
+-- ==================== MOVIMIENTOS DE TESORERÍA ====================
+
+CREATE INDEX IF NOT EXISTS idx_movimientos_tesoreria_fecha_id
+    ON movimientos_tesoreria(fecha_movimiento, id);
+
+DROP INDEX IF EXISTS idx_movimientos_tesoreria_fecha;
+
+ANALYZE vehiculos_proceso;
+ANALYZE cajas;
+ANALYZE movimientos_tesoreria;
@@ -0,0 +1,73 @@
+-- Migración: Índices compuestos y parciales para las tablas de movimientos
+-- Fecha: 2026-10-17
+-- Descripción: Índices para los filtros frecuentes de vehículos, cajas, tesorería y reportes.
+--              Hasta ahora solo existían índices sobre placa y las llaves primarias, así que
+--              los filtros por caja, estado y rangos de fecha terminaban en sequential scan.
+-- Nota: los enums de SQLAlchemy se guardan por NOMBRE ('REGISTRADO', 'ABIERTA', 'EFECTIVO').
+
+-- ==================== VEHÍCULOS EN PROCESO ====================
+
+-- Lista de pendientes de Caja (estado = REGISTRADO ORDER BY fecha_registro).
+-- Parcial: los pendientes son una fracción mínima de la tabla
+CREATE INDEX IF NOT EXISTS idx_vehiculos_pendientes
+    ON vehiculos_proceso(fecha_registro)
+    WHERE estado = 'REGISTRADO';
+
+-- Filtro por estado + rango/orden de fecha de registro (listado y conteo)
+CREATE INDEX IF NOT EXISTS idx_vehiculos_estado_fecha_registro
+    ON vehiculos_proceso(estado, fecha_registro);
+
+-- Rangos de fecha sin filtro de estado (reportes, listado general)
+CREATE INDEX IF NOT EXISTS idx_vehiculos_fecha_registro
+    ON vehiculos_proceso(fecha_registro);
+
+-- Vehículos de una caja (resumen, cierre, cobrados hoy)
+CREATE INDEX IF NOT EXISTS idx_vehiculos_caja_estado
+    ON vehiculos_proceso(caja_id, estado);
+
+CREATE INDEX IF NOT EXISTS idx_vehiculos_fecha_pago
+    ON vehiculos_proceso(fecha_pago);
+
+-- ==================== CAJAS ====================
+
+-- Caja abierta del usuario (consultada en casi todos los endpoints de caja)
+CREATE INDEX IF NOT EXISTS idx_cajas_usuario_estado
+    ON cajas(usuario_id, estado);
+
+-- Historial de cajas
+CREATE INDEX IF NOT EXISTS idx_cajas_fecha_apertura
+    ON cajas(fecha_apertura DESC);
+
+-- ==================== MOVIMIENTOS DE CAJA ====================
+
+-- Movimientos de una caja en orden cronológico
+CREATE INDEX IF NOT EXISTS idx_movimientos_caja_caja_created
+    ON movimientos_caja(caja_id, created_at);
+
+-- Rangos de fecha de los reportes
+CREATE INDEX IF NOT EXISTS idx_movimientos_caja_created_at
+    ON movimientos_caja(created_at);
+
+-- Movimientos de un vehículo (cambio de método de pago)
+CREATE INDEX IF NOT EXISTS idx_movimientos_caja_vehiculo
+    ON movimientos_caja(vehiculo_id);
+
+-- Desglose por medio de pago en un rango de fechas
+CREATE INDEX IF NOT EXISTS idx_movimientos_caja_metodo_created
+    ON movimientos_caja(metodo_pago, created_at);
+
+-- ==================== MOVIMIENTOS DE TESORERÍA ====================
+
+-- Rangos de fecha y orden del listado
+CREATE INDEX IF NOT EXISTS idx_movimientos_tesoreria_fecha
+    ON movimientos_tesoreria(fecha_movimiento DESC);
+
+-- Filtros por método de pago (efectivo, desglose por medio de pago)
+CREATE INDEX IF NOT EXISTS idx_movimientos_tesoreria_metodo_fecha
+    ON movimientos_tesoreria(metodo_pago, fecha_movimiento);
+
+-- Actualizar estadísticas para que el planner use los índices nuevos
+ANALYZE vehiculos_proceso;
+ANALYZE cajas;
+ANALYZE movimientos_caja;
+ANALYZE movimientos_tesoreria;
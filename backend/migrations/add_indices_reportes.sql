@@ -0,0 +1,24 @@
+-- Migración: Índices para la última caja cerrada y los saldos por checkpoint
+-- Fecha: 2026-10-17
+-- Descripción: Planes revisados con scripts/verificar_planes_consulta.py --seed.
+--              - cajas/ultima-cerrada ordena las cajas cerradas del usuario por fecha_cierre:
+--                (usuario_id, estado, fecha_cierre) la resuelve con un recorrido corto del
+--                índice y sigue sirviendo la búsqueda de la caja abierta.
+--              - Los saldos leen de resumen_diario los días de un módulo posteriores al
+--                último checkpoint (app/models/saldo_checkpoint.py); la llave primaria
+--                empieza por dia y no sirve para filtrar por módulo.
+
+-- ==================== CAJAS ====================
+
+CREATE INDEX IF NOT EXISTS idx_cajas_usuario_estado_cierre
+    ON cajas(usuario_id, estado, fecha_cierre);
+
+DROP INDEX IF EXISTS idx_cajas_usuario_estado;
+
+-- ==================== RESUMEN DIARIO ====================
+
+CREATE INDEX IF NOT EXISTS idx_resumen_diario_modulo_dia
+    ON resumen_diario(modulo, dia);
+
+ANALYZE cajas;
+ANALYZE resumen_diario;
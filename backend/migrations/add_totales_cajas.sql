@@ -0,0 +1,51 @@
+-- Migración: Totales acumulados en cajas
+-- Fecha: 2026-10-17
+-- Descripción: Columnas total_* en cajas con los ingresos, egresos y totales por método de
+--              pago y concepto de sus movimientos. La aplicación las actualiza en el mismo
+--              flush de cada movimiento (app/models/totales_caja.py).
+--              Carga inicial desde los movimientos; para verificarlas o recalcularlas más
+--              adelante usar scripts/totales_caja.py
+
+ALTER TABLE cajas
+ADD COLUMN IF NOT EXISTS total_ingresos NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_ingresos_efectivo NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_egresos NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_rtm NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_comision_soat NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_efectivo NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_tarjeta_debito NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_tarjeta_credito NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_transferencia NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_credismart NUMERIC(12, 2) NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_sistecredito NUMERIC(12, 2) NOT NULL DEFAULT 0;
+
+-- Carga inicial desde los movimientos de cada caja
+UPDATE cajas SET
+    total_ingresos = t.total_ingresos,
+    total_ingresos_efectivo = t.total_ingresos_efectivo,
+    total_egresos = t.total_egresos,
+    total_rtm = t.total_rtm,
+    total_comision_soat = t.total_comision_soat,
+    total_efectivo = t.total_efectivo,
+    total_tarjeta_debito = t.total_tarjeta_debito,
+    total_tarjeta_credito = t.total_tarjeta_credito,
+    total_transferencia = t.total_transferencia,
+    total_credismart = t.total_credismart,
+    total_sistecredito = t.total_sistecredito
+FROM (
+    SELECT m.caja_id,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0), 0) AS total_ingresos,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND m.ingresa_efectivo), 0) AS total_ingresos_efectivo,
+           COALESCE(SUM(-m.monto) FILTER (WHERE m.monto <= 0), 0) AS total_egresos,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND m.tipo = 'RTM'), 0) AS total_rtm,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND m.tipo = 'COMISION_SOAT'), 0) AS total_comision_soat,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'efectivo'), 0) AS total_efectivo,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'tarjeta_debito'), 0) AS total_tarjeta_debito,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'tarjeta_credito'), 0) AS total_tarjeta_credito,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'transferencia'), 0) AS total_transferencia,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'credismart'), 0) AS total_credismart,
+           COALESCE(SUM(m.monto) FILTER (WHERE m.monto > 0 AND lower(m.metodo_pago) = 'sistecredito'), 0) AS total_sistecredito
+    FROM movimientos_caja m
+    GROUP BY m.caja_id
+) t
+WHERE cajas.id = t.caja_id;
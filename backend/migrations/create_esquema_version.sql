@@ -0,0 +1,13 @@
+-- Migración: Crear tabla esquema_version
+-- Fecha: 2026-10-17
+-- Descripción: Huella del esquema aplicado por init_db. Si la huella de los
+--              modelos coincide con la guardada, el arranque de cada worker
+--              omite create_all y la carga de datos iniciales. El primer
+--              arranque tras crear la tabla (o tras cambiar los modelos)
+--              calcula y guarda la huella.
+
+CREATE TABLE IF NOT EXISTS esquema_version (
+    id INTEGER PRIMARY KEY,
+    huella VARCHAR(64) NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC')
+);
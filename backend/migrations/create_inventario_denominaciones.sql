@@ -0,0 +1,59 @@
+-- Migración: Tabla inventario_denominaciones (billetes y monedas en tesorería)
+-- Fecha: 2026-10-17
+-- Descripción: Una fila por denominación con la cantidad disponible en la caja fuerte.
+--              La aplicación la actualiza en la misma transacción de cada movimiento en
+--              efectivo con desglose (app/models/inventario_denominaciones.py).
+--              Carga inicial desde el histórico; para recalcularla más adelante usar
+--              scripts/reconstruir_inventario_denominaciones.py
+
+CREATE TABLE IF NOT EXISTS inventario_denominaciones (
+    denominacion VARCHAR(20) PRIMARY KEY,
+    valor INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC')
+);
+
+-- Todas las denominaciones en cero
+INSERT INTO inventario_denominaciones (denominacion, valor, cantidad)
+VALUES
+    ('billetes_100000', 100000, 0),
+    ('billetes_50000', 50000, 0),
+    ('billetes_20000', 20000, 0),
+    ('billetes_10000', 10000, 0),
+    ('billetes_5000', 5000, 0),
+    ('billetes_2000', 2000, 0),
+    ('billetes_1000', 1000, 0),
+    ('monedas_1000', 1000, 0),
+    ('monedas_500', 500, 0),
+    ('monedas_200', 200, 0),
+    ('monedas_100', 100, 0),
+    ('monedas_50', 50, 0)
+ON CONFLICT (denominacion) DO NOTHING;
+
+-- Cantidades según el histórico (ingresos suman, egresos restan)
+UPDATE inventario_denominaciones i
+SET cantidad = h.cantidad,
+    updated_at = (now() AT TIME ZONE 'UTC')
+FROM (
+    SELECT d.denominacion,
+           SUM(CASE WHEN m.monto > 0 THEN d.cantidad ELSE -d.cantidad END) AS cantidad
+    FROM movimientos_tesoreria m
+    JOIN desglose_efectivo_tesoreria e ON e.movimiento_id = m.id
+    CROSS JOIN LATERAL (VALUES
+        ('billetes_100000', e.billetes_100000),
+        ('billetes_50000', e.billetes_50000),
+        ('billetes_20000', e.billetes_20000),
+        ('billetes_10000', e.billetes_10000),
+        ('billetes_5000', e.billetes_5000),
+        ('billetes_2000', e.billetes_2000),
+        ('billetes_1000', e.billetes_1000),
+        ('monedas_1000', e.monedas_1000),
+        ('monedas_500', e.monedas_500),
+        ('monedas_200', e.monedas_200),
+        ('monedas_100', e.monedas_100),
+        ('monedas_50', e.monedas_50)
+    ) AS d(denominacion, cantidad)
+    WHERE m.metodo_pago = 'EFECTIVO'
+    GROUP BY d.denominacion
+) h
+WHERE i.denominacion = h.denominacion;
@@ -0,0 +1,42 @@
+-- Migración: Tabla resumen_diario (acumulado diario de movimientos)
+-- Fecha: 2026-10-17
+-- Descripción: Totales por día de negocio (America/Bogota), módulo, concepto y método de pago.
+--              La aplicación la mantiene en la misma transacción de cada movimiento
+--              (app/models/resumen_diario.py) y los reportes leen de aquí en lugar de
+--              recorrer movimientos_caja y movimientos_tesoreria completos.
+--              Para reconstruirla: python scripts/reconstruir_resumen_diario.py
+
+CREATE TABLE IF NOT EXISTS resumen_diario (
+    dia DATE NOT NULL,
+    modulo VARCHAR(20) NOT NULL,          -- caja | tesoreria
+    concepto VARCHAR(50) NOT NULL,        -- tipo de movimiento (caja) o categoría (tesorería)
+    metodo_pago VARCHAR(50) NOT NULL,     -- '' si el movimiento no tiene método
+    ingresos NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    egresos NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (dia, modulo, concepto, metodo_pago)
+);
+
+-- Carga inicial desde el histórico (los enums se guardan por NOMBRE)
+INSERT INTO resumen_diario (dia, modulo, concepto, metodo_pago, ingresos, egresos, cantidad)
+SELECT dia, modulo, concepto, metodo_pago,
+       SUM(GREATEST(monto, 0)), SUM(GREATEST(-monto, 0)), COUNT(*)
+FROM (
+    SELECT (created_at AT TIME ZONE 'UTC' AT TIME ZONE 'America/Bogota')::date AS dia,
+           'caja' AS modulo,
+           lower(tipo::text) AS concepto,
+           COALESCE(metodo_pago, '') AS metodo_pago,
+           monto
+    FROM movimientos_caja
+    UNION ALL
+    SELECT (fecha_movimiento AT TIME ZONE 'UTC' AT TIME ZONE 'America/Bogota')::date,
+           'tesoreria',
+           COALESCE(lower(CASE WHEN tipo = 'INGRESO' THEN categoria_ingreso::text
+                               ELSE categoria_egreso::text END), 'sin_categoria'),
+           lower(metodo_pago::text),
+           monto
+    FROM movimientos_tesoreria
+) m
+GROUP BY dia, modulo, concepto, metodo_pago
+ON CONFLICT (dia, modulo, concepto, metodo_pago) DO NOTHING;
@@ -0,0 +1,15 @@
+-- Migración: Tabla saldos_checkpoint (saldo al cierre de cada día)
+-- Fecha: 2026-10-17
+-- Descripción: Saldo acumulado por día de negocio, módulo (caja / tesoreria) y método de pago.
+--              Los saldos se calculan como último checkpoint + resumen_diario posterior
+--              (app/models/saldo_checkpoint.py). Requiere resumen_diario.
+--              La tabla se llena al arrancar la aplicación o con scripts/checkpoints_saldo.py
+
+CREATE TABLE IF NOT EXISTS saldos_checkpoint (
+    dia DATE NOT NULL,
+    modulo VARCHAR(20) NOT NULL,
+    metodo_pago VARCHAR(50) NOT NULL,
+    saldo NUMERIC(14, 2) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (dia, modulo, metodo_pago)
+);
@@ -0,0 +1,16 @@
+-- Migración: Crear tabla versiones_cache
+-- Fecha: 2026-10-17
+-- Descripción: Contadores de versión para invalidar entre workers los datos
+--              cacheados en memoria (motor de tarifas y comisiones SOAT).
+--              Los endpoints de tarifas incrementan 'tarifas' en la misma
+--              transacción del cambio.
+
+CREATE TABLE IF NOT EXISTS versiones_cache (
+    nombre VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC')
+);
+
+INSERT INTO versiones_cache (nombre, version)
+VALUES ('tarifas', 0)
+ON CONFLICT (nombre) DO NOTHING;
@@ -1,13 +1,103 @@
 """
 Script para iniciar el servidor FastAPI
+
+Desarrollo (por defecto): un proceso de uvicorn con recarga automática.
+    python run.py
+
+Producción: gunicorn con workers de uvicorn.
+    python run.py --produccion [--workers N] [--bind 0.0.0.0:8000]
+
+- La app se importa una vez en el proceso maestro (preload) y los workers
+  se crean por fork: arrancan más rápido y comparten la memoria del código.
+- Cada worker se recicla tras WEB_MAX_REQUESTS requests (+ jitter, para que
+  no se reinicien todos a la vez).
+- Las tareas de arranque (init_db, checkpoints) corren bajo un advisory lock
+  de PostgreSQL: solo un worker aplica el esquema. Cada worker calienta su
+  pool y sus caches antes de aceptar tráfico (ver app/utils/calentamiento.py).
+- Cada worker publica sus métricas en METRICAS_DIR (un directorio temporal
+  si no está definido) y GET /metrics, atendido por cualquier worker,
+  devuelve las de todos (ver app/utils/metricas.py).
+- kill -HUP <pid maestro>: reemplaza los workers sin cortar requests.
+  Con preload el código no se recarga: para desplegar una versión nueva,
+  kill -USR2 <pid maestro> (nuevo maestro) y luego kill -TERM al anterior.
 """
+import argparse
+import os
+import tempfile
+
 import uvicorn
 
+
+def workers_por_defecto() -> int:
+    """Un worker por núcleo disponible (los workers de uvicorn son asíncronos)"""
+    try:
+        nucleos = len(os.sched_getaffinity(0))
+    except AttributeError:  # No disponible fuera de Linux
+        nucleos = os.cpu_count() or 1
+    return max(nucleos, 1)
+
+
+def _post_fork(server, worker):
+    # El maestro importó la app (preload): descartar, sin cerrarlas, las conexiones heredadas
+    from app.db.database import engine, async_engine
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+def iniciar_produccion(bind: str, workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+    from app.core.config import settings
+
+    # Antes de cargar la app: los workers heredan el directorio al hacer fork
+    if not settings.METRICAS_DIR:
+        settings.METRICAS_DIR = tempfile.mkdtemp(prefix="cda-metricas-")
+
+    opciones = {
+        "bind": bind,
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.WEB_MAX_REQUESTS,
+        "max_requests_jitter": settings.WEB_MAX_REQUESTS_JITTER,
+        # Incluye la espera del advisory lock durante el startup del worker
+        "timeout": settings.WEB_TIMEOUT_SEGUNDOS,
+        "graceful_timeout": settings.WEB_GRACEFUL_SEGUNDOS,
+        "keepalive": 5,
+        "post_fork": _post_fork,
+        "accesslog": "-",
+        "loglevel": "info",
+    }
+
+    class ServidorProduccion(BaseApplication):
+        def load_config(self):
+            for clave, valor in opciones.items():
+                self.cfg.set(clave, valor)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    conexiones = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW) * 2
+    print(f"🚀 {workers} workers en {bind} (hasta {conexiones} conexiones a PostgreSQL, pools sync + async)")
+    ServidorProduccion().run()
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    parser = argparse.ArgumentParser(description="Iniciar el servidor de la API")
+    parser.add_argument("--produccion", action="store_true", help="gunicorn con varios workers de uvicorn")
+    parser.add_argument("--workers", type=int, default=None, help="Cantidad de workers (por defecto WEB_WORKERS o uno por núcleo)")
+    parser.add_argument("--bind", default="0.0.0.0:8000", help="Dirección y puerto")
+    args = parser.parse_args()
+
+    if args.produccion:
+        from app.core.config import settings
+        workers = args.workers or settings.WEB_WORKERS or workers_por_defecto()
+        iniciar_produccion(args.bind, workers)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.models.version_cache import VERSION_TARIFAS, incrementar_version
 
 # Conexión a la base de datos
 engine = create_engine(settings.DATABASE_URL)
@@ -246,6 +247,8 @@ def main():
             db.execute(sql, data)
             print(f"✓ {tarifa_data['tipo_vehiculo']} - {tarifa_data['descripcion_antiguedad']}: ${tarifa_data['valor_total']}")
         
+        # Los workers en ejecución recargan el motor de tarifas
+        incrementar_version(db, VERSION_TARIFAS)
         db.commit()
         print(f"\n✅ Se cargaron {len(tarifas_2025)} tarifas exitosamente")
         
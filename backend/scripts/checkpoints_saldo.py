@@ -0,0 +1,72 @@
+"""
+Checkpoints de saldo (saldos_checkpoint)
+CDA La Florida
+
+Genera los checkpoints diarios que falten hasta ayer (último día cerrado).
+Pensado para correr desde un cron después de medianoche; la aplicación
+también los genera al arrancar.
+
+  --regenerar  borra todos los checkpoints y los vuelve a generar
+  --verificar  compara cada checkpoint con un recálculo completo desde los
+               movimientos (exit code 1 si alguno no coincide)
+
+Uso:
+    python scripts/checkpoints_saldo.py
+    python scripts/checkpoints_saldo.py --regenerar
+    python scripts/checkpoints_saldo.py --verificar
+"""
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.models.saldo_checkpoint import (
+    SaldoCheckpoint,
+    generar_checkpoints,
+    invalidar_checkpoints,
+    verificar_checkpoints
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar o verificar los checkpoints de saldo")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--regenerar", action="store_true", help="Borrar y generar todos los checkpoints")
+    grupo.add_argument("--verificar", action="store_true", help="Comparar con un recálculo completo")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    if args.verificar:
+        print("🔍 Verificando checkpoints contra los movimientos...")
+        with engine.connect() as conn:
+            diferencias = verificar_checkpoints(conn)
+        for fila in diferencias:
+            print(
+                f"❌ {fila.dia} {fila.modulo}/{fila.metodo_pago or '(sin método)'}: "
+                f"checkpoint {fila.saldo_checkpoint} / recalculado {fila.saldo_recalculado}"
+            )
+        if diferencias:
+            print(f"❌ {len(diferencias)} checkpoint(s) no coinciden. Corregir con --regenerar")
+            sys.exit(1)
+        print("✅ Todos los checkpoints coinciden con los movimientos")
+        return
+
+    SaldoCheckpoint.__table__.create(bind=engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        if args.regenerar:
+            print("🗑️  Borrando checkpoints...")
+            invalidar_checkpoints(conn)
+        print("📝 Generando checkpoints hasta ayer...")
+        filas = generar_checkpoints(conn)
+
+    print(f"✅ {filas} checkpoint(s) generados")
+
+
+if __name__ == "__main__":
+    main()
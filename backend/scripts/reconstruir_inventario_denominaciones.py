@@ -0,0 +1,80 @@
+"""
+Reconstrucción / verificación de inventario_denominaciones
+CDA La Florida
+
+Recalcula las cantidades de billetes y monedas de tesorería desde el
+histórico de movimientos en efectivo con desglose.
+
+  --verificar  solo compara la tabla con el histórico (exit code 1 si difieren)
+
+Útil después de modificar movimientos directamente en la base de datos.
+
+Uso:
+    python scripts/reconstruir_inventario_denominaciones.py
+    python scripts/reconstruir_inventario_denominaciones.py --verificar
+"""
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.models.inventario_denominaciones import (
+    DENOMINACIONES,
+    InventarioDenominacion,
+    calcular_inventario_historico,
+    leer_inventario,
+    reconstruir_inventario,
+    total_inventario
+)
+
+
+def verificar(engine) -> int:
+    """Imprime las diferencias y devuelve cuántas denominaciones no coinciden"""
+    with engine.connect() as conn:
+        actual = leer_inventario(conn)
+        historico = calcular_inventario_historico(conn)
+
+    diferencias = 0
+    for campo, _ in DENOMINACIONES:
+        if actual[campo] != historico[campo]:
+            diferencias += 1
+            print(f"❌ {campo}: tabla {actual[campo]} / histórico {historico[campo]}")
+
+    print(f"   Total tabla:     ${total_inventario(actual):,.0f}")
+    print(f"   Total histórico: ${total_inventario(historico):,.0f}")
+    return diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir o verificar inventario_denominaciones")
+    parser.add_argument("--verificar", action="store_true", help="Solo comparar con el histórico, sin modificar")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    if args.verificar:
+        print("🔍 Verificando inventario_denominaciones contra el histórico...")
+        diferencias = verificar(engine)
+        if diferencias:
+            print(f"❌ {diferencias} denominación(es) no coinciden")
+            sys.exit(1)
+        print("✅ El inventario coincide con el histórico")
+        return
+
+    InventarioDenominacion.__table__.create(bind=engine, checkfirst=True)
+
+    print("📝 Reconstruyendo inventario_denominaciones desde el histórico...")
+    with engine.begin() as conn:
+        inventario = reconstruir_inventario(conn)
+
+    for campo, _ in DENOMINACIONES:
+        print(f"   {campo}: {inventario[campo]}")
+    print(f"✅ Inventario reconstruido - Total ${total_inventario(inventario):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Reconstrucción de la tabla resumen_diario
+CDA La Florida
+
+Recalcula los totales diarios desde movimientos_caja y movimientos_tesoreria.
+Útil para la carga inicial del histórico o si se modificaron movimientos
+directamente en la base de datos (fuera de la aplicación).
+
+Uso:
+    python scripts/reconstruir_resumen_diario.py
+    python scripts/reconstruir_resumen_diario.py --desde 2026-01-01 --hasta 2026-01-31
+"""
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.db.database import Base
+from app.models.resumen_diario import ResumenDiario, reconstruir_resumen_diario
+from app.models.saldo_checkpoint import invalidar_checkpoints
+from app.utils.fechas import parse_fecha
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir resumen_diario desde los movimientos")
+    parser.add_argument("--desde", help="Día inicial (YYYY-MM-DD), por defecto todo el histórico")
+    parser.add_argument("--hasta", help="Día final inclusive (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    desde = parse_fecha(args.desde)
+    hasta = parse_fecha(args.hasta)
+    if (args.desde or args.hasta) and not (desde and hasta):
+        print("❌ --desde y --hasta deben indicarse juntos con formato YYYY-MM-DD")
+        sys.exit(2)
+
+    engine = create_engine(settings.DATABASE_URL)
+    Base.metadata.create_all(bind=engine, tables=[ResumenDiario.__table__])
+
+    periodo = f"{desde} a {hasta}" if desde else "todo el histórico"
+    print(f"📝 Reconstruyendo resumen_diario ({periodo})...")
+
+    with engine.begin() as conn:
+        filas = reconstruir_resumen_diario(conn, desde, hasta)
+        # Los checkpoints de saldo se calculan desde el resumen
+        invalidar_checkpoints(conn, desde)
+
+    print(f"✅ {filas} filas generadas")
+    print("   Checkpoints de saldo invalidados (se regeneran con scripts/checkpoints_saldo.py o al reiniciar)")
+
+
+if __name__ == "__main__":
+    main()
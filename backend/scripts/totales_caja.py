@@ -0,0 +1,55 @@
+"""
+Totales acumulados de cajas (columnas total_* de cajas)
+CDA La Florida
+
+Recalcula los totales de todas las cajas desde sus movimientos.
+
+  --verificar  solo compara las columnas con los movimientos (exit code 1 si difieren)
+
+Útil después de modificar movimientos directamente en la base de datos.
+
+Uso:
+    python scripts/totales_caja.py
+    python scripts/totales_caja.py --verificar
+"""
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.models.totales_caja import reconstruir_totales_caja, verificar_totales_caja
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcular o verificar los totales acumulados de cajas")
+    parser.add_argument("--verificar", action="store_true", help="Solo comparar con los movimientos, sin modificar")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    if args.verificar:
+        print("🔍 Verificando totales de cajas contra los movimientos...")
+        with engine.connect() as conn:
+            diferencias = verificar_totales_caja(conn)
+        for caja_id, columna, valor_tabla, valor_calculado in diferencias:
+            print(f"❌ Caja {caja_id} {columna}: tabla {valor_tabla} / movimientos {valor_calculado}")
+        if diferencias:
+            cajas = len({caja_id for caja_id, *_ in diferencias})
+            print(f"❌ {cajas} caja(s) con totales que no coinciden. Corregir sin --verificar")
+            sys.exit(1)
+        print("✅ Los totales de todas las cajas coinciden con los movimientos")
+        return
+
+    print("📝 Recalculando totales de cajas desde los movimientos...")
+    with engine.begin() as conn:
+        cajas = reconstruir_totales_caja(conn)
+
+    print(f"✅ Totales recalculados en {cajas} caja(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Verificación de cantidad de consultas de los reportes
+CDA La Florida
+
+Ejecuta los endpoints de reportes.py directamente contra la base de datos
+configurada y cuenta las sentencias SQL que emite cada uno. Falla (exit
+code 1) si alguno supera su límite, para que no vuelvan los loops de
+consultas por día o por categoría.
+
+Uso:
+    python scripts/verificar_consultas_reportes.py
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+import app.models  # noqa: F401  (registra modelos y listeners)
+from app.api.v1.endpoints import reportes
+
+# Máximo de sentencias SQL permitidas por endpoint
+LIMITES = {
+    "dashboard-general": (reportes.obtener_dashboard_general, {"fecha": None}, 2),
+    "desglose-conceptos": (reportes.obtener_desglose_conceptos, {"fecha": None, "fecha_inicio": None, "fecha_fin": None}, 1),
+    "desglose-medios-pago": (reportes.obtener_desglose_medios_pago, {"fecha": None, "fecha_inicio": None, "fecha_fin": None}, 1),
+    "resumen-mensual": (reportes.obtener_resumen_mensual, {"mes": None, "anio": None}, 2),
+}
+
+
+def main():
+    engine = create_engine(settings.DATABASE_URL)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    sentencias = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    fallos = 0
+    db = SessionLocal()
+    try:
+        for nombre, (endpoint, parametros, limite) in LIMITES.items():
+            sentencias.clear()
+            endpoint(db=db, current_user=None, **parametros)
+            total = len(sentencias)
+            if total > limite:
+                fallos += 1
+                print(f"❌ {nombre}: {total} consultas (límite {limite})")
+                for sql in sentencias:
+                    print(f"     {' '.join(sql.split())[:120]}")
+            else:
+                print(f"✅ {nombre}: {total} consultas (límite {limite})")
+    finally:
+        db.rollback()
+        db.close()
+
+    print()
+    if fallos:
+        print(f"❌ {fallos} reporte(s) superan el límite de consultas")
+        sys.exit(1)
+    print("✅ Todos los reportes dentro del límite de consultas")
+
+
+if __name__ == "__main__":
+    main()
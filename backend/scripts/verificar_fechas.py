@@ -0,0 +1,136 @@
+"""
+Verificación de los rangos de fechas de negocio (app/utils/fechas.py)
+CDA La Florida
+
+Revisa, sin base de datos, los bordes donde un error de zona horaria mueve
+movimientos al día, mes o semana equivocados: la medianoche de Bogotá
+(04:59 / 05:00 UTC), el último día de un mes, febrero en año bisiesto y
+una semana que cruza el fin de mes. Falla (exit code 1) si alguno no da
+lo esperado.
+
+Uso:
+    python scripts/verificar_fechas.py
+"""
+import sys
+import os
+from datetime import date, datetime
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La configuración exige estas variables aunque aquí no se abre ninguna conexión
+os.environ.setdefault("DATABASE_URL", "postgresql://sin-conexion/verificar_fechas")
+os.environ.setdefault("SECRET_KEY", "verificar-fechas-sin-conexion")
+# Los valores esperados son los de Bogotá (UTC-5 todo el año, sin horario de verano)
+os.environ["TIMEZONE"] = "America/Bogota"
+
+from app.utils.fechas import (
+    inicio_dia_utc,
+    rango_dia,
+    rango_dias,
+    rango_semana,
+    rango_mes,
+    dias_del_mes,
+    a_hora_negocio,
+    fecha_negocio,
+    periodos,
+)
+
+
+def utc(*partes) -> datetime:
+    """Timestamp UTC naive, como lo guarda la base de datos"""
+    return datetime(*partes)
+
+
+def en_rango(momento: datetime, rango) -> bool:
+    """Si el timestamp cae en el rango semiabierto [inicio, fin)"""
+    inicio, fin = rango
+    return inicio <= momento < fin
+
+
+CASOS = [
+    # ==================== MEDIANOCHE DE BOGOTÁ ====================
+    ("medianoche local = 05:00 UTC",
+     inicio_dia_utc(date(2026, 3, 10)), utc(2026, 3, 10, 5, 0)),
+    ("23:59 Bogotá (04:59 UTC) pertenece al día anterior",
+     fecha_negocio(utc(2026, 3, 11, 4, 59, 59)), date(2026, 3, 10)),
+    ("00:00 Bogotá (05:00 UTC) pertenece al día nuevo",
+     fecha_negocio(utc(2026, 3, 11, 5, 0)), date(2026, 3, 11)),
+    ("rango_dia incluye las 04:59:59.999999 UTC del día siguiente",
+     en_rango(utc(2026, 3, 11, 4, 59, 59, 999999), rango_dia(date(2026, 3, 10))), True),
+    ("rango_dia excluye las 05:00 UTC del día siguiente",
+     en_rango(utc(2026, 3, 11, 5, 0), rango_dia(date(2026, 3, 10))), False),
+    ("rango_dia incluye su propia medianoche local",
+     en_rango(utc(2026, 3, 10, 5, 0), rango_dia(date(2026, 3, 10))), True),
+    ("a_hora_negocio resta 5 horas",
+     a_hora_negocio(utc(2026, 3, 11, 4, 59)).strftime("%Y-%m-%d %H:%M"), "2026-03-10 23:59"),
+
+    # ==================== FIN DE MES ====================
+    ("rango_dia del 31 de enero termina el 1 de febrero 05:00 UTC",
+     rango_dia(date(2026, 1, 31)), (utc(2026, 1, 31, 5), utc(2026, 2, 1, 5))),
+    ("1 de febrero 04:59 UTC sigue siendo 31 de enero",
+     fecha_negocio(utc(2026, 2, 1, 4, 59)), date(2026, 1, 31)),
+    ("rango_mes de enero",
+     rango_mes(2026, 1), (utc(2026, 1, 1, 5), utc(2026, 2, 1, 5))),
+    ("31 de enero 23:59 Bogotá cae en enero",
+     en_rango(utc(2026, 2, 1, 4, 59), rango_mes(2026, 1)), True),
+    ("1 de febrero 00:00 Bogotá cae en febrero",
+     en_rango(utc(2026, 2, 1, 5, 0), rango_mes(2026, 2)), True),
+    ("rango_mes de diciembre cruza el año",
+     rango_mes(2026, 12), (utc(2026, 12, 1, 5), utc(2027, 1, 1, 5))),
+    ("rango_dias del 30 de abril al 1 de mayo",
+     rango_dias(date(2026, 4, 30), date(2026, 5, 1)), (utc(2026, 4, 30, 5), utc(2026, 5, 2, 5))),
+    ("periodos por mes cruzando el año",
+     periodos(date(2026, 11, 15), date(2027, 1, 10), "mes"),
+     [date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)]),
+
+    # ==================== FEBRERO BISIESTO ====================
+    ("febrero de 2024 tiene 29 días", dias_del_mes(2024, 2), 29),
+    ("febrero de 2026 tiene 28 días", dias_del_mes(2026, 2), 28),
+    ("rango_mes de febrero de 2024 termina el 1 de marzo 05:00 UTC",
+     rango_mes(2024, 2), (utc(2024, 2, 1, 5), utc(2024, 3, 1, 5))),
+    ("29 de febrero de 2024 23:59 Bogotá cae en febrero",
+     en_rango(utc(2024, 3, 1, 4, 59), rango_mes(2024, 2)), True),
+    ("1 de marzo de 2024 04:59 UTC es 29 de febrero",
+     fecha_negocio(utc(2024, 3, 1, 4, 59)), date(2024, 2, 29)),
+    ("rango_dia del 29 de febrero de 2024",
+     rango_dia(date(2024, 2, 29)), (utc(2024, 2, 29, 5), utc(2024, 3, 1, 5))),
+
+    # ==================== SEMANA QUE CRUZA EL FIN DE MES ====================
+    # Lunes 30 de marzo a domingo 5 de abril de 2026
+    ("rango_semana desde un martes de fin de mes",
+     rango_semana(date(2026, 3, 31)), (utc(2026, 3, 30, 5), utc(2026, 4, 6, 5))),
+    ("rango_semana desde el domingo del mes siguiente",
+     rango_semana(date(2026, 4, 5)), (utc(2026, 3, 30, 5), utc(2026, 4, 6, 5))),
+    ("rango_semana desde el lunes",
+     rango_semana(date(2026, 3, 30)), (utc(2026, 3, 30, 5), utc(2026, 4, 6, 5))),
+    ("domingo 5 de abril 23:59 Bogotá cae en la semana",
+     en_rango(utc(2026, 4, 6, 4, 59), rango_semana(date(2026, 3, 31))), True),
+    ("lunes 6 de abril 00:00 Bogotá ya es la semana siguiente",
+     en_rango(utc(2026, 4, 6, 5, 0), rango_semana(date(2026, 3, 31))), False),
+    ("rango_semana con febrero bisiesto (lunes 26 feb a domingo 3 mar de 2024)",
+     rango_semana(date(2024, 2, 29)), (utc(2024, 2, 26, 5), utc(2024, 3, 4, 5))),
+    ("periodos por semana cruzando el fin de mes",
+     periodos(date(2026, 3, 25), date(2026, 4, 8), "semana"),
+     [date(2026, 3, 23), date(2026, 3, 30), date(2026, 4, 6)]),
+]
+
+
+def main():
+    fallas = 0
+    for nombre, obtenido, esperado in CASOS:
+        if obtenido == esperado:
+            print(f"✅ {nombre}")
+        else:
+            fallas += 1
+            print(f"❌ {nombre}: se obtuvo {obtenido!r}, se esperaba {esperado!r}")
+
+    print()
+    if fallas:
+        print(f"❌ {fallas} de {len(CASOS)} verificaciones de fechas fallaron")
+        sys.exit(1)
+    print(f"✅ {len(CASOS)} verificaciones de fechas correctas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Verificación de planes de consulta (regresión de índices)
+CDA La Florida
+
+Ejecuta EXPLAIN sobre las consultas frecuentes de vehiculos.py, cajas.py,
+tesoreria.py y reportes.py y falla (exit code 1) si alguna hace
+Sequential Scan sobre las tablas vigiladas.
+
+Las consultas no están copiadas a mano: se construyen con las mismas
+funciones consulta_* / select_* que usan los endpoints (y con la misma
+paginación keyset) y se compilan para EXPLAIN. Si un endpoint cambia su
+filtro u orden, esta verificación revisa la consulta nueva.
+
+Con --seed N inserta un volumen grande de datos sintéticos DENTRO de una
+transacción, reconstruye resumen_diario y los checkpoints de saldo,
+ejecuta ANALYZE, revisa los planes y hace ROLLBACK: la base de datos
+queda intacta. Sin --seed usa los datos y estadísticas actuales.
+
+Uso:
+    python scripts/verificar_planes_consulta.py --seed 200000
+"""
+import sys
+import os
+import json
+import uuid
+import argparse
+from datetime import timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.expression import ClauseElement
+
+from app.core.config import settings
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.api.v1.endpoints.vehiculos import select_pendientes, consulta_vehiculos, consulta_cobrados
+from app.api.v1.endpoints.cajas import (
+    select_vehiculos_cobrados,
+    consulta_pendientes_caja,
+    consulta_vehiculos_por_metodo,
+    consulta_movimientos_caja,
+    consulta_ultima_cerrada,
+    consulta_historial,
+)
+from app.api.v1.endpoints.tesoreria import (
+    consulta_movimientos,
+    select_totales_por_categoria,
+    select_serie_tesoreria,
+)
+from app.api.v1.endpoints.reportes import (
+    select_conteo_tramites,
+    consulta_totales_dia,
+    consulta_ingresos_7_dias,
+    consulta_totales_por_modulo,
+    consulta_desglose_conceptos,
+    consulta_medios_pago,
+    consulta_movimientos_caja_rango,
+    consulta_movimientos_tesoreria_rango,
+    consulta_tramites_rango,
+)
+from app.models.caja import Caja, select_caja_abierta
+from app.models.tesoreria import MovimientoTesoreria, MetodoPagoTesoreria
+from app.models.usuario import Usuario
+from app.models.vehiculo import VehiculoProceso
+from app.models.resumen_diario import ModuloResumen, reconstruir_resumen_diario
+from app.models.saldo_checkpoint import expr_saldo, generar_checkpoints
+from app.utils.fechas import hoy_negocio, rango_dia, rango_dias, rango_mes, utcnow
+from app.utils.paginacion import consulta_keyset, codificar_cursor
+
+# Tablas donde un Seq Scan se considera regresión
+TABLAS_VIGILADAS = {
+    "vehiculos_proceso", "movimientos_caja", "movimientos_tesoreria", "cajas",
+    "resumen_diario", "saldos_checkpoint",
+}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de una consulta, con los mismos parámetros que al ejecutarla"""
+    inherit_cache = False
+
+    def __init__(self, consulta):
+        self.consulta = consulta
+
+
+@compiles(Explain, "postgresql")
+def _compilar_explain(elemento, compilador, **kw):
+    sql = compilador.process(elemento.consulta, **kw)
+    # El resultado es el plan en JSON, no las columnas de la consulta (sin procesadores de tipo)
+    compilador._result_columns = []
+    return "EXPLAIN (FORMAT JSON) " + sql
+
+
+def _vehiculos(db, p, fechas=False, cursor=None):
+    """Página de listar_vehiculos (sin filtros, o con el rango de los últimos 7 días)"""
+    desde, hasta = (p["hoy"] - timedelta(days=6), p["hoy"]) if fechas else (None, None)
+    return consulta_keyset(
+        consulta_vehiculos(db, None, None, desde, hasta),
+        VehiculoProceso.fecha_registro, VehiculoProceso.id, cursor, 20
+    )
+
+
+def _movimientos_tesoreria(db, p, metodo_pago=None, cursor=None):
+    """Página de tesoreria.listar_movimientos (sin filtros, o por método y mes actual)"""
+    desde = p["hoy"].replace(day=1) if metodo_pago else None
+    hasta = p["hoy"] if metodo_pago else None
+    return consulta_keyset(
+        consulta_movimientos(db, None, None, desde, hasta, metodo_pago),
+        MovimientoTesoreria.fecha_movimiento, MovimientoTesoreria.id, cursor, 100
+    )
+
+
+def _historial(db, p, usuario, cursor=None):
+    """Página de cajas.historial para el usuario dado"""
+    return consulta_keyset(consulta_historial(db, usuario), Caja.fecha_apertura, Caja.id, cursor, 10)
+
+
+# Consultas de cada endpoint: (db, parámetros) -> Query o Select.
+# Parámetros: usuario, admin, caja_id, hoy, cursor
+CONSULTAS = {
+    # vehiculos.py
+    "vehiculos.listar_pendientes": lambda db, p: select_pendientes(),
+    "vehiculos.listar_vehiculos": lambda db, p: _vehiculos(db, p),
+    "vehiculos.listar_vehiculos (cursor)": lambda db, p: _vehiculos(db, p, cursor=p["cursor"]),
+    "vehiculos.listar_vehiculos (fechas)": lambda db, p: _vehiculos(db, p, fechas=True),
+    "vehiculos.listar_cobrados_hoy": lambda db, p: consulta_cobrados(db, p["caja_id"], *rango_dia(p["hoy"])),
+    # cajas.py
+    "cajas.caja_abierta": lambda db, p: select_caja_abierta(p["usuario"].id),
+    "cajas.vehiculos_cobrados": lambda db, p: select_vehiculos_cobrados(p["caja_id"]),
+    "cajas.pendientes_cierre": lambda db, p: consulta_pendientes_caja(db, p["caja_id"]),
+    "cajas.vehiculos_por_metodo": lambda db, p: consulta_vehiculos_por_metodo(db, p["caja_id"]),
+    "cajas.movimientos_caja": lambda db, p: consulta_movimientos_caja(db, p["caja_id"]),
+    "cajas.ultima_cerrada": lambda db, p: consulta_ultima_cerrada(db, p["usuario"].id).limit(1),
+    "cajas.historial (admin)": lambda db, p: _historial(db, p, p["admin"]),
+    "cajas.historial (admin, cursor)": lambda db, p: _historial(db, p, p["admin"], p["cursor"]),
+    "cajas.historial (cajero)": lambda db, p: _historial(db, p, p["usuario"]),
+    # tesoreria.py
+    "tesoreria.listar_movimientos": lambda db, p: _movimientos_tesoreria(db, p),
+    "tesoreria.listar_movimientos (cursor)": lambda db, p: _movimientos_tesoreria(db, p, cursor=p["cursor"]),
+    "tesoreria.listar_movimientos (método y fechas)": lambda db, p: _movimientos_tesoreria(
+        db, p, metodo_pago=MetodoPagoTesoreria.EFECTIVO
+    ),
+    "tesoreria.resumen_categorias": lambda db, p: select_totales_por_categoria(
+        *rango_dias(p["hoy"].replace(day=1), p["hoy"])
+    ),
+    "tesoreria.resumen_serie": lambda db, p: select_serie_tesoreria(
+        *rango_dias(p["hoy"].replace(day=1), p["hoy"]), "dia"
+    ),
+    "tesoreria.saldo": lambda db, p: select(expr_saldo(ModuloResumen.TESORERIA.value)),
+    # reportes.py
+    "reportes.dashboard_totales": lambda db, p: consulta_totales_dia(db, p["hoy"]),
+    "reportes.dashboard_ingresos_7_dias": lambda db, p: consulta_ingresos_7_dias(db, p["hoy"]),
+    "reportes.desglose_conceptos": lambda db, p: consulta_desglose_conceptos(db, p["hoy"].replace(day=1), p["hoy"]),
+    "reportes.desglose_medios_pago": lambda db, p: consulta_medios_pago(db, p["hoy"].replace(day=1), p["hoy"]),
+    "reportes.resumen_mensual": lambda db, p: consulta_totales_por_modulo(db, p["hoy"].replace(day=1), p["hoy"]),
+    "reportes.resumen_mensual_tramites": lambda db, p: select_conteo_tramites(
+        *rango_mes(p["hoy"].year, p["hoy"].month)
+    ),
+    "reportes.movimientos_caja": lambda db, p: consulta_movimientos_caja_rango(db, *rango_dia(p["hoy"])),
+    "reportes.movimientos_tesoreria": lambda db, p: consulta_movimientos_tesoreria_rango(db, *rango_dia(p["hoy"])),
+    "reportes.tramites": lambda db, p: consulta_tramites_rango(db, *rango_dia(p["hoy"])),
+}
+
+SEED_SQL = [
+    # Cajas cerradas a lo largo de ~2 años (una cada 3 horas; los totales acumulados no afectan los planes)
+    """
+    INSERT INTO cajas (id, usuario_id, fecha_apertura, fecha_cierre, monto_inicial, turno, estado, observaciones_cierre,
+                       total_ingresos, total_ingresos_efectivo, total_egresos, total_rtm, total_comision_soat,
+                       total_efectivo, total_tarjeta_debito, total_tarjeta_credito, total_transferencia,
+                       total_credismart, total_sistecredito)
+    SELECT gen_random_uuid(), :usuario_id, now() - (g * interval '3 hours'), now() - (g * interval '3 hours') + interval '2 hours',
+           0, 'MANANA', 'CERRADA', 'seed-planes', 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0
+    FROM generate_series(1, greatest(:n / 50, 10)) g
+    """,
+    # 50 movimientos por caja
+    """
+    INSERT INTO movimientos_caja (id, caja_id, tipo, monto, metodo_pago, concepto, ingresa_efectivo, created_at, created_by)
+    SELECT gen_random_uuid(), c.id, 'RTM',
+           CASE WHEN g % 20 = 0 THEN -15000 ELSE 205652 END,
+           (ARRAY['efectivo', 'tarjeta_debito', 'transferencia', 'credismart'])[1 + g % 4],
+           'seed-planes', g % 4 = 0, c.fecha_apertura + (g * interval '2 minutes'), :usuario_id
+    FROM cajas c CROSS JOIN generate_series(1, 50) g
+    WHERE c.observaciones_cierre = 'seed-planes'
+    """,
+    """
+    INSERT INTO movimientos_tesoreria (id, tipo, categoria_ingreso, categoria_egreso, monto, concepto,
+                                       metodo_pago, fecha_movimiento, created_at, created_by)
+    SELECT gen_random_uuid(),
+           CASE WHEN g % 3 = 0 THEN 'EGRESO' ELSE 'INGRESO' END::tipomovimientotesoreria,
+           CASE WHEN g % 3 = 0 THEN NULL ELSE 'TRASLADO_CAJA' END::categoriaingresotesoreria,
+           CASE WHEN g % 3 = 0 THEN 'PROVEEDORES' ELSE NULL END::categoriaegresotesoreria,
+           CASE WHEN g % 3 = 0 THEN -50000 ELSE 100000 END,
+           'seed-planes',
+           (ARRAY['EFECTIVO', 'TRANSFERENCIA', 'CHEQUE', 'CONSIGNACION'])[1 + g % 4]::metodopagotesoreria,
+           now() - (g * interval '5 minutes'), now(), :usuario_id
+    FROM generate_series(1, :n) g
+    """,
+    # Vehículos: casi todos pagados, una fracción mínima pendiente
+    """
+    INSERT INTO vehiculos_proceso (id, placa, tipo_vehiculo, ano_modelo, cliente_nombre, cliente_documento,
+                                   valor_rtm, tiene_soat, comision_soat, total_cobrado, metodo_pago,
+                                   registrado_runt, registrado_sicov, registrado_indra, fecha_pago,
+                                   estado, registrado_por, fecha_registro)
+    SELECT gen_random_uuid(), 'SEED' || (g % 1000), 'moto', 2015, 'Seed Planes', '1000000',
+           205652, false, 0, 205652, 'efectivo', false, false, false,
+           CASE WHEN g % 500 = 0 THEN NULL ELSE now() - (g * interval '4 minutes') END,
+           CASE WHEN g % 500 = 0 THEN 'REGISTRADO' ELSE 'PAGADO' END::estadovehiculo,
+           :usuario_id, now() - (g * interval '4 minutes')
+    FROM generate_series(1, :n) g
+    """,
+]
+
+TABLAS_ANALYZE = [
+    "cajas", "movimientos_caja", "movimientos_tesoreria", "vehiculos_proceso",
+    "resumen_diario", "saldos_checkpoint",
+]
+
+
+def sembrar(conn, usuario_id, n: int):
+    """Datos sintéticos, resumen diario, checkpoints y estadísticas (dentro de la transacción)"""
+    for sql in SEED_SQL:
+        conn.execute(text(sql), {"usuario_id": usuario_id, "n": n})
+    # Los INSERT directos no pasan por los listeners del ORM: recalcular las tablas derivadas
+    conn.execute(text("DELETE FROM saldos_checkpoint"))
+    reconstruir_resumen_diario(conn)
+    generar_checkpoints(conn)
+    for tabla in TABLAS_ANALYZE:
+        conn.execute(text(f"ANALYZE {tabla}"))
+
+
+def _nodos(plan: dict):
+    """Recorrer todos los nodos de un plan JSON de EXPLAIN"""
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from _nodos(hijo)
+
+
+def verificar(conn, parametros: dict) -> list:
+    """Ejecutar EXPLAIN de cada consulta y devolver las regresiones encontradas"""
+    regresiones = []
+    db = Session(bind=conn)
+    for nombre, construir in CONSULTAS.items():
+        consulta = construir(db, parametros)
+        if isinstance(consulta, Query):
+            consulta = consulta.statement
+        try:
+            with conn.begin_nested():
+                fila = conn.execute(Explain(consulta)).scalar()
+        except Exception as e:
+            regresiones.append((nombre, []))
+            print(f"❌ {nombre}: no se pudo ejecutar EXPLAIN ({e.__class__.__name__}: {e})")
+            continue
+        plan = (fila if isinstance(fila, list) else json.loads(fila))[0]["Plan"]
+        scans = [
+            n["Relation Name"] for n in _nodos(plan)
+            if n.get("Node Type") == "Seq Scan" and n.get("Relation Name") in TABLAS_VIGILADAS
+        ]
+        if scans:
+            regresiones.append((nombre, scans))
+            print(f"❌ {nombre}: Seq Scan sobre {', '.join(sorted(set(scans)))}")
+        else:
+            print(f"✅ {nombre}: {plan['Node Type']}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificar que las consultas frecuentes usen índices")
+    parser.add_argument("--seed", type=int, default=0, help="Filas sintéticas a insertar (se revierten)")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            usuario_id = conn.execute(text("SELECT id FROM usuarios LIMIT 1")).scalar()
+            if usuario_id is None:
+                print("❌ No hay usuarios en la base de datos (ejecutar init_db primero)")
+                sys.exit(2)
+
+            if args.seed:
+                print(f"📝 Insertando ~{args.seed:,} filas sintéticas por tabla (se revertirán)...")
+                sembrar(conn, usuario_id, args.seed)
+
+            caja_id = conn.execute(text("SELECT id FROM cajas ORDER BY fecha_apertura DESC LIMIT 1")).scalar()
+            parametros = {
+                # Usuarios sin sesión (solo se usan su id y su rol para armar las consultas)
+                "usuario": Usuario(id=usuario_id, rol="cajero"),
+                "admin": Usuario(id=usuario_id, rol="administrador"),
+                "caja_id": caja_id or uuid.uuid4(),
+                "hoy": hoy_negocio(),
+                # Una página intermedia: la mitad del histórico sembrado
+                "cursor": codificar_cursor(utcnow() - timedelta(days=180), uuid.uuid4()),
+            }
+
+            print()
+            regresiones = verificar(conn, parametros)
+        finally:
+            trans.rollback()
+
+    print()
+    if regresiones:
+        print(f"❌ {len(regresiones)} consulta(s) con Sequential Scan o EXPLAIN fallido")
+        sys.exit(1)
+    print("✅ Todas las consultas usan índices")
+
+
+if __name__ == "__main__":
+    main()